@@ -5,11 +5,42 @@ Implements rate limiting, caching, and error handling for movie data.
 
 import os
 import json
+import sqlite3
 import time
+import threading
 import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
 from typing import Dict, List, Optional, Any
 
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import RateLimitExceeded, create_rate_limiter
+from request_metrics import request_metrics
+from tmdb_cache import TMDBCache, TMDBMemoryCache
+
+
+class _CappedRetry(Retry):
+    """Retry policy that honors Retry-After but never sleeps past a cap."""
+
+    retry_after_max = 10.0
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, self.retry_after_max)
+
+
+class _InFlightFetch:
+    """A fetch in progress that concurrent callers for the same key wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+
 
 class TMDBService:
     """Service for interacting with The Movie Database API."""
@@ -21,92 +52,276 @@ class TMDBService:
         self.api_key = os.environ.get('TMDB_API_KEY')
         self.access_token = os.environ.get('TMDB_ACCESS_TOKEN')
         self.genre_cache = None
+        self._image_base_url = (self.IMAGE_BASE_URL, 0.0)
+        
+        # Point at a stand-in server, e.g. tests/performance/fake_tmdb.py
+        self.BASE_URL = os.environ.get('TMDB_BASE_URL', self.BASE_URL)
         
         if not self.api_key and not self.access_token:
             raise ValueError("TMDB_API_KEY or TMDB_ACCESS_TOKEN environment variable required")
         
-        # Rate limiting configuration
-        self.rate_limit = 35  # Conservative limit (TMDB allows ~40/sec)
-        self.last_request_time = 0
-        self.request_count = 0
-        self.rate_window_start = time.time()
+        # Token bucket, optionally shared by all worker processes
+        self.rate_limit = float(os.environ.get('TMDB_RATE_LIMIT', 35))  # Conservative (TMDB allows ~40/sec)
+        self.rate_limit_max_wait = float(os.environ.get('TMDB_RATE_LIMIT_MAX_WAIT', 2))
+        self.rate_limiter = create_rate_limiter(
+            self.rate_limit,
+            float(os.environ.get('TMDB_RATE_BURST', 10)),
+            shared_path=os.environ.get('TMDB_RATE_LIMIT_PATH'),
+            name='tmdb'
+        )
+        
+        # Pooled keep-alive session so repeat calls skip TCP/TLS setup
+        self.timeout = float(os.environ.get('TMDB_TIMEOUT', 10))
+        self.session = self._build_session()
         
-        # Simple in-memory cache
-        self.cache = {}
+        # Per-request timing
+        self._stats_lock = threading.Lock()
+        self.request_stats = {'requests': 0, 'errors': 0, 'retries': 0, 'coalesced': 0, 'total_ms': 0.0}
+        self.recent_requests = deque(maxlen=100)
+        
+        # Byte-bounded in-memory LRU in front of a persistent on-disk cache
+        self.cache = TMDBMemoryCache(int(os.environ.get('TMDB_MEMORY_CACHE_BYTES', 32 * 1024 * 1024)))
         self.cache_durations = {
             'search': 300,      # 5 minutes
             'movie': 3600,      # 1 hour
             'popular': 1800,    # 30 minutes
-            'config': 86400     # 24 hours
+            'config': 86400,    # 24 hours
+            'negative': 120     # Not found, empty or failed responses
         }
+        self.persistent_cache = self._open_persistent_cache()
+        
+        # Expired entries younger than this are served while refreshing
+        self.max_stale = float(os.environ.get('TMDB_CACHE_MAX_STALE', 86400))
+        self._refresh_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='tmdb-refresh')
+        self._refreshing = set()
+        self._refresh_lock = threading.Lock()
+        
+        # Single-flight: one upstream fetch per cache key at a time
+        self._inflight: Dict[str, _InFlightFetch] = {}
+        self._inflight_lock = threading.Lock()
     
-    def _enforce_rate_limit(self):
-        """Enforce rate limiting to prevent API quota exhaustion."""
-        current_time = time.time()
-        
-        # Reset counter every minute
-        if current_time - self.rate_window_start > 60:
-            self.request_count = 0
-            self.rate_window_start = current_time
-        
-        # Check if we need to wait
-        if self.request_count >= self.rate_limit:
-            sleep_time = 60 - (current_time - self.rate_window_start)
-            if sleep_time > 0:
-                time.sleep(sleep_time)
-                self.request_count = 0
-                self.rate_window_start = time.time()
-        
-        # Ensure minimum time between requests
-        time_since_last = current_time - self.last_request_time
-        if time_since_last < 0.03:  # 30ms minimum
-            time.sleep(0.03 - time_since_last)
-        
-        self.last_request_time = time.time()
-        self.request_count += 1
-    
-    def _get_cached_or_fetch(self, cache_key: str, cache_type: str, fetch_func) -> Any:
-        """Get data from cache or fetch if expired."""
-        # Check cache
-        if cache_key in self.cache:
-            data, timestamp = self.cache[cache_key]
-            if time.time() - timestamp < self.cache_durations[cache_type]:
+    def _build_session(self) -> requests.Session:
+        """Create a pooled session with retry/backoff for 429 and 5xx responses."""
+        pool_size = int(os.environ.get('TMDB_POOL_SIZE', 10))
+        retry = _CappedRetry(
+            total=int(os.environ.get('TMDB_MAX_RETRIES', 3)),
+            backoff_factor=float(os.environ.get('TMDB_RETRY_BACKOFF', 0.5)),
+            status_forcelist=(429, 500, 502, 503, 504),
+            allowed_methods=frozenset(['GET']),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        retry.retry_after_max = float(os.environ.get('TMDB_RETRY_AFTER_MAX', 10))
+        
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['Accept'] = 'application/json'
+        
+        # Use API key (preferred for v3 API), fall back to Bearer token
+        if self.api_key:
+            session.params = {'api_key': self.api_key}
+        elif self.access_token:
+            session.headers['Authorization'] = f"Bearer {self.access_token}"
+        return session
+    
+    def _record_request(self, endpoint: str, status: Optional[int], elapsed_ms: float, retries: int) -> None:
+        """Record timing for one API call, including any retries."""
+        with self._stats_lock:
+            self.request_stats['requests'] += 1
+            self.request_stats['retries'] += retries
+            self.request_stats['total_ms'] += elapsed_ms
+            if status is None or status >= 400:
+                self.request_stats['errors'] += 1
+            self.recent_requests.append({
+                'endpoint': endpoint,
+                'status': status,
+                'ms': round(elapsed_ms, 1),
+                'retries': retries
+            })
+        request_metrics.record_tmdb(endpoint, status, elapsed_ms / 1000)
+    
+    def get_request_stats(self) -> Dict[str, Any]:
+        """Get request counts and average latency for the API client."""
+        with self._stats_lock:
+            stats = dict(self.request_stats)
+            stats['avg_ms'] = round(stats['total_ms'] / stats['requests'], 1) if stats['requests'] else 0
+            stats['total_ms'] = round(stats['total_ms'], 1)
+            stats['recent'] = list(self.recent_requests)
+        stats['rate_limiter'] = self.rate_limiter.metrics()
+        return stats
+    
+    def warm_cache(self, popular_pages: int = 1, refresh: bool = False) -> None:
+        """Preload configuration, the genre map and the first popular pages."""
+        self.get_configuration(refresh=refresh)
+        self.get_genre_mapping(refresh=refresh)
+        for page in range(1, popular_pages + 1):
+            self.get_popular_movies(page, refresh=refresh)
+    
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get in-memory cache entries, bytes and hit ratio per cache type."""
+        return self.cache.stats()
+    
+    def close(self) -> None:
+        """Close pooled connections and the disk cache."""
+        self._refresh_executor.shutdown(wait=False)
+        self.session.close()
+        if self.persistent_cache is not None:
+            self.persistent_cache.close()
+    
+    def _enforce_rate_limit(self) -> None:
+        """Wait for a rate-limit token for at most ``TMDB_RATE_LIMIT_MAX_WAIT`` seconds.
+        
+        Raises ``RateLimitExceeded`` instead of blocking beyond that.
+        """
+        self.rate_limiter.acquire(self.rate_limit_max_wait)
+    
+    def _open_persistent_cache(self) -> Optional[TMDBCache]:
+        """Open the on-disk cache; an empty TMDB_CACHE_PATH disables it."""
+        cache_path = os.environ.get('TMDB_CACHE_PATH', 'tmdb_cache.db')
+        if not cache_path:
+            return None
+        
+        try:
+            cache = TMDBCache(cache_path)
+            cache.prune(float(os.environ.get('TMDB_CACHE_MAX_AGE', 30 * 86400)))
+            return cache
+        except sqlite3.Error as e:
+            print(f"Warning: TMDB disk cache disabled - {e}")
+            return None
+    
+    def _lookup_cache(self, cache_key: str, cache_type: str) -> Optional[tuple]:
+        """Find a cached ``(data, timestamp)`` entry in memory, then on disk."""
+        entry = self.cache.get(cache_key, cache_type)
+        request_metrics.record_cache('tmdb_memory', entry is not None)
+        if entry is None and self.persistent_cache is not None:
+            try:
+                entry = self.persistent_cache.get(cache_key)
+            except sqlite3.Error as e:
+                print(f"TMDB disk cache read error: {e}")
+            request_metrics.record_cache('tmdb_disk', entry is not None)
+            if entry is not None:
+                self.cache.set(cache_key, cache_type, entry)
+        return entry
+    
+    def _store_cached(self, cache_key: str, cache_type: str, data: Any) -> None:
+        """Cache a response in memory and on disk; None records a negative result."""
+        entry = (data, time.time())
+        self.cache.set(cache_key, cache_type, entry)
+        if self.persistent_cache is not None:
+            try:
+                self.persistent_cache.set(cache_key, cache_type, data, entry[1])
+            except sqlite3.Error as e:
+                print(f"TMDB disk cache write error: {e}")
+    
+    def _refresh_in_background(self, cache_key: str, cache_type: str, fetch_func) -> None:
+        """Re-fetch a stale entry off the request path, once per key."""
+        with self._refresh_lock:
+            if cache_key in self._refreshing:
+                return
+            self._refreshing.add(cache_key)
+        
+        def refresh():
+            try:
+                data = fetch_func()
+                if data:
+                    self._store_cached(cache_key, cache_type, data)
+            except RateLimitExceeded:
+                pass
+            finally:
+                with self._refresh_lock:
+                    self._refreshing.discard(cache_key)
+        
+        self._refresh_executor.submit(refresh)
+    
+    def _get_cached_or_fetch(self, cache_key: str, cache_type: str, fetch_func, refresh: bool = False) -> Any:
+        """Get data from cache or fetch if expired.
+        
+        Stale entries are returned immediately while a background refresh
+        runs, and are kept as the answer when TMDB cannot be reached.
+        ``refresh`` fetches even when the entry is fresh; other callers keep
+        reading the current entry meanwhile.
+        """
+        entry = self._lookup_cache(cache_key, cache_type)
+        if entry is not None and not refresh:
+            data, timestamp = entry
+            ttl = self.cache_durations['negative' if data is None else cache_type]
+            age = time.time() - timestamp
+            if age < ttl:
+                return data
+            if data is not None and age < ttl + self.max_stale:
+                self._refresh_in_background(cache_key, cache_type, fetch_func)
                 return data
         
-        # Fetch new data
-        data = fetch_func()
+        # Concurrent misses for the same key share one upstream fetch
+        with self._inflight_lock:
+            call = self._inflight.get(cache_key)
+            is_leader = call is None
+            if is_leader:
+                call = self._inflight[cache_key] = _InFlightFetch()
+        
+        if not is_leader:
+            with self._stats_lock:
+                self.request_stats['coalesced'] += 1
+            call.done.wait()
+            return call.result
+        
+        try:
+            call.result = self._fetch_and_store(cache_key, cache_type, fetch_func, entry)
+            return call.result
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(cache_key, None)
+            call.done.set()
+    
+    def _fetch_and_store(self, cache_key: str, cache_type: str, fetch_func, entry: Optional[tuple]) -> Any:
+        """Fetch a missing or expired entry and cache the outcome."""
+        # A rate-limited call is not cached as a miss
+        try:
+            data = fetch_func()
+        except RateLimitExceeded as e:
+            print(f"TMDB request skipped for {cache_key}: {e}")
+            return entry[0] if entry is not None else None
+        
         if data:
-            self.cache[cache_key] = (data, time.time())
+            self._store_cached(cache_key, cache_type, data)
+            return data
+        
+        # Fall back to the last good response rather than caching the failure
+        if entry is not None and entry[0] is not None:
+            return entry[0]
         
+        self._store_cached(cache_key, cache_type, None)
         return data
     
     def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
-        """Make API request with rate limiting and error handling."""
+        """Make API request with rate limiting and error handling.
+        
+        Raises ``RateLimitExceeded`` when no token is available in time.
+        """
         self._enforce_rate_limit()
         
         url = f"{self.BASE_URL}/{endpoint}"
-        headers = {}
-        request_params = {}
-        
-        # Use API key (preferred for v3 API), fall back to Bearer token
-        if self.api_key:
-            request_params["api_key"] = self.api_key
-        elif self.access_token:
-            headers["Authorization"] = f"Bearer {self.access_token}"
-        
-        if params:
-            request_params.update(params)
+        start = time.perf_counter()
+        response = None
         
         try:
-            response = requests.get(url, params=request_params, headers=headers, timeout=10)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
-            print(f"TMDB API error for {endpoint}: {e}")
+            print(f"TMDB API error for {endpoint} after {(time.perf_counter() - start) * 1000:.0f}ms: {e}")
             if hasattr(e, 'response') and e.response is not None:
                 print(f"Response status: {e.response.status_code}")
                 print(f"Response text: {e.response.text[:200]}")
             return None
+        finally:
+            retries = 0
+            if response is not None and response.raw is not None and response.raw.retries is not None:
+                retries = len(response.raw.retries.history)
+            self._record_request(endpoint, response.status_code if response is not None else None,
+                                 (time.perf_counter() - start) * 1000, retries)
     
     def search_movies(self, query: str, page: int = 1) -> Dict:
         """Search for movies by title."""
@@ -123,53 +338,59 @@ class TMDBService:
         return result or {"results": [], "total_results": 0}
     
     def get_movie_details(self, movie_id: int) -> Optional[Dict]:
-        """Get detailed information for a specific movie."""
+        """Get detailed information for a specific movie, including credits."""
         cache_key = f"movie:{movie_id}"
         
         def fetch():
-            return self._make_request(f"movie/{movie_id}")
+            return self._make_request(f"movie/{movie_id}", {"append_to_response": "credits"})
         
         return self._get_cached_or_fetch(cache_key, 'movie', fetch)
     
-    def get_popular_movies(self, page: int = 1) -> Dict:
+    def get_popular_movies(self, page: int = 1, refresh: bool = False) -> Dict:
         """Get list of popular movies."""
         cache_key = f"popular:{page}"
         
         def fetch():
             return self._make_request("movie/popular", {"page": page})
         
-        result = self._get_cached_or_fetch(cache_key, 'popular', fetch)
+        result = self._get_cached_or_fetch(cache_key, 'popular', fetch, refresh)
         return result or {"results": []}
     
-    def get_configuration(self) -> Dict:
+    def get_configuration(self, refresh: bool = False) -> Dict:
         """Get API configuration for image URLs."""
         cache_key = "config"
         
         def fetch():
             return self._make_request("configuration")
         
-        result = self._get_cached_or_fetch(cache_key, 'config', fetch)
-        return result or {"images": {"base_url": self.IMAGE_BASE_URL}}
+        result = self._get_cached_or_fetch(cache_key, 'config', fetch, refresh)
+        config = result or {"images": {"base_url": self.IMAGE_BASE_URL}}
+        
+        # Remember the image base URL so poster URLs skip the cache lookup
+        self._image_base_url = (config.get("images", {}).get("base_url", self.IMAGE_BASE_URL),
+                                time.time() + self.cache_durations['config'])
+        return config
     
     def get_poster_url(self, poster_path: str, size: str = "w500") -> str:
         """Generate full poster URL from poster path."""
         if not poster_path:
             return ""
         
-        config = self.get_configuration()
-        base_url = config.get("images", {}).get("base_url", self.IMAGE_BASE_URL)
+        base_url, expires_at = self._image_base_url
+        if time.time() >= expires_at:
+            base_url = self.get_configuration().get("images", {}).get("base_url", self.IMAGE_BASE_URL)
         return f"{base_url}/{size}{poster_path}"
     
-    def get_genre_mapping(self) -> Dict[int, str]:
+    def get_genre_mapping(self, refresh: bool = False) -> Dict[int, str]:
         """Get mapping of genre IDs to genre names."""
-        if self.genre_cache is not None:
+        if self.genre_cache is not None and not refresh:
             return self.genre_cache
         
         def fetch_genres():
             return self._make_request("genre/movie/list")
         
         cache_key = "genre_mapping"
-        result = self._get_cached_or_fetch(cache_key, 'config', fetch_genres)
+        result = self._get_cached_or_fetch(cache_key, 'config', fetch_genres, refresh)
         
         if result and 'genres' in result:
             self.genre_cache = {genre['id']: genre['name'] for genre in result['genres']}
@@ -187,11 +408,12 @@ class TMDBService:
     
     def get_movie_credits(self, movie_id: int) -> Optional[Dict]:
         """Get movie credits including cast and crew."""
-        def fetch():
-            return self._make_request(f"movie/{movie_id}/credits")
-        
-        cache_key = f"credits_{movie_id}"
-        return self._get_cached_or_fetch(cache_key, 'movie', fetch)
+        details = self.get_movie_details(movie_id)
+        return details.get('credits') if details else None
+    
+    def get_director(self, details: Dict) -> str:
+        """Get the director(s) from movie details fetched with credits."""
+        return self._extract_director(details.get('credits') or {})
     
     def enrich_movie_data(self, movie_data: Dict) -> Dict:
         """Enrich basic movie data with additional details."""
@@ -207,7 +429,7 @@ class TMDBService:
         enriched.update({
             'runtime': details.get('runtime'),
             'genres': [g['name'] for g in details.get('genres', [])],
-            'director': self._extract_director(details.get('credits', {})),
+            'director': self.get_director(details),
             'budget': details.get('budget'),
             'revenue': details.get('revenue'),
             'imdb_id': details.get('imdb_id'),
@@ -240,6 +462,60 @@ def get_tmdb_service() -> TMDBService:
     return tmdb_service
 
 
+def peek_tmdb_service() -> Optional[TMDBService]:
+    """Return the TMDB service if one has been created, without creating it."""
+    return tmdb_service
+
+
+class TMDBCacheWarmer(threading.Thread):
+    """Background thread that warms TMDB lookups and refreshes them before they expire."""
+    
+    def __init__(self, service: TMDBService, interval: float, popular_pages: int = 1):
+        super().__init__(name='tmdb-cache-warmer', daemon=True)
+        self.service = service
+        self.interval = interval
+        self.popular_pages = popular_pages
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        refresh = False
+        while not self._stop_event.is_set():
+            start = time.perf_counter()
+            try:
+                self.service.warm_cache(self.popular_pages, refresh=refresh)
+                print(f"TMDB cache warmed in {(time.perf_counter() - start) * 1000:.0f}ms")
+            except Exception as e:
+                print(f"TMDB cache warm-up error: {e}")
+            refresh = True
+            self._stop_event.wait(self.interval)
+    
+    def stop(self):
+        self._stop_event.set()
+
+
+cache_warmer = None
+
+def start_cache_warmer() -> Optional[TMDBCacheWarmer]:
+    """Start the opt-in TMDB cache warmer (``TMDB_CACHE_WARMUP=1``) once per process."""
+    global cache_warmer
+    if cache_warmer is not None or os.environ.get('TMDB_CACHE_WARMUP') != '1':
+        return cache_warmer
+    
+    service = get_tmdb_service()
+    if not isinstance(service, TMDBService):
+        return None
+    
+    # Refresh before the shortest TTL among the warmed lookups runs out
+    default_interval = 0.8 * min(service.cache_durations['popular'], service.cache_durations['config'])
+    cache_warmer = TMDBCacheWarmer(
+        service,
+        interval=float(os.environ.get('TMDB_WARMUP_INTERVAL', default_interval)),
+        popular_pages=int(os.environ.get('TMDB_WARMUP_POPULAR_PAGES', 2))
+    )
+    cache_warmer.start()
+    return cache_warmer
+
+
 class MockTMDBService:
     """Mock service for development when API key not available."""
     
@@ -291,6 +567,10 @@ class MockTMDBService:
         """Return placeholder poster URL."""
         return ""
     
+    def get_director(self, details: Dict) -> str:
+        """Return no director for mock details."""
+        return ""
+    
     def enrich_movie_data(self, movie_data: Dict) -> Dict:
         """Return data as-is for mock service."""
         return movie_data
@@ -7,12 +7,27 @@ watchlist, ratings, and viewing history.
 import os
 import json
 import sqlite3
-import time
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
 from functools import wraps
 from pathlib import Path
 
-from flask import Flask, render_template, request, jsonify, g, url_for, redirect, flash
+from flask import Flask, render_template, request, jsonify, g, url_for, redirect, flash, make_response
+
+from data_version import data_version
+from database import get_connection_manager
+from genre_service import sync_movie_genres
+from migrations import apply_migrations
+from request_metrics import request_metrics
+from response_cache import ResponseCache, cached
+from result_memo import analytics_memo
+from search_index import search_local_movies
+from stats_events import StatsBroadcaster
+from stats_service import (
+    get_stats_snapshot,
+    record_rating, record_watch, record_watchlist_change
+)
+from streak_service import record_watch_day
 
 # Load environment variables from .env file
 try:
@@ -22,7 +37,7 @@ except ImportError:
     print("Note: python-dotenv not installed. Using system environment variables only.")
 
 try:
-    from api_service import get_tmdb_service
+    from api_service import get_tmdb_service, peek_tmdb_service, start_cache_warmer
     from data_visualizations import (
         get_rating_distribution, get_genre_breakdown, get_viewing_timeline,
         get_rating_vs_popularity, get_watchlist_priority_breakdown,
@@ -39,100 +54,124 @@ app = Flask(__name__)
 app.config['DATABASE'] = 'reeltracker.db'
 app.config['SECRET_KEY'] = os.environ.get('SECRET_KEY', 'dev-key-change-in-production')
 
-# Simple cache decorator
+# Opt-in (TMDB_CACHE_WARMUP=1): preload TMDB config, genres and popular lists
+if FEATURES_ENABLED:
+    start_cache_warmer()
+
+# Shared response cache; write routes invalidate it after committing
+response_cache = ResponseCache(
+    max_entries=int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', 256)),
+    max_bytes=int(os.environ.get('RESPONSE_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+)
+
+
 def cache_response(duration=300):
     """Cache function results for specified duration in seconds."""
-    cache = {}
+    return cached(response_cache, duration)
+
+
+# Pushes stats deltas to /api/stats/stream subscribers
+stats_broadcaster = StatsBroadcaster()
+
+
+def load_stats_payload():
+    """Compute the /api/stats payload on a pooled connection."""
+    with get_connection_manager(app.config['DATABASE']).reader() as conn:
+        return get_stats_snapshot(conn, include_leaderboards=False).to_api_dict()
+
+
+def notify_data_changed():
+    """Drop cached views, bump the data version and push stats after a write commits."""
+    response_cache.invalidate()
+    data_version.bump()
     
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            # Create cache key from function name and arguments
-            key = f"{func.__name__}:{str(args)}:{str(kwargs)}"
-            
-            # Check if cached and not expired
-            if key in cache:
-                result, timestamp = cache[key]
-                if time.time() - timestamp < duration:
-                    return result
-            
-            # Generate new result and cache it
-            result = func(*args, **kwargs)
-            cache[key] = (result, time.time())
-            return result
+    if stats_broadcaster.subscribers:
+        stats_broadcaster.publish(load_stats_payload(), data_version.token(app.config['DATABASE']))
+
+
+def conditional_on_data_version(view):
+    """Answer If-None-Match with 304 while the data version is unchanged.
+
+    The ETag also covers the request path and today's date, since some
+    views show windows relative to the current day.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = data_version.etag(app.config['DATABASE'], date.today().isoformat(), request.full_path)
+        
+        if request.if_none_match.contains_weak(etag):
+            response = app.response_class(status=304)
+        else:
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
         
-        return wrapper
-    return decorator
+        response.set_etag(etag, weak=True)
+        response.cache_control.no_cache = True
+        return response
+    
+    return wrapper
 
 
 # Database connection management
 def get_db():
-    """Get database connection for current request."""
+    """Get a pooled reader connection for the current request."""
     db = getattr(g, '_database', None)
     if db is None:
-        db = g._database = sqlite3.connect(app.config['DATABASE'])
-        db.row_factory = sqlite3.Row
+        db = g._database = get_connection_manager(app.config['DATABASE']).acquire_reader()
     return db
 
 
+def get_write_db():
+    """Get the writer connection for the current request.
+
+    Writes in this process are serialized on one connection; it is held
+    until the request ends, so call this only in routes that write.
+    """
+    db = getattr(g, '_write_database', None)
+    if db is None:
+        db = g._write_database = get_connection_manager(app.config['DATABASE']).acquire_writer()
+    return db
+
+
+@app.before_request
+def start_request_timer():
+    """Time the request and count its SQL, TMDB calls and cache lookups."""
+    route = request.url_rule.rule if request.url_rule is not None else '<unmatched>'
+    request_metrics.start_request(route, request.method)
+
+
+@app.after_request
+def finish_request_timer(response):
+    """Add the request to its route's metrics."""
+    request_metrics.finish_request(response.status_code)
+    return response
+
+
+@app.teardown_request
+def finish_failed_request_timer(exception):
+    """Count requests that raised before a response was made as 500s."""
+    request_metrics.finish_request(500)
+
+
 @app.teardown_appcontext
 def close_connection(exception):
-    """Close database connection at end of request."""
-    db = getattr(g, '_database', None)
+    """Return database connections to the pool at end of request."""
+    manager = get_connection_manager(app.config['DATABASE'])
+    
+    db = g.pop('_database', None)
     if db is not None:
-        db.close()
+        manager.release_reader(db)
+    
+    if g.pop('_write_database', None) is not None:
+        manager.release_writer()
 
 
 def init_db():
-    """Initialize database with schema."""
-    db = get_db()
-    db.executescript('''
-        CREATE TABLE IF NOT EXISTS movies (
-            id INTEGER PRIMARY KEY,
-            title TEXT NOT NULL,
-            year INTEGER,
-            director TEXT,
-            genre TEXT,
-            plot TEXT,
-            poster_url TEXT,
-            imdb_id TEXT UNIQUE,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-        
-        CREATE TABLE IF NOT EXISTS watchlist (
-            id INTEGER PRIMARY KEY,
-            movie_id INTEGER NOT NULL,
-            added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            priority INTEGER DEFAULT 0,
-            notes TEXT,
-            FOREIGN KEY (movie_id) REFERENCES movies(id),
-            UNIQUE(movie_id)
-        );
-        
-        CREATE TABLE IF NOT EXISTS user_ratings (
-            id INTEGER PRIMARY KEY,
-            movie_id INTEGER NOT NULL,
-            rating REAL NOT NULL CHECK(rating >= 0 AND rating <= 10),
-            review TEXT,
-            rated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (movie_id) REFERENCES movies(id),
-            UNIQUE(movie_id)
-        );
-        
-        CREATE TABLE IF NOT EXISTS viewing_history (
-            id INTEGER PRIMARY KEY,
-            movie_id INTEGER NOT NULL,
-            watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            notes TEXT,
-            FOREIGN KEY (movie_id) REFERENCES movies(id)
-        );
-        
-        CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(title);
-        CREATE INDEX IF NOT EXISTS idx_movies_year ON movies(year);
-        CREATE INDEX IF NOT EXISTS idx_watchlist_priority ON watchlist(priority DESC);
-        CREATE INDEX IF NOT EXISTS idx_ratings_rating ON user_ratings(rating DESC);
-    ''')
-    db.commit()
+    """Bring the database schema up to the latest migration."""
+    applied = apply_migrations(get_write_db())
+    if applied:
+        print(f"Applied {applied} schema migration(s)")
 
 
 # Template rendering with proper template files
@@ -211,14 +250,7 @@ def search():
     # Local database search (fallback or when source='local')
     if not movies and query:
         db = get_db()
-        local_movies = db.execute('''
-            SELECT * FROM movies 
-            WHERE title LIKE ?
-            ORDER BY year DESC
-            LIMIT 20
-        ''', (f'%{query}%',)).fetchall()
-        
-        for movie in local_movies:
+        for movie in search_local_movies(db, query):
             movies.append({
                 'id': movie['id'],
                 'title': movie['title'],
@@ -227,6 +259,7 @@ def search():
                 'genre': movie['genre'],
                 'plot': movie['plot'],
                 'poster_url': movie['poster_url'],
+                'snippet': movie['snippet'],
                 'source': 'local'
             })
     
@@ -235,13 +268,13 @@ def search():
 
 
 @app.route('/movie/<int:movie_id>')
+@conditional_on_data_version
 def movie_detail(movie_id):
     """Show movie details with rating and watchlist options."""
     db = get_db()
     source = request.args.get('source', 'local')
     
     # Get today's date for the date picker
-    from datetime import date
     today_date = date.today().strftime('%Y-%m-%d')
     
     movie = None
@@ -263,7 +296,7 @@ def movie_detail(movie_id):
                     'id': tmdb_movie['id'],
                     'title': tmdb_movie.get('title', 'Unknown Title'),
                     'year': tmdb_movie.get('release_date', '')[:4] if tmdb_movie.get('release_date') else 'Unknown',
-                    'director': 'Unknown Director',  # TMDB doesn't include director in basic details
+                    'director': tmdb.get_director(tmdb_movie) or 'Unknown Director',
                     'genre': ', '.join([g['name'] for g in tmdb_movie.get('genres', [])]),
                     'plot': tmdb_movie.get('overview', 'No plot available'),
                     'poster_url': tmdb.get_poster_url(tmdb_movie.get('poster_path', '')),
@@ -296,7 +329,7 @@ def movie_detail(movie_id):
 @app.route('/movie/<int:movie_id>/rate', methods=['POST'])
 def rate_movie(movie_id):
     """Add or update movie rating."""
-    db = get_db()
+    db = get_write_db()
     rating = float(request.form.get('rating', 0))
     review = request.form.get('review', '').strip()
     source = request.form.get('source', 'local')
@@ -305,11 +338,15 @@ def rate_movie(movie_id):
     db_movie_id = movie_id
     
     try:
+        previous = db.execute('SELECT rating FROM user_ratings WHERE movie_id = ?',
+                              (db_movie_id,)).fetchone()
         db.execute('''
             INSERT OR REPLACE INTO user_ratings (movie_id, rating, review)
             VALUES (?, ?, ?)
         ''', (db_movie_id, rating, review))
+        record_rating(db, rating, previous['rating'] if previous else None)
         db.commit()
+        notify_data_changed()
     except Exception as e:
         return f"Error: {e}", 400
     
@@ -323,13 +360,15 @@ def rate_movie(movie_id):
 @app.route('/movie/<int:movie_id>/add-watchlist', methods=['POST'])
 def add_to_watchlist(movie_id):
     """Add movie to watchlist."""
-    db = get_db()
+    db = get_write_db()
     
     try:
         db.execute('INSERT INTO watchlist (movie_id) VALUES (?)', (movie_id,))
+        record_watchlist_change(db, 1)
         db.commit()
+        notify_data_changed()
     except sqlite3.IntegrityError:
-        pass  # Already in watchlist
+        db.rollback()  # Already in watchlist
     
     return f'<meta http-equiv="refresh" content="0;url=/movie/{movie_id}">'
 
@@ -337,9 +376,11 @@ def add_to_watchlist(movie_id):
 @app.route('/movie/<int:movie_id>/remove-watchlist', methods=['POST'])
 def remove_from_watchlist(movie_id):
     """Remove movie from watchlist."""
-    db = get_db()
-    db.execute('DELETE FROM watchlist WHERE movie_id = ?', (movie_id,))
+    db = get_write_db()
+    removed = db.execute('DELETE FROM watchlist WHERE movie_id = ?', (movie_id,)).rowcount
+    record_watchlist_change(db, -removed)
     db.commit()
+    notify_data_changed()
     
     return f'<meta http-equiv="refresh" content="0;url=/movie/{movie_id}">'
 
@@ -347,7 +388,7 @@ def remove_from_watchlist(movie_id):
 @app.route('/movie/<int:movie_id>/watched', methods=['POST'])
 def mark_watched(movie_id):
     """Mark movie as watched with optional custom date."""
-    db = get_db()
+    db = get_write_db()
     
     # Get watched date from form, default to current timestamp
     watched_date = request.form.get('watched_date')
@@ -365,18 +406,24 @@ def mark_watched(movie_id):
         watched_timestamp = None
     
     if watched_timestamp:
-        db.execute('INSERT INTO viewing_history (movie_id, watched_at, notes) VALUES (?, ?, ?)', 
-                  (movie_id, watched_timestamp, notes))
+        cursor = db.execute('INSERT INTO viewing_history (movie_id, watched_at, notes) VALUES (?, ?, ?)', 
+                           (movie_id, watched_timestamp, notes))
     else:
-        db.execute('INSERT INTO viewing_history (movie_id, notes) VALUES (?, ?)', 
-                  (movie_id, notes))
+        cursor = db.execute('INSERT INTO viewing_history (movie_id, notes) VALUES (?, ?)', 
+                           (movie_id, notes))
     
+    record_watch(db)
+    watched_day = db.execute('SELECT day FROM viewing_history WHERE id = ?',
+                             (cursor.lastrowid,)).fetchone()[0]
+    record_watch_day(db, watched_day)
     db.commit()
+    notify_data_changed()
     
     return f'<meta http-equiv="refresh" content="0;url=/movie/{movie_id}">'
 
 
 @app.route('/watchlist')
+@conditional_on_data_version
 def watchlist():
     """Show user's watchlist."""
     db = get_db()
@@ -392,100 +439,14 @@ def watchlist():
 
 
 @app.route('/stats')
+@conditional_on_data_version
 @cache_response(duration=60)  # Cache stats for 1 minute
 def stats():
     """Show viewing statistics with time series analysis."""
     db = get_db()
     
-    # Total movies
-    total_movies = db.execute('SELECT COUNT(*) as count FROM movies').fetchone()
-    
-    # Total ratings
-    total_ratings = db.execute('SELECT COUNT(*) as count FROM user_ratings').fetchone()
-    avg_rating = db.execute('SELECT AVG(rating) as avg FROM user_ratings').fetchone()
-    
-    # Watchlist size
-    watchlist_size = db.execute('SELECT COUNT(*) as count FROM watchlist').fetchone()
-    
-    # Watch count  
-    total_watches = db.execute('SELECT COUNT(*) as count FROM viewing_history').fetchone()
-    
-    # Unique genres count
-    unique_genres = db.execute('''
-        SELECT COUNT(DISTINCT genre) as count 
-        FROM movies m 
-        JOIN user_ratings r ON m.id = r.movie_id 
-        WHERE m.genre IS NOT NULL AND m.genre != ''
-    ''').fetchone()
-    
-    # Current viewing streak (simplified - days with movie watches)
-    current_streak = db.execute('''
-        SELECT COUNT(DISTINCT DATE(watched_at)) as count 
-        FROM viewing_history 
-        WHERE watched_at >= date('now', '-30 days')
-    ''').fetchone()
-    
-    # Weekly movie count (last 7 days)
-    weekly_movies = db.execute('''
-        SELECT COUNT(*) as count 
-        FROM viewing_history 
-        WHERE watched_at >= date('now', '-7 days')
-    ''').fetchone()
-    
-    # Unique decades
-    unique_decades = db.execute('''
-        SELECT COUNT(DISTINCT (year/10)*10) as count 
-        FROM movies m 
-        JOIN user_ratings r ON m.id = r.movie_id 
-        WHERE m.year IS NOT NULL
-    ''').fetchone()
-    
-    # Watchlist completion percentage
-    watchlist_completion = db.execute('''
-        SELECT 
-            CASE 
-                WHEN COUNT(w.id) = 0 THEN 0
-                ELSE ROUND((COUNT(vh.id) * 100.0) / COUNT(w.id))
-            END as completion
-        FROM watchlist w
-        LEFT JOIN viewing_history vh ON w.movie_id = vh.movie_id
-    ''').fetchone()
-    
-    # Top rated movies
-    top_rated = db.execute('''
-        SELECT m.*, r.rating
-        FROM user_ratings r
-        JOIN movies m ON r.movie_id = m.id
-        ORDER BY r.rating DESC
-        LIMIT 10
-    ''').fetchall()
-    
-    # Most watched
-    most_watched = db.execute('''
-        SELECT m.*, COUNT(v.id) as watch_count
-        FROM viewing_history v
-        JOIN movies m ON v.movie_id = m.id
-        GROUP BY m.id
-        ORDER BY watch_count DESC
-        LIMIT 10
-    ''').fetchall()
-    
-    # Rating distribution for chart
-    all_ratings = db.execute('SELECT rating FROM user_ratings').fetchall()
-    rating_distribution = [0, 0, 0, 0, 0]  # 0-1, 2-3, 4-5, 6-7, 8-10
-    
-    for rating in all_ratings:
-        r = float(rating['rating'])
-        if r <= 1:
-            rating_distribution[0] += 1
-        elif r <= 3:
-            rating_distribution[1] += 1
-        elif r <= 5:
-            rating_distribution[2] += 1
-        elif r <= 7:
-            rating_distribution[3] += 1
-        else:
-            rating_distribution[4] += 1
+    # Counters, windows and leaderboards in two statements
+    snapshot = get_stats_snapshot(db)
     
     # Time series data for viewing habits
     time_series_data = None
@@ -493,37 +454,26 @@ def stats():
     
     if FEATURES_ENABLED:
         try:
-            ts_service = get_time_series_service()
+            ts_service = get_time_series_service(app.config['DATABASE'])
             time_series_data = ts_service.get_viewing_timeline_extended()
             viewing_streaks = ts_service.get_viewing_streaks()
         except Exception as e:
             print(f"Error getting time series data: {e}")
     
     return render_page('stats.html', title='Statistics',
-                      total_movies=total_movies,
-                      total_ratings=total_ratings,
-                      avg_rating=avg_rating,
-                      watchlist_size=watchlist_size,
-                      total_watches=total_watches,
-                      unique_genres=unique_genres,
-                      current_streak=current_streak,
-                      weekly_movies=weekly_movies,
-                      unique_decades=unique_decades,
-                      watchlist_completion=watchlist_completion,
-                      top_rated=top_rated,
-                      most_watched=most_watched,
-                      rating_distribution=rating_distribution,
+                      stats=snapshot,
                       time_series_data=time_series_data,
                       viewing_streaks=viewing_streaks)
 
 
 @app.route('/timeline')
+@conditional_on_data_version
 def timeline():
     """Show time series viewing habits analysis."""
     try:
         from time_series_service import TimeSeriesService
         
-        ts_service = TimeSeriesService()
+        ts_service = TimeSeriesService(app.config['DATABASE'])
         time_series_data = ts_service.get_viewing_timeline_extended()
         viewing_streaks = ts_service.get_viewing_streaks()
         
@@ -543,78 +493,92 @@ def timeline():
 
 
 @app.route('/api/stats')
+@conditional_on_data_version
 def api_stats():
     """Get current statistics as JSON for real-time updates."""
     db = get_db()
     
-    # Get all the stats
-    total_movies = db.execute('SELECT COUNT(*) as count FROM movies').fetchone()
-    total_ratings = db.execute('SELECT COUNT(*) as count FROM user_ratings').fetchone()
-    total_watches = db.execute('SELECT COUNT(*) as count FROM viewing_history').fetchone()
-    
-    unique_genres = db.execute('''
-        SELECT COUNT(DISTINCT genre) as count 
-        FROM movies m 
-        JOIN user_ratings r ON m.id = r.movie_id 
-        WHERE m.genre IS NOT NULL AND m.genre != ''
-    ''').fetchone()
-    
-    current_streak = db.execute('''
-        SELECT COUNT(DISTINCT DATE(watched_at)) as count 
-        FROM viewing_history 
-        WHERE watched_at >= date('now', '-30 days')
-    ''').fetchone()
-    
-    weekly_movies = db.execute('''
-        SELECT COUNT(*) as count 
-        FROM viewing_history 
-        WHERE watched_at >= date('now', '-7 days')
-    ''').fetchone()
-    
-    unique_decades = db.execute('''
-        SELECT COUNT(DISTINCT (year/10)*10) as count 
-        FROM movies m 
-        JOIN user_ratings r ON m.id = r.movie_id 
-        WHERE m.year IS NOT NULL
-    ''').fetchone()
-    
-    watchlist_completion = db.execute('''
-        SELECT 
-            CASE 
-                WHEN COUNT(w.id) = 0 THEN 0
-                ELSE ROUND((COUNT(vh.id) * 100.0) / COUNT(w.id))
-            END as completion
-        FROM watchlist w
-        LEFT JOIN viewing_history vh ON w.movie_id = vh.movie_id
-    ''').fetchone()
-    
-    # Rating distribution for chart
-    all_ratings = db.execute('SELECT rating FROM user_ratings').fetchall()
-    rating_distribution = [0, 0, 0, 0, 0]  # 0-1, 2-3, 4-5, 6-7, 8-10
-    
-    for rating in all_ratings:
-        r = float(rating['rating'])
-        if r <= 1:
-            rating_distribution[0] += 1
-        elif r <= 3:
-            rating_distribution[1] += 1
-        elif r <= 5:
-            rating_distribution[2] += 1
-        elif r <= 7:
-            rating_distribution[3] += 1
-        else:
-            rating_distribution[4] += 1
+    return jsonify(get_stats_snapshot(db, include_leaderboards=False).to_api_dict())
+
+
+@app.route('/api/stats/stream')
+def api_stats_stream():
+    """Stream statistics deltas as Server-Sent Events."""
+    db_path = app.config['DATABASE']
+    initial = get_stats_snapshot(get_db(), include_leaderboards=False).to_api_dict()
     
-    return jsonify({
-        'totalMovies': total_watches['count'],
-        'uniqueGenres': unique_genres['count'],
-        'currentStreak': current_streak['count'],
-        'totalRatings': total_ratings['count'],
-        'weeklyMovies': weekly_movies['count'],
-        'uniqueDecades': unique_decades['count'],
-        'watchlistCompletion': watchlist_completion['completion'],
-        'ratingDistribution': rating_distribution
-    })
+    stream = stats_broadcaster.stream(initial, lambda: data_version.token(db_path), load_stats_payload)
+    return app.response_class(stream, mimetype='text/event-stream',
+                              headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def cache_metrics():
+    """Process-wide cache counters for /metrics, read at scrape time.
+
+    The TMDB cache is only reported once a request has created the service;
+    a scrape never creates it.
+    """
+    caches = {'response': response_cache.metrics(), 'analytics': analytics_memo.metrics()}
+    if FEATURES_ENABLED:
+        tmdb_cache = getattr(peek_tmdb_service(), 'cache', None)
+        if tmdb_cache is not None:
+            by_type = tmdb_cache.stats().values()
+            caches['tmdb_memory'] = {name: sum(stats[name] for stats in by_type)
+                                     for name in ('hits', 'misses', 'evictions', 'entries')}
+    
+    return [
+        ('reeltracker_cache_lookups_total', 'counter', 'Cache lookups in this process, by cache and result.',
+         [({'cache': cache, 'result': result}, stats[counter])
+          for cache, stats in caches.items() for result, counter in (('hit', 'hits'), ('miss', 'misses'))]),
+        ('reeltracker_cache_evictions_total', 'counter', 'Entries evicted to stay within a cache bound.',
+         [({'cache': cache}, stats['evictions']) for cache, stats in caches.items()]),
+        ('reeltracker_cache_entries', 'gauge', 'Entries currently cached.',
+         [({'cache': cache}, stats['entries']) for cache, stats in caches.items()]),
+    ]
+
+
+@app.route('/metrics')
+def metrics():
+    """Per-route timing, SQL, TMDB and cache metrics in the Prometheus text format."""
+    return app.response_class(request_metrics.render(cache_metrics()),
+                              content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+MOVIE_UPSERT_SQL = '''
+    INSERT OR REPLACE INTO movies (id, title, year, director, genre, plot, poster_url, imdb_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Upper bound on ids accepted by the bulk save endpoint
+BULK_SAVE_LIMIT = 50
+
+
+def tmdb_movie_row(tmdb, movie_data):
+    """Build the movies row and genre names for TMDB details fetched with credits."""
+    genre_names = [g['name'] for g in movie_data.get('genres', [])]
+    row = (
+        movie_data['id'],
+        movie_data.get('title', 'Unknown Title'),
+        movie_data.get('release_date', '')[:4] if movie_data.get('release_date') else None,
+        tmdb.get_director(movie_data) or 'Unknown Director',
+        ', '.join(genre_names),
+        movie_data.get('overview', ''),
+        tmdb.get_poster_url(movie_data.get('poster_path', '')),
+        movie_data.get('imdb_id', '')
+    )
+    return row, genre_names
+
+
+def save_tmdb_movies(db, tmdb, movies):
+    """Insert TMDB movies in one transaction and refresh derived data."""
+    rows = [tmdb_movie_row(tmdb, movie_data) for movie_data in movies]
+    
+    db.executemany(MOVIE_UPSERT_SQL, [row for row, _ in rows])
+    for row, genre_names in rows:
+        sync_movie_genres(db, row[0], genre_names)
+    
+    db.commit()
+    notify_data_changed()
 
 
 @app.route('/movie/<int:movie_id>/save-from-api', methods=['POST'])
@@ -625,36 +589,15 @@ def save_movie_from_api(movie_id):
     
     try:
         tmdb = get_tmdb_service()
+        
+        # Details and credits arrive in one cached response
         movie_data = tmdb.get_movie_details(movie_id)
         
         if not movie_data:
             return "Movie not found in API", 404
         
-        db = get_db()
-        
-        # Get additional details including director
-        credits = tmdb._make_request(f"movie/{movie_id}/credits")
-        director = 'Unknown Director'
-        if credits and 'crew' in credits:
-            directors = [person['name'] for person in credits['crew'] if person.get('job') == 'Director']
-            director = ', '.join(directors[:2]) if directors else 'Unknown Director'
-        
-        # Insert movie into local database
-        db.execute('''
-            INSERT OR REPLACE INTO movies (id, title, year, director, genre, plot, poster_url, imdb_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            movie_data['id'],
-            movie_data.get('title', 'Unknown Title'),
-            movie_data.get('release_date', '')[:4] if movie_data.get('release_date') else None,
-            director,
-            ', '.join([g['name'] for g in movie_data.get('genres', [])]),
-            movie_data.get('overview', ''),
-            tmdb.get_poster_url(movie_data.get('poster_path', '')),
-            movie_data.get('imdb_id', '')
-        ))
-        
-        db.commit()
+        # Take the writer only once the network calls are done
+        save_tmdb_movies(get_write_db(), tmdb, [movie_data])
         
         return f'<meta http-equiv="refresh" content="0;url=/movie/{movie_id}">'
         
@@ -663,8 +606,48 @@ def save_movie_from_api(movie_id):
         return f"Error saving movie: {e}", 500
 
 
+@app.route('/api/movies/save-from-api', methods=['POST'])
+def bulk_save_movies_from_api():
+    """Save several TMDB movies: concurrent fetches, one write transaction."""
+    if not FEATURES_ENABLED:
+        return jsonify({'error': 'API features not available'}), 404
+    
+    payload = request.get_json(silent=True) or {}
+    try:
+        movie_ids = list(dict.fromkeys(int(movie_id) for movie_id in payload.get('ids', [])))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'ids must be a list of TMDB movie ids'}), 400
+    
+    if not movie_ids:
+        return jsonify({'error': 'No movie ids given'}), 400
+    if len(movie_ids) > BULK_SAVE_LIMIT:
+        return jsonify({'error': f'At most {BULK_SAVE_LIMIT} movies per request'}), 400
+    
+    try:
+        tmdb = get_tmdb_service()
+        
+        workers = min(len(movie_ids), int(os.environ.get('TMDB_POOL_SIZE', 10)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            details = list(executor.map(request_metrics.propagate(tmdb.get_movie_details), movie_ids))
+        
+        found = [movie_data for movie_data in details if movie_data]
+        missing = [movie_id for movie_id, movie_data in zip(movie_ids, details) if not movie_data]
+        
+        if found:
+            save_tmdb_movies(get_write_db(), tmdb, found)
+        
+        return jsonify({
+            'saved': [movie_data['id'] for movie_data in found],
+            'missing': missing
+        })
+        
+    except Exception as e:
+        print(f"Error bulk saving movies from API: {e}")
+        return jsonify({'error': f'Error saving movies: {e}'}), 500
+
+
 if __name__ == '__main__':
-    # Initialize database on first run
+    # Apply schema migrations before serving
     with app.app_context():
         init_db()
     
@@ -0,0 +1,56 @@
+"""Data version tracking for ReelTracker.
+
+Provides a cheap token that changes whenever the database is written, used
+to answer conditional GETs without opening a connection.
+"""
+
+import hashlib
+import itertools
+import os
+import threading
+from typing import Tuple
+
+
+class DataVersion:
+    """Monotonic write counter combined with the database file signature.
+
+    The counter is bumped by this process's write routes. The file signature
+    (mtime and size of the database and its WAL) picks up commits made by
+    other worker processes, which do not share the counter.
+    """
+
+    def __init__(self):
+        self._counter = itertools.count(1)
+        self._lock = threading.Lock()
+        self.version = 0
+
+    def bump(self) -> int:
+        """Record a committed write and return the new version."""
+        with self._lock:
+            self.version = next(self._counter)
+            return self.version
+
+    @staticmethod
+    def _file_signature(db_path: str) -> Tuple[int, ...]:
+        """Return mtime/size pairs for the database and its WAL file."""
+        signature = []
+        for path in (db_path, f"{db_path}-wal"):
+            try:
+                stat = os.stat(path)
+                signature.extend((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.extend((0, 0))
+        return tuple(signature)
+
+    def token(self, db_path: str) -> str:
+        """Return an opaque token that changes after every write."""
+        return f"{self.version}-{'-'.join(map(str, self._file_signature(db_path)))}"
+
+    def etag(self, db_path: str, *parts: str) -> str:
+        """Build an ETag from the current token and request-specific parts."""
+        raw = ':'.join((self.token(db_path),) + tuple(str(part) for part in parts))
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+# Process-wide version: write routes bump it; ETags and memoized results read it
+data_version = DataVersion()
@@ -1,117 +1,64 @@
 """Data visualization components for ReelTracker.
 
 Generates Chart.js compatible data following minimalist design principles.
+Results are memoized until the database changes (``result_memo``).
 """
 
-import sqlite3
-from collections import defaultdict, Counter
 from datetime import datetime, timedelta
 from typing import Dict, List, Any
 
+from database import get_connection_manager
+from genre_service import get_rated_genre_counts
+from result_memo import memoize
+from stats_service import RATING_BUCKET_LABELS, get_stats_aggregates
+from viewing_rollup import get_viewing_rollup
 
+
+@memoize
 def get_rating_distribution(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
-    """Generate rating distribution data for visualization."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
-    # Get all user ratings
-    ratings = conn.execute("""
-        SELECT rating FROM user_ratings 
-        WHERE rating IS NOT NULL
-        ORDER BY rating
-    """).fetchall()
-    
-    conn.close()
-    
-    if not ratings:
-        return {
-            'labels': ['0-2', '2-4', '4-6', '6-8', '8-10'],
-            'data': [0, 0, 0, 0, 0],
-            'total': 0
-        }
-    
-    # Group ratings into ranges
-    ranges = {
-        '0-2': 0, '2-4': 0, '4-6': 0, '6-8': 0, '8-10': 0
-    }
-    
-    for rating_row in ratings:
-        rating = rating_row['rating']
-        if rating <= 2:
-            ranges['0-2'] += 1
-        elif rating <= 4:
-            ranges['2-4'] += 1
-        elif rating <= 6:
-            ranges['4-6'] += 1
-        elif rating <= 8:
-            ranges['6-8'] += 1
-        else:
-            ranges['8-10'] += 1
+    """Generate rating distribution data for visualization.
+
+    Uses the same buckets as the statistics dashboard, read from the
+    maintained aggregate row.
+    """
+    with get_connection_manager(db_path).reader() as conn:
+        aggregates = get_stats_aggregates(conn)
     
     return {
-        'labels': list(ranges.keys()),
-        'data': list(ranges.values()),
-        'total': len(ratings)
+        'labels': list(RATING_BUCKET_LABELS),
+        'data': [aggregates[f'rating_bucket_{i}'] for i in range(len(RATING_BUCKET_LABELS))],
+        'total': aggregates['total_ratings']
     }
 
 
+@memoize
 def get_genre_breakdown(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
-    """Generate genre distribution from watched movies."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
+    """Generate genre distribution from rated movies."""
+    with get_connection_manager(db_path).reader() as conn:
+        counts = get_rated_genre_counts(conn, limit=10)
     
-    # Get genres from rated movies
-    movies = conn.execute("""
-        SELECT m.genre FROM movies m
-        JOIN user_ratings ur ON m.id = ur.movie_id
-        WHERE m.genre IS NOT NULL AND m.genre != ''
-    """).fetchall()
-    
-    conn.close()
-    
-    if not movies:
+    if not counts['genres']:
         return {
             'labels': ['No Data'],
             'data': [1],
             'total': 0
         }
     
-    # Parse and count genres
-    genre_counter = Counter()
-    for movie_row in movies:
-        genres = movie_row['genre'].split(', ')
-        for genre in genres:
-            genre = genre.strip()
-            if genre:
-                genre_counter[genre] += 1
-    
-    # Get top 10 genres
-    top_genres = genre_counter.most_common(10)
-    
     return {
-        'labels': [genre for genre, _ in top_genres],
-        'data': [count for _, count in top_genres],
-        'total': sum(genre_counter.values())
+        'labels': [genre for genre, _ in counts['genres']],
+        'data': [count for _, count in counts['genres']],
+        'total': counts['total']
     }
 
 
+@memoize
 def get_viewing_timeline(db_path: str = 'reeltracker.db', days: int = 30) -> Dict[str, Any]:
     """Generate viewing activity over time."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
     # Get viewing history for last N days
     cutoff_date = datetime.now() - timedelta(days=days)
     
-    views = conn.execute("""
-        SELECT date(watched_at) as day, COUNT(*) as count
-        FROM viewing_history 
-        WHERE watched_at >= ?
-        GROUP BY date(watched_at)
-        ORDER BY day
-    """, (cutoff_date.strftime('%Y-%m-%d'),)).fetchall()
-    
-    conn.close()
+    with get_connection_manager(db_path).reader() as conn:
+        views = get_viewing_rollup(conn, cutoff_date.strftime('%Y-%m-%d'), 'day')
     
     # Fill in missing days with zero
     viewing_data = {}
@@ -123,8 +70,8 @@ def get_viewing_timeline(db_path: str = 'reeltracker.db', days: int = 30) -> Dic
         current_date += timedelta(days=1)
     
     # Add actual viewing counts
-    for view in views:
-        viewing_data[view['day']] = view['count']
+    for day, count, _, _ in views:
+        viewing_data[day] = count
     
     # Format for Chart.js
     sorted_dates = sorted(viewing_data.keys())
@@ -136,25 +83,22 @@ def get_viewing_timeline(db_path: str = 'reeltracker.db', days: int = 30) -> Dic
     }
 
 
+@memoize
 def get_rating_vs_popularity(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
     """Compare personal ratings with movie popularity (if available)."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
-    # Get ratings with movie details
-    ratings = conn.execute("""
-        SELECT 
-            ur.rating as personal_rating,
-            m.title,
-            m.year,
-            COALESCE(m.imdb_rating, 7.0) as popularity_score
-        FROM user_ratings ur
-        JOIN movies m ON ur.movie_id = m.id
-        WHERE ur.rating IS NOT NULL
-        ORDER BY ur.rating DESC
-    """).fetchall()
-    
-    conn.close()
+    with get_connection_manager(db_path).reader() as conn:
+        # Get ratings with movie details
+        ratings = conn.execute("""
+            SELECT 
+                ur.rating as personal_rating,
+                m.title,
+                m.year,
+                COALESCE(m.imdb_rating, 7.0) as popularity_score
+            FROM user_ratings ur
+            JOIN movies m ON ur.movie_id = m.id
+            WHERE ur.rating IS NOT NULL
+            ORDER BY ur.rating DESC
+        """).fetchall()
     
     if not ratings:
         return {
@@ -183,25 +127,22 @@ def get_rating_vs_popularity(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
     }
 
 
+@memoize
 def get_watchlist_priority_breakdown(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
     """Analyze watchlist by priority levels."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
-    priorities = conn.execute("""
-        SELECT priority, COUNT(*) as count
-        FROM watchlist
-        GROUP BY priority
-        ORDER BY 
-            CASE priority 
-                WHEN 'high' THEN 1 
-                WHEN 'medium' THEN 2 
-                WHEN 'low' THEN 3 
-                ELSE 4 
-            END
-    """).fetchall()
-    
-    conn.close()
+    with get_connection_manager(db_path).reader() as conn:
+        priorities = conn.execute("""
+            SELECT priority, COUNT(*) as count
+            FROM watchlist
+            GROUP BY priority
+            ORDER BY 
+                CASE priority 
+                    WHEN 'high' THEN 1 
+                    WHEN 'medium' THEN 2 
+                    WHEN 'low' THEN 3 
+                    ELSE 4 
+                END
+        """).fetchall()
     
     if not priorities:
         return {
@@ -211,31 +152,22 @@ def get_watchlist_priority_breakdown(db_path: str = 'reeltracker.db') -> Dict[st
         }
     
     return {
-        'labels': [p['priority'].title() for p in priorities],
+        'labels': [str(p['priority']).title() for p in priorities],
         'data': [p['count'] for p in priorities],
         'total': sum(p['count'] for p in priorities)
     }
 
 
+@memoize
 def get_monthly_stats(db_path: str = 'reeltracker.db') -> Dict[str, Any]:
     """Get monthly viewing statistics."""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    
-    # Get monthly data for the last 12 months
-    monthly_data = conn.execute("""
-        SELECT 
-            strftime('%Y-%m', watched_at) as month,
-            COUNT(*) as movies_watched,
-            AVG(ur.rating) as avg_rating
-        FROM viewing_history vh
-        LEFT JOIN user_ratings ur ON vh.movie_id = ur.movie_id
-        WHERE watched_at >= date('now', '-12 months')
-        GROUP BY strftime('%Y-%m', watched_at)
-        ORDER BY month
-    """).fetchall()
-    
-    conn.close()
+    with get_connection_manager(db_path).reader() as conn:
+        # Get monthly data for the last 12 months
+        since_day = conn.execute("SELECT date('now', '-12 months')").fetchone()[0]
+        monthly_data = [
+            {'month': month, 'movies_watched': views, 'avg_rating': rating_sum / rating_count if rating_count else None}
+            for month, views, rating_sum, rating_count in get_viewing_rollup(conn, since_day, 'month')
+        ]
     
     if not monthly_data:
         return {
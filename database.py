@@ -0,0 +1,170 @@
+"""SQLite connection management for ReelTracker.
+
+One ``ConnectionManager`` per database file hands out pooled reader
+connections and a single writer connection, all opened in WAL mode with
+tuned pragmas and memory-mapped I/O. WAL lets analytics reads run while a
+write is in progress, and pooling removes per-call connection setup. The
+first connection a manager opens applies pending schema migrations (see
+``migrations``) before anything else reads the database. Connections time
+their statements for ``request_metrics``.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from request_metrics import InstrumentedConnection
+
+
+# Applied to every connection; journal_mode is persistent and set once.
+DEFAULT_PRAGMAS = {
+    'synchronous': 'NORMAL',      # Safe with WAL, avoids an fsync per commit
+    'cache_size': -16000,         # ~16 MB page cache per connection
+    'mmap_size': 268435456,       # 256 MB memory-mapped reads
+    'temp_store': 'MEMORY',
+    'busy_timeout': 5000,         # ms to wait on a lock held by another process
+    'recursive_triggers': 'ON',   # INSERT OR REPLACE fires delete triggers (search index)
+}
+
+
+def execute_script(db: sqlite3.Connection, script: str) -> None:
+    """Run a multi-statement SQL script inside the current transaction.
+
+    Unlike ``executescript`` it does not commit first, so schema changes
+    can roll back together with the rest of a migration; the caller commits.
+    """
+    statement = ''
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            db.execute(statement)
+            statement = ''
+    if statement.strip():
+        db.execute(statement)
+
+
+class ConnectionManager:
+    """Pool of reader connections plus one dedicated writer for a database."""
+
+    def __init__(self, db_path: str, pool_size: int = 4, pragmas: Optional[Dict] = None):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.pragmas = dict(DEFAULT_PRAGMAS, **(pragmas or {}))
+
+        self._pid = os.getpid()
+        self._readers: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=pool_size)
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._wal_enabled = False
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection with the manager's pragmas applied."""
+        conn = sqlite3.connect(self.db_path, check_same_thread=False, factory=InstrumentedConnection)
+        conn.row_factory = sqlite3.Row
+
+        if not self._wal_enabled:
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._wal_enabled = True
+
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name}={value}')
+
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    # Imported here: migrations imports the modules that define the schema
+                    from migrations import apply_migrations
+                    apply_migrations(conn)
+                    self._schema_ready = True
+        return conn
+
+    def _check_fork(self) -> None:
+        """Drop connections inherited from a parent process."""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._readers = queue.LifoQueue(maxsize=self.pool_size)
+            self._writer = None
+            self._writer_lock = threading.Lock()
+
+    def acquire_reader(self) -> sqlite3.Connection:
+        """Take a reader from the pool, opening one if none is idle."""
+        self._check_fork()
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            return self._connect()
+
+    def release_reader(self, conn: sqlite3.Connection) -> None:
+        """Return a reader to the pool, closing it if the pool is full."""
+        if conn.in_transaction:
+            conn.rollback()
+        try:
+            self._readers.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def acquire_writer(self) -> sqlite3.Connection:
+        """Take the writer connection; blocks while another thread holds it."""
+        self._check_fork()
+        self._writer_lock.acquire()
+        if self._writer is None:
+            self._writer = self._connect()
+        return self._writer
+
+    def release_writer(self) -> None:
+        """Release the writer, rolling back anything left uncommitted."""
+        if self._writer is not None and self._writer.in_transaction:
+            self._writer.rollback()
+        self._writer_lock.release()
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Context manager yielding a pooled reader connection."""
+        conn = self.acquire_reader()
+        try:
+            yield conn
+        finally:
+            self.release_reader(conn)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Context manager yielding the writer connection."""
+        conn = self.acquire_writer()
+        try:
+            yield conn
+        finally:
+            self.release_writer()
+
+    def close_all(self) -> None:
+        """Close every idle connection held by the manager."""
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+# Managers keyed by database path
+_managers: Dict[str, ConnectionManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_connection_manager(db_path: str = 'reeltracker.db') -> ConnectionManager:
+    """Get or create the connection manager for a database file."""
+    manager = _managers.get(db_path)
+    if manager is None:
+        with _managers_lock:
+            manager = _managers.get(db_path)
+            if manager is None:
+                pool_size = int(os.environ.get('DB_POOL_SIZE', 4))
+                manager = _managers[db_path] = ConnectionManager(db_path, pool_size=pool_size)
+    return manager
@@ -0,0 +1,116 @@
+"""Normalized genre storage for ReelTracker.
+
+``movies.genre`` keeps the comma-joined display string; the ``genres`` and
+``movie_genres`` tables hold one row per movie/genre pair so genre
+analytics run as indexed ``GROUP BY`` queries instead of splitting strings
+in Python on every request.
+"""
+
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional
+
+from database import execute_script
+from stats_service import rebuild_stats_aggregates
+
+
+GENRE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS genres (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL UNIQUE
+    );
+
+    CREATE TABLE IF NOT EXISTS movie_genres (
+        movie_id INTEGER NOT NULL,
+        genre_id INTEGER NOT NULL,
+        position INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (movie_id, genre_id),
+        FOREIGN KEY (movie_id) REFERENCES movies(id),
+        FOREIGN KEY (genre_id) REFERENCES genres(id)
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_movie_genres_genre ON movie_genres(genre_id, movie_id);
+'''
+
+
+def split_genres(genre_text: Optional[str]) -> List[str]:
+    """Split a comma-joined genre string into unique, trimmed names."""
+    names = []
+    for name in (genre_text or '').split(','):
+        name = name.strip()
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def sync_movie_genres(db: sqlite3.Connection, movie_id: int, names: Iterable[str]) -> None:
+    """Replace a movie's genre rows; the caller commits."""
+    db.execute('DELETE FROM movie_genres WHERE movie_id = ?', (movie_id,))
+    for position, name in enumerate(names):
+        db.execute('INSERT OR IGNORE INTO genres (name) VALUES (?)', (name,))
+        db.execute('''
+            INSERT OR IGNORE INTO movie_genres (movie_id, genre_id, position)
+            SELECT ?, id, ? FROM genres WHERE name = ?
+        ''', (movie_id, position, name))
+
+
+def backfill_movie_genres(db: sqlite3.Connection) -> int:
+    """Populate ``movie_genres`` from ``movies.genre``; returns movies processed."""
+    movies = db.execute('''
+        SELECT id, genre FROM movies
+        WHERE genre IS NOT NULL AND genre != ''
+    ''').fetchall()
+
+    names = {name for _, genre in movies for name in split_genres(genre)}
+    db.executemany('INSERT OR IGNORE INTO genres (name) VALUES (?)', [(name,) for name in names])
+    genre_ids = dict(db.execute('SELECT name, id FROM genres').fetchall())
+
+    db.execute('DELETE FROM movie_genres')
+    db.executemany(
+        'INSERT OR IGNORE INTO movie_genres (movie_id, genre_id, position) VALUES (?, ?, ?)',
+        [(movie_id, genre_ids[name], position)
+         for movie_id, genre in movies
+         for position, name in enumerate(split_genres(genre))]
+    )
+    return len(movies)
+
+
+def get_rated_genre_counts(db: sqlite3.Connection, limit: int = 10) -> Dict[str, Any]:
+    """Count rated movies per genre; returns the top ``limit`` and the overall total."""
+    rows = db.execute("""
+        SELECT g.name AS genre, COUNT(*) AS count, SUM(COUNT(*)) OVER () AS total
+        FROM user_ratings ur
+        JOIN movie_genres mg ON mg.movie_id = ur.movie_id
+        JOIN genres g ON g.id = mg.genre_id
+        GROUP BY g.id
+        ORDER BY count DESC, g.name
+        LIMIT ?
+    """, (limit,)).fetchall()
+    return {
+        'genres': [(row[0], row[1]) for row in rows],
+        'total': rows[0][2] if rows else 0
+    }
+
+
+def ensure_genre_tables(db: sqlite3.Connection) -> None:
+    """Create the genre tables and backfill them once from existing movies; the caller commits."""
+    execute_script(db, GENRE_SCHEMA)
+
+    has_movies = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies'"
+    ).fetchone()
+    if not has_movies:
+        return
+
+    populated = db.execute('SELECT 1 FROM movie_genres LIMIT 1').fetchone()
+    needs_backfill = db.execute(
+        "SELECT 1 FROM movies WHERE genre IS NOT NULL AND genre != '' LIMIT 1"
+    ).fetchone()
+    if not populated and needs_backfill:
+        backfill_movie_genres(db)
+
+        # Distinct genre counts were previously taken over genre strings
+        has_stats = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_aggregates'"
+        ).fetchone()
+        if has_stats:
+            rebuild_stats_aggregates(db)
@@ -0,0 +1,162 @@
+"""Versioned schema migrations for ReelTracker.
+
+Each migration has a number, a description and a function that changes the
+schema inside the transaction it is given. ``apply_migrations`` runs the
+pending ones in order, one transaction each, and records every version it
+applies in ``schema_version``, so a failed migration leaves the database at
+the previous version. The connection manager applies them on the first
+connection it opens.
+
+Migrations are never edited once released; a schema change gets a new
+number at the end of ``MIGRATIONS``. The early ones call the idempotent
+``ensure_*`` functions, which also bring databases created before
+``schema_version`` existed up to date without redoing their work.
+"""
+
+import sqlite3
+from typing import Callable, List, Tuple
+
+from database import execute_script
+from genre_service import ensure_genre_tables
+from search_index import ensure_search_index
+from stats_service import ensure_stats_aggregates, ensure_stats_triggers
+from streak_service import ensure_streak_state
+from viewing_rollup import (
+    drop_unused_viewing_time_columns, ensure_viewing_rollup, ensure_viewing_time_columns
+)
+
+
+SCHEMA_VERSION_TABLE = '''
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+BASE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS movies (
+        id INTEGER PRIMARY KEY,
+        title TEXT NOT NULL,
+        year INTEGER,
+        director TEXT,
+        genre TEXT,
+        plot TEXT,
+        poster_url TEXT,
+        imdb_id TEXT UNIQUE,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS watchlist (
+        id INTEGER PRIMARY KEY,
+        movie_id INTEGER NOT NULL,
+        added_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        priority INTEGER DEFAULT 0,
+        notes TEXT,
+        FOREIGN KEY (movie_id) REFERENCES movies(id),
+        UNIQUE(movie_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS user_ratings (
+        id INTEGER PRIMARY KEY,
+        movie_id INTEGER NOT NULL,
+        rating REAL NOT NULL CHECK(rating >= 0 AND rating <= 10),
+        review TEXT,
+        rated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (movie_id) REFERENCES movies(id),
+        UNIQUE(movie_id)
+    );
+
+    CREATE TABLE IF NOT EXISTS viewing_history (
+        id INTEGER PRIMARY KEY,
+        movie_id INTEGER NOT NULL,
+        watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        notes TEXT,
+        FOREIGN KEY (movie_id) REFERENCES movies(id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_movies_title ON movies(title);
+    CREATE INDEX IF NOT EXISTS idx_movies_year ON movies(year);
+    CREATE INDEX IF NOT EXISTS idx_watchlist_priority ON watchlist(priority DESC);
+    CREATE INDEX IF NOT EXISTS idx_ratings_rating ON user_ratings(rating DESC);
+    DROP INDEX IF EXISTS idx_viewing_watched_at;
+    CREATE INDEX IF NOT EXISTS idx_viewing_watched_movie ON viewing_history(watched_at, movie_id);
+'''
+
+# Recent ratings on the home page, and the watchlist page order (which
+# also serves the priority breakdown, replacing the priority-only index)
+ROUTE_INDEXES = '''
+    CREATE INDEX IF NOT EXISTS idx_ratings_rated_at ON user_ratings(rated_at);
+    DROP INDEX IF EXISTS idx_watchlist_priority;
+    CREATE INDEX IF NOT EXISTS idx_watchlist_priority_added ON watchlist(priority, added_at);
+'''
+
+
+def create_base_tables(db: sqlite3.Connection) -> None:
+    """Create the movie, watchlist, rating and viewing history tables."""
+    execute_script(db, BASE_SCHEMA)
+
+
+def create_route_indexes(db: sqlite3.Connection) -> None:
+    """Index the columns the page routes sort by."""
+    execute_script(db, ROUTE_INDEXES)
+
+
+def add_movie_imdb_rating(db: sqlite3.Connection) -> None:
+    """Add the nullable ``movies.imdb_rating`` the rating vs popularity chart reads."""
+    columns = {row[1] for row in db.execute('PRAGMA table_xinfo(movies)')}
+    if 'imdb_rating' not in columns:
+        db.execute('ALTER TABLE movies ADD COLUMN imdb_rating REAL')
+
+
+# (version, description, migration) in the order they apply
+MIGRATIONS: List[Tuple[int, str, Callable[[sqlite3.Connection], None]]] = [
+    (1, 'Base tables', create_base_tables),
+    (2, 'Normalized genres', ensure_genre_tables),
+    (3, 'Full-text search index', ensure_search_index),
+    (4, 'Generated viewing time columns', ensure_viewing_time_columns),
+    (5, 'Daily viewing rollups', ensure_viewing_rollup),
+    (6, 'Viewing streak state', ensure_streak_state),
+    (7, 'Stats aggregates', ensure_stats_aggregates),
+    (8, 'Route query indexes', create_route_indexes),
+    (9, 'Movie IMDb rating', add_movie_imdb_rating),
+    (10, 'Trigger-maintained stats counters', ensure_stats_triggers),
+    (11, 'Drop unused viewing time columns', drop_unused_viewing_time_columns),
+]
+
+
+def get_schema_version(db: sqlite3.Connection) -> int:
+    """Highest migration applied to the database, 0 for none."""
+    return db.execute('SELECT COALESCE(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def apply_migrations(db: sqlite3.Connection) -> int:
+    """Apply pending migrations in order; returns how many were applied.
+
+    Commits anything already pending on ``db`` first. Each migration runs
+    in its own ``BEGIN IMMEDIATE`` transaction, so a second process
+    starting at the same time waits and then finds the work done.
+    """
+    if db.in_transaction:
+        db.commit()
+    db.execute(SCHEMA_VERSION_TABLE)
+    db.commit()
+
+    applied = 0
+    for version, description, migrate in MIGRATIONS:
+        if version <= get_schema_version(db):
+            continue
+
+        db.execute('BEGIN IMMEDIATE')
+        try:
+            if version > get_schema_version(db):
+                migrate(db)
+                db.execute('INSERT INTO schema_version (version, description) VALUES (?, ?)',
+                           (version, description))
+                applied += 1
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Error applying migration {version} ({description}): {e}")
+            raise
+    return applied
@@ -0,0 +1,164 @@
+"""Token-bucket rate limiting for outbound API calls in ReelTracker.
+
+``TokenBucket`` limits calls within one process. ``SQLiteTokenBucket``
+keeps the bucket in a shared SQLite file so every worker process draws
+from one budget. Both reserve a slot under a short lock and sleep outside
+it, and both refuse the call up front when the wait would exceed the
+caller's budget. A shared bucket that stays locked by another process past
+its busy timeout, or past the caller's budget if that is shorter, refuses
+the call the same way.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call cannot be admitted within its wait budget."""
+
+
+def _reserve(tokens: float, updated_at: float, now: float, rate: float,
+             capacity: float, max_wait: float) -> Tuple[Optional[float], float]:
+    """Take one token from a bucket.
+
+    Returns ``(wait, tokens_left)``; ``wait`` is None when the token would
+    not be available within ``max_wait`` seconds and nothing is taken.
+    Tokens may go negative, which reserves a future slot for the caller.
+    """
+    tokens = min(capacity, tokens + (now - updated_at) * rate) - 1
+    wait = max(0.0, -tokens / rate)
+    if wait > max_wait:
+        return None, tokens + 1
+    return wait, tokens
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilling at ``rate`` tokens per second."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+        self._metrics = {'acquired': 0, 'rejected': 0, 'waited': 0, 'total_wait_ms': 0.0, 'max_wait_ms': 0.0}
+
+    def _take(self, max_wait: float) -> Optional[float]:
+        """Reserve a token; returns the wait in seconds or None if refused."""
+        with self._lock:
+            now = time.monotonic()
+            wait, self._tokens = _reserve(self._tokens, self._updated_at, now,
+                                          self.rate, self.capacity, max_wait)
+            self._updated_at = now
+            return wait
+
+    def acquire(self, max_wait: float = float('inf')) -> float:
+        """Wait for a token and return the seconds spent waiting.
+
+        Raises ``RateLimitExceeded`` without waiting if the token would not
+        be available within ``max_wait`` seconds.
+        """
+        try:
+            wait = self._take(max(0.0, max_wait))
+        except RateLimitExceeded:
+            self._record(None)
+            raise
+        self._record(wait)
+        if wait is None:
+            raise RateLimitExceeded(f"rate limit wait exceeds {max_wait:.2f}s budget")
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _record(self, wait: Optional[float]) -> None:
+        """Update wait-time metrics for one acquire call."""
+        with self._lock:
+            if wait is None:
+                self._metrics['rejected'] += 1
+                return
+            self._metrics['acquired'] += 1
+            if wait > 0:
+                wait_ms = wait * 1000
+                self._metrics['waited'] += 1
+                self._metrics['total_wait_ms'] += wait_ms
+                self._metrics['max_wait_ms'] = max(self._metrics['max_wait_ms'], wait_ms)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get acquire counts and wait times."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        metrics['avg_wait_ms'] = round(metrics['total_wait_ms'] / metrics['waited'], 1) if metrics['waited'] else 0
+        metrics['total_wait_ms'] = round(metrics['total_wait_ms'], 1)
+        metrics['max_wait_ms'] = round(metrics['max_wait_ms'], 1)
+        return metrics
+
+
+class SQLiteTokenBucket(TokenBucket):
+    """Token bucket stored in a SQLite file and shared across processes."""
+
+    def __init__(self, db_path: str, name: str, rate: float, capacity: Optional[float] = None,
+                 busy_timeout: float = 5.0):
+        super().__init__(rate, capacity)
+        self.db_path = db_path
+        self.name = name
+        self.busy_timeout = busy_timeout
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None,
+                                     timeout=busy_timeout)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS rate_buckets (
+                name TEXT PRIMARY KEY,
+                tokens REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+
+    def _take(self, max_wait: float) -> Optional[float]:
+        """Reserve a token inside an immediate transaction on the shared row."""
+        with self._lock:
+            try:
+                # Wait for the file lock only as long as the caller would wait for a token
+                lock_wait = min(self.busy_timeout, max_wait)
+                self._conn.execute(f'PRAGMA busy_timeout = {int(lock_wait * 1000)}')
+                started = time.monotonic()
+                self._conn.execute('BEGIN IMMEDIATE')
+                max_wait -= time.monotonic() - started
+                # Wall-clock time, since monotonic clocks are not shared between processes
+                now = time.time()
+                row = self._conn.execute(
+                    'SELECT tokens, updated_at FROM rate_buckets WHERE name = ?', (self.name,)
+                ).fetchone()
+                tokens, updated_at = row if row else (self.capacity, now)
+                wait, tokens = _reserve(tokens, min(updated_at, now), now,
+                                        self.rate, self.capacity, max_wait)
+                self._conn.execute(
+                    'INSERT OR REPLACE INTO rate_buckets (name, tokens, updated_at) VALUES (?, ?, ?)',
+                    (self.name, tokens, now)
+                )
+                self._conn.execute('COMMIT')
+            except sqlite3.OperationalError as e:
+                # Another process held the bucket past the lock wait
+                self._rollback()
+                raise RateLimitExceeded(f"shared rate limiter busy - {e}") from e
+            except Exception:
+                self._rollback()
+                raise
+            return wait
+
+    def _rollback(self) -> None:
+        """End a failed reservation; caller holds ``self._lock``."""
+        if self._conn.in_transaction:
+            self._conn.execute('ROLLBACK')
+
+
+def create_rate_limiter(rate: float, capacity: Optional[float] = None,
+                        shared_path: Optional[str] = None, name: str = 'default') -> TokenBucket:
+    """Build a limiter, shared through ``shared_path`` when one is given."""
+    if shared_path:
+        try:
+            return SQLiteTokenBucket(shared_path, name, rate, capacity)
+        except sqlite3.Error as e:
+            print(f"Warning: shared rate limiter unavailable, using per-process limit - {e}")
+    return TokenBucket(rate, capacity)
@@ -0,0 +1,382 @@
+"""Per-request timing and SQL instrumentation for ReelTracker.
+
+``RequestMetrics`` aggregates, per route and method: wall time, SQLite
+statements run and the time spent executing and fetching them, TMDB calls
+and their latency, and cache hits and misses. The app starts and finishes
+each request; ``InstrumentedConnection`` (opened by
+``database.ConnectionManager``), the TMDB client and the caches report into
+the request in progress, found through a context variable so requests on
+different threads do not mix. Work outside a request (background TMDB
+refreshes, the cache warmer) only counts in the process-wide TMDB totals.
+
+``render()`` returns the counters in the Prometheus text format. They are
+per process; with several workers each one reports its own.
+
+Statements that take longer than ``SLOW_QUERY_MS`` milliseconds are logged
+once with their parameters and query plan: appended as JSON lines to
+``SLOW_QUERY_LOG`` when it is set, printed otherwise.
+"""
+
+import contextvars
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+# Upper bounds in seconds for the request duration histogram
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# TMDB endpoints are labelled without ids, e.g. movie/{id}
+_ENDPOINT_IDS = re.compile(r'/\d+')
+
+# (labels, value) samples of one metric
+Samples = Iterable[Tuple[Dict[str, Any], float]]
+
+
+class _RequestTimer:
+    """Counters for one request; worker threads may add to it concurrently."""
+
+    def __init__(self, route: str, method: str):
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.tmdb_calls = 0
+        self.tmdb_seconds = 0.0
+        self.cache_lookups: Counter = Counter()
+        self.lock = threading.Lock()
+
+
+class _RouteStats:
+    """Totals for every finished request on one route and method."""
+
+    def __init__(self):
+        self.statuses: Counter = Counter()
+        self.buckets = [0] * len(DURATION_BUCKETS)
+        self.duration_seconds = 0.0
+        self.sql_statements = 0
+        self.sql_seconds = 0.0
+        self.tmdb_calls = 0
+        self.tmdb_seconds = 0.0
+        self.cache_lookups: Counter = Counter()
+
+
+def _escape(value: Any) -> str:
+    """Escape a Prometheus label value."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_sample(name: str, labels: Dict[str, Any], value: float) -> str:
+    """One exposition line, e.g. ``name{route="/"} 3``."""
+    label_text = ','.join(f'{key}="{_escape(label)}"' for key, label in labels.items())
+    number = repr(float(value)) if isinstance(value, float) else str(value)
+    return f'{name}{{{label_text}}} {number}' if label_text else f'{name} {number}'
+
+
+class RequestMetrics:
+    """Thread-safe registry of per-route request, SQL, TMDB and cache counters."""
+
+    def __init__(self, slow_query_ms: Optional[float] = None, slow_query_log: Optional[str] = None):
+        # None disables the slow-query log
+        self.slow_query_ms = slow_query_ms
+        self.slow_query_log = slow_query_log
+
+        self._current: contextvars.ContextVar = contextvars.ContextVar('request_timer', default=None)
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], _RouteStats] = {}
+        # (endpoint, status) -> [calls, seconds]
+        self._tmdb: Dict[Tuple[str, str], List[float]] = {}
+        self.slow_queries = 0
+
+    # Request lifecycle
+
+    def start_request(self, route: str, method: str) -> None:
+        """Begin timing a request on the current thread."""
+        self._current.set(_RequestTimer(route, method))
+
+    def finish_request(self, status: int) -> Optional[float]:
+        """Stop timing the current request and add it to its route's totals.
+
+        Returns the wall time in seconds, or None if no request was started.
+        """
+        timer = self._current.get()
+        if timer is None:
+            return None
+        self._current.set(None)
+        elapsed = time.perf_counter() - timer.started
+
+        with self._lock:
+            stats = self._routes.get((timer.route, timer.method))
+            if stats is None:
+                stats = self._routes[(timer.route, timer.method)] = _RouteStats()
+            stats.statuses[status] += 1
+            for index, bound in enumerate(DURATION_BUCKETS):
+                if elapsed <= bound:
+                    stats.buckets[index] += 1
+            stats.duration_seconds += elapsed
+            with timer.lock:
+                stats.sql_statements += timer.sql_statements
+                stats.sql_seconds += timer.sql_seconds
+                stats.tmdb_calls += timer.tmdb_calls
+                stats.tmdb_seconds += timer.tmdb_seconds
+                stats.cache_lookups.update(timer.cache_lookups)
+        return elapsed
+
+    def propagate(self, func: Callable) -> Callable:
+        """Wrap ``func`` so calls made from worker threads count toward the current request."""
+        timer = self._current.get()
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            token = self._current.set(timer)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self._current.reset(token)
+
+        return wrapper
+
+    # Hooks
+
+    def record_sql(self, statements: int, seconds: float) -> None:
+        """Add statement executions or fetch time to the current request."""
+        timer = self._current.get()
+        if timer is not None:
+            with timer.lock:
+                timer.sql_statements += statements
+                timer.sql_seconds += seconds
+
+    def record_tmdb(self, endpoint: str, status: Optional[int], seconds: float) -> None:
+        """Count one TMDB API call, including its retries."""
+        key = (_ENDPOINT_IDS.sub('/{id}', endpoint), str(status) if status is not None else 'error')
+        with self._lock:
+            totals = self._tmdb.setdefault(key, [0, 0.0])
+            totals[0] += 1
+            totals[1] += seconds
+
+        timer = self._current.get()
+        if timer is not None:
+            with timer.lock:
+                timer.tmdb_calls += 1
+                timer.tmdb_seconds += seconds
+
+    def record_cache(self, cache: str, hit: bool) -> None:
+        """Count a cache lookup made by the current request."""
+        timer = self._current.get()
+        if timer is not None:
+            with timer.lock:
+                timer.cache_lookups[(cache, 'hit' if hit else 'miss')] += 1
+
+    # Slow-query log
+
+    @property
+    def slow_query_seconds(self) -> Optional[float]:
+        """Slow-query threshold in seconds, or None when the log is off."""
+        return self.slow_query_ms / 1000 if self.slow_query_ms else None
+
+    def log_slow_query(self, conn: sqlite3.Connection, sql: str, parameters: Any, seconds: float) -> None:
+        """Log a slow statement with its parameters and query plan."""
+        bindings = parameters if parameters is not None else [None] * sql.count('?')
+        try:
+            # A plain cursor, so the EXPLAIN itself is not timed
+            plan = [row[3] for row in sqlite3.Cursor(conn).execute(f'EXPLAIN QUERY PLAN {sql}', bindings)]
+        except (sqlite3.Error, ValueError) as e:
+            plan = [f'unavailable: {e}']
+
+        timer = self._current.get()
+        entry = {
+            'at': datetime.now().isoformat(timespec='seconds'),
+            'route': f'{timer.method} {timer.route}' if timer is not None else None,
+            'ms': round(seconds * 1000, 1),
+            'sql': ' '.join(sql.split()),
+            'parameters': parameters if parameters is None or isinstance(parameters, dict) else list(parameters),
+            'plan': plan
+        }
+        with self._lock:
+            self.slow_queries += 1
+            if self.slow_query_log:
+                try:
+                    with open(self.slow_query_log, 'a') as log:
+                        log.write(json.dumps(entry, default=str) + '\n')
+                    return
+                except OSError as e:
+                    print(f"Slow query log write error: {e}")
+        print(f"Slow query ({entry['ms']} ms) in {entry['route'] or 'background'}: {entry['sql']} "
+              f"| parameters: {entry['parameters']} | plan: {'; '.join(plan)}")
+
+    # Exposition
+
+    def render(self, extra: Iterable[Tuple[str, str, str, Samples]] = ()) -> str:
+        """Everything recorded so far in the Prometheus text format.
+
+        ``extra`` adds ``(name, type, help, samples)`` metrics, e.g. gauges
+        read from the caches at scrape time.
+        """
+        with self._lock:
+            routes = sorted(self._routes.items())
+            tmdb = sorted(self._tmdb.items())
+            slow_queries = self.slow_queries
+
+            def per_route(attribute: str) -> List[Tuple[Dict[str, Any], float]]:
+                return [({'route': route, 'method': method}, getattr(stats, attribute))
+                        for (route, method), stats in routes]
+
+            metrics = [
+                ('reeltracker_http_requests_total', 'counter', 'Requests handled, by route, method and status.',
+                 [({'route': route, 'method': method, 'status': status}, count)
+                  for (route, method), stats in routes for status, count in sorted(stats.statuses.items())]),
+                ('reeltracker_http_request_duration_seconds', 'histogram',
+                 'Wall time from routing to the returned response.', self._histogram_samples(routes)),
+                ('reeltracker_request_sql_statements_total', 'counter',
+                 'SQLite statements executed while handling requests.', per_route('sql_statements')),
+                ('reeltracker_request_sql_seconds_total', 'counter',
+                 'Time spent executing SQLite statements and fetching their rows.', per_route('sql_seconds')),
+                ('reeltracker_request_tmdb_calls_total', 'counter',
+                 'TMDB API calls made while handling requests.', per_route('tmdb_calls')),
+                ('reeltracker_request_tmdb_seconds_total', 'counter',
+                 'Time spent in TMDB API calls, including retries.', per_route('tmdb_seconds')),
+                ('reeltracker_request_cache_lookups_total', 'counter',
+                 'Cache lookups made while handling requests, by cache and result.',
+                 [({'route': route, 'method': method, 'cache': cache, 'result': result}, count)
+                  for (route, method), stats in routes
+                  for (cache, result), count in sorted(stats.cache_lookups.items())]),
+                ('reeltracker_tmdb_requests_total', 'counter',
+                 'TMDB API calls in this process, by endpoint and status.',
+                 [({'endpoint': endpoint, 'status': status}, totals[0]) for (endpoint, status), totals in tmdb]),
+                ('reeltracker_tmdb_request_seconds_total', 'counter',
+                 'Time spent in TMDB API calls in this process, by endpoint and status.',
+                 [({'endpoint': endpoint, 'status': status}, totals[1]) for (endpoint, status), totals in tmdb]),
+                ('reeltracker_slow_queries_total', 'counter',
+                 'Statements that exceeded the slow-query threshold.', [({}, slow_queries)]),
+            ]
+
+        lines = []
+        for name, metric_type, help_text, samples in [*metrics, *extra]:
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {metric_type}')
+            lines.extend(_format_sample(sample_name, labels, value)
+                         for sample_name, labels, value in self._named(name, metric_type, samples))
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _histogram_samples(routes) -> List[Tuple[str, Dict[str, Any], float]]:
+        """Bucket, sum and count samples per route; caller holds ``self._lock``."""
+        samples = []
+        for (route, method), stats in routes:
+            labels = {'route': route, 'method': method}
+            count = sum(stats.statuses.values())
+            for bound, observed in zip(DURATION_BUCKETS, stats.buckets):
+                samples.append(('_bucket', dict(labels, le=str(bound)), observed))
+            samples.append(('_bucket', dict(labels, le='+Inf'), count))
+            samples.append(('_sum', labels, stats.duration_seconds))
+            samples.append(('_count', labels, count))
+        return samples
+
+    @staticmethod
+    def _named(name: str, metric_type: str, samples) -> Iterable[Tuple[str, Dict[str, Any], float]]:
+        """Attach the metric name; histogram samples carry their own suffix."""
+        if metric_type == 'histogram':
+            return [(name + suffix, labels, value) for suffix, labels, value in samples]
+        return [(name, labels, value) for labels, value in samples]
+
+    def reset(self) -> None:
+        """Drop every counter."""
+        with self._lock:
+            self._routes.clear()
+            self._tmdb.clear()
+            self.slow_queries = 0
+
+
+class InstrumentedCursor(sqlite3.Cursor):
+    """Cursor that times its statements and fetches for the request in progress.
+
+    Rows read by iterating the cursor are not timed beyond the first,
+    which ``execute`` steps to.
+    """
+
+    _sql = ''
+    _parameters = None
+    _elapsed = 0.0
+    _logged = True
+
+    def _begin(self, sql: str, parameters: Any) -> None:
+        self._sql = sql
+        self._parameters = parameters
+        self._elapsed = 0.0
+        self._logged = False
+
+    def _record(self, statements: int, seconds: float) -> None:
+        request_metrics.record_sql(statements, seconds)
+        self._elapsed += seconds
+        threshold = request_metrics.slow_query_seconds
+        if threshold is not None and not self._logged and self._elapsed >= threshold:
+            self._logged = True
+            request_metrics.log_slow_query(self.connection, self._sql, self._parameters, self._elapsed)
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._record(1, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        # The parameter sequence may be a generator; the log shows none
+        self._begin(sql, None)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            self._record(1, time.perf_counter() - start)
+
+    def fetchone(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchone()
+        finally:
+            self._record(0, time.perf_counter() - start)
+
+    def fetchmany(self, size=None):
+        start = time.perf_counter()
+        try:
+            return super().fetchmany(self.arraysize if size is None else size)
+        finally:
+            self._record(0, time.perf_counter() - start)
+
+    def fetchall(self):
+        start = time.perf_counter()
+        try:
+            return super().fetchall()
+        finally:
+            self._record(0, time.perf_counter() - start)
+
+
+class InstrumentedConnection(sqlite3.Connection):
+    """Connection whose cursors report to ``request_metrics``.
+
+    Pass as ``factory`` to ``sqlite3.connect``.
+    """
+
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# Process-wide registry; SLOW_QUERY_MS turns on the slow-query log
+request_metrics = RequestMetrics(
+    slow_query_ms=float(os.environ['SLOW_QUERY_MS']) if os.environ.get('SLOW_QUERY_MS') else None,
+    slow_query_log=os.environ.get('SLOW_QUERY_LOG') or None
+)
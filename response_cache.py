@@ -0,0 +1,177 @@
+"""Response cache for ReelTracker views.
+
+Bounded LRU cache with per-entry TTL, an approximate memory cap, per-key
+locking so only one request recomputes an expired entry, explicit
+invalidation for write routes, and hit/miss/eviction counters.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from request_metrics import request_metrics
+
+
+def _estimate_size(value: Any) -> int:
+    """Approximate the memory held by a cached value in bytes."""
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return sys.getsizeof(value)
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(_estimate_size(item) for item in value)
+    if hasattr(value, 'get_data'):
+        # Flask/Werkzeug response objects
+        return len(value.get_data())
+    return sys.getsizeof(value)
+
+
+class ResponseCache:
+    """Thread-safe LRU + TTL cache keyed by view name and arguments."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 1024 * 1024, name: str = 'response'):
+        self.name = name
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        # key -> (value, expires_at, size)
+        self._entries: "OrderedDict[str, Tuple[Any, float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._bytes = 0
+        # Bumped by invalidate() so a compute that overlapped a write
+        # does not store its stale result
+        self._generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def _remove(self, key: str) -> None:
+        """Drop an entry; caller holds ``self._lock``."""
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def _lookup(self, key: str) -> Tuple[bool, Any]:
+        """Return ``(found, value)`` for a live entry; caller holds ``self._lock``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at, _ = entry
+        if time.time() >= expires_at:
+            self._remove(key)
+            self.expirations += 1
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        """Look up a key, counting the hit or miss."""
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                self.hits += 1
+            else:
+                self.misses += 1
+        request_metrics.record_cache(self.name, found)
+        return found, value
+
+    def _store(self, key: str, value: Any, ttl: float, size: int) -> None:
+        """Insert an entry and evict to fit; caller holds ``self._lock``."""
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, time.time() + ttl, size)
+        self._bytes += size
+
+        while self._entries and (len(self._entries) > self.max_entries
+                                 or self._bytes > self.max_bytes):
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """Store a value, evicting least recently used entries to fit."""
+        size = _estimate_size(value)
+        if size > self.max_bytes:
+            return  # Never cache something larger than the whole budget
+
+        with self._lock:
+            self._store(key, value, ttl, size)
+
+    def get_or_compute(self, key: str, ttl: float, compute: Callable[[], Any]) -> Any:
+        """Return the cached value or compute it once under a per-key lock."""
+        found, value = self.get(key)
+        if found:
+            return value
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Another request may have filled the entry while we waited
+            with self._lock:
+                found, value = self._lookup(key)
+                generation = self._generation
+            if found:
+                return value
+
+            try:
+                value = compute()
+                size = _estimate_size(value)
+                with self._lock:
+                    # Skip the store if a write invalidated while computing
+                    if self._generation == generation and size <= self.max_bytes:
+                        self._store(key, value, ttl, size)
+                return value
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def invalidate(self, prefix: Optional[str] = None) -> int:
+        """Drop every entry, or those whose key starts with ``prefix``."""
+        with self._lock:
+            self._generation += 1
+            keys = [key for key in self._entries if prefix is None or key.startswith(prefix)]
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return counters and current occupancy."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'invalidations': self.invalidations
+            }
+
+
+def cache_key(func: Callable, args: tuple, kwargs: dict) -> str:
+    """Build a cache key from a function name and its arguments."""
+    return f"{func.__name__}:{args!r}:{sorted(kwargs.items())!r}"
+
+
+def cached(cache: ResponseCache, duration: float = 300):
+    """Decorator caching a function's result in ``cache`` for ``duration`` seconds."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = cache_key(func, args, kwargs)
+            return cache.get_or_compute(key, duration, lambda: func(*args, **kwargs))
+
+        return wrapper
+    return decorator
@@ -0,0 +1,128 @@
+"""Version-stamped memoization for ReelTracker analytics.
+
+Chart and time series results are kept until the database changes instead
+of for a fixed TTL. Each entry remembers the data version token it was
+computed under (see ``data_version.DataVersion``) plus today's date, since
+several results are windows relative to the current day. A lookup whose
+stamp no longer matches counts as stale and recomputes.
+
+Memoized results are shared between callers and must not be mutated.
+"""
+
+import inspect
+import os
+import threading
+from collections import OrderedDict
+from datetime import date
+from functools import wraps
+from typing import Any, Callable, Dict, Tuple
+
+from data_version import DataVersion, data_version
+from request_metrics import request_metrics
+
+
+class VersionedMemo:
+    """Thread-safe LRU of results keyed by function, database and arguments."""
+
+    def __init__(self, version: DataVersion, max_entries: int = 128):
+        self.version = version
+        self.max_entries = max_entries
+
+        # key -> (stamp, value)
+        self._entries: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # function name -> hits/misses/stale counters
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self.evictions = 0
+
+    def stamp(self, db_path: str) -> str:
+        """Current change stamp for a database."""
+        return f"{self.version.token(db_path)}:{date.today().isoformat()}"
+
+    def _lookup(self, name: str, key: str, stamp: str) -> Tuple[bool, Any]:
+        """Return ``(found, value)`` for an entry computed under ``stamp``."""
+        with self._lock:
+            stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'stale': 0})
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == stamp:
+                self._entries.move_to_end(key)
+                stats['hits'] += 1
+                return True, entry[1]
+
+            stats['misses'] += 1
+            if entry is not None:
+                stats['stale'] += 1
+                del self._entries[key]
+            return False, None
+
+    def _store(self, key: str, stamp: str, value: Any) -> None:
+        """Store a result, evicting least recently used entries to fit."""
+        with self._lock:
+            self._entries[key] = (stamp, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def memoize(self, func: Callable) -> Callable:
+        """Decorator reusing a function's result until its database changes.
+
+        The database is the ``db_path`` argument, or ``self.db_path`` for
+        methods; the remaining arguments are part of the key.
+        """
+        signature = inspect.signature(func)
+        name = func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            owner = arguments.pop('self', None)
+            db_path = arguments.pop('db_path', None) or owner.db_path
+
+            key = f"{name}:{db_path}:{sorted(arguments.items())!r}"
+            # Stamp before computing, so a write during the call is not masked
+            stamp = self.stamp(db_path)
+            found, value = self._lookup(name, key, stamp)
+            request_metrics.record_cache('analytics', found)
+            if found:
+                return value
+
+            value = func(*args, **kwargs)
+            self._store(key, stamp, value)
+            return value
+
+        return wrapper
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            self._entries.clear()
+
+    def metrics(self) -> Dict[str, Any]:
+        """Return hit/miss/stale counters overall and per function."""
+        with self._lock:
+            functions = {}
+            for name, stats in self._stats.items():
+                lookups = stats['hits'] + stats['misses']
+                functions[name] = dict(stats, hit_ratio=round(stats['hits'] / lookups, 3) if lookups else 0.0)
+
+            hits = sum(stats['hits'] for stats in self._stats.values())
+            misses = sum(stats['misses'] for stats in self._stats.values())
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': hits,
+                'misses': misses,
+                'stale': sum(stats['stale'] for stats in self._stats.values()),
+                'hit_ratio': round(hits / (hits + misses), 3) if hits + misses else 0.0,
+                'evictions': self.evictions,
+                'functions': functions
+            }
+
+
+# Shared by data_visualizations and TimeSeriesService
+analytics_memo = VersionedMemo(data_version, int(os.environ.get('ANALYTICS_MEMO_MAX_ENTRIES', 128)))
+memoize = analytics_memo.memoize
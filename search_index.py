@@ -0,0 +1,125 @@
+"""Full-text search over the local movie catalog for ReelTracker.
+
+An FTS5 table indexes title, director, genre and plot. It uses
+``movies`` as its external content and triggers keep it in sync. Local
+search ranks matches with bm25, treats every term as a prefix, and
+returns a highlighted snippet. If this SQLite build lacks FTS5, search
+falls back to the old title ``LIKE`` scan.
+"""
+
+import re
+import sqlite3
+from typing import Any, Dict, List
+
+from markupsafe import Markup, escape
+
+from database import execute_script
+
+
+FTS_SCHEMA = '''
+    CREATE VIRTUAL TABLE IF NOT EXISTS movies_fts USING fts5(
+        title, director, genre, plot,
+        content='movies', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    );
+
+    CREATE TRIGGER IF NOT EXISTS movies_fts_insert AFTER INSERT ON movies BEGIN
+        INSERT INTO movies_fts (rowid, title, director, genre, plot)
+        VALUES (new.id, new.title, new.director, new.genre, new.plot);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS movies_fts_delete AFTER DELETE ON movies BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, director, genre, plot)
+        VALUES ('delete', old.id, old.title, old.director, old.genre, old.plot);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS movies_fts_update AFTER UPDATE OF title, director, genre, plot ON movies BEGIN
+        INSERT INTO movies_fts (movies_fts, rowid, title, director, genre, plot)
+        VALUES ('delete', old.id, old.title, old.director, old.genre, old.plot);
+        INSERT INTO movies_fts (rowid, title, director, genre, plot)
+        VALUES (new.id, new.title, new.director, new.genre, new.plot);
+    END;
+'''
+
+# Column weights for bm25: title, director, genre, plot
+RANK_FUNCTION = 'bm25(10.0, 5.0, 2.0, 1.0)'
+
+# Control characters mark highlights so the snippet can be escaped safely
+_HIGHLIGHT_START = '\x02'
+_HIGHLIGHT_END = '\x03'
+
+_TOKEN_PATTERN = re.compile(r'\w+', re.UNICODE)
+
+fts_available = True
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query of quoted prefix terms."""
+    tokens = _TOKEN_PATTERN.findall(query or '')
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def _highlight(snippet: str) -> Markup:
+    """Escape a raw snippet and wrap matched terms in ``<mark>``."""
+    escaped = str(escape(snippet or ''))
+    return Markup(escaped.replace(_HIGHLIGHT_START, '<mark>').replace(_HIGHLIGHT_END, '</mark>'))
+
+
+def rebuild_search_index(db: sqlite3.Connection) -> None:
+    """Rebuild the FTS index from the movies table; the caller commits."""
+    db.execute("INSERT INTO movies_fts (movies_fts) VALUES ('rebuild')")
+
+
+def ensure_search_index(db: sqlite3.Connection) -> None:
+    """Create the FTS table and triggers, indexing existing movies once; the caller commits."""
+    global fts_available
+
+    has_movies = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies'"
+    ).fetchone()
+    if not has_movies:
+        return
+
+    exists = db.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movies_fts'"
+    ).fetchone()
+    try:
+        execute_script(db, FTS_SCHEMA)
+    except sqlite3.OperationalError as e:
+        print(f"Warning: full-text search disabled - {e}")
+        fts_available = False
+        return
+
+    if not exists:
+        db.execute("INSERT INTO movies_fts (movies_fts, rank) VALUES ('rank', ?)", (RANK_FUNCTION,))
+        rebuild_search_index(db)
+
+
+def search_local_movies(db: sqlite3.Connection, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+    """Search the local catalog, best matches first."""
+    match = build_match_query(query)
+    if not match:
+        return []
+
+    if fts_available:
+        try:
+            rows = db.execute('''
+                SELECT m.*, snippet(movies_fts, -1, ?, ?, '…', 16) AS snippet
+                FROM movies_fts
+                JOIN movies m ON m.id = movies_fts.rowid
+                WHERE movies_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            ''', (_HIGHLIGHT_START, _HIGHLIGHT_END, match, limit)).fetchall()
+            return [dict(row, snippet=_highlight(row['snippet'])) for row in rows]
+        except sqlite3.OperationalError as e:
+            print(f"Full-text search error: {e}")
+
+    rows = db.execute('''
+        SELECT * FROM movies
+        WHERE title LIKE ?
+        ORDER BY year DESC
+        LIMIT ?
+    ''', (f'%{query}%', limit)).fetchall()
+    return [dict(row, snippet=None) for row in rows]
@@ -3,6 +3,8 @@
 
 class ReelTrackerUpdates {
     constructor() {
+        this.latestStats = null;
+        this.eventSource = null;
         this.setupEventListeners();
         this.initializeRealTimeTracking();
     }
@@ -43,11 +45,16 @@ class ReelTrackerUpdates {
     }
 
     scheduleStatsUpdate() {
+        // The stats stream pushes changes as soon as the write commits
+        const streaming = this.eventSource && this.eventSource.readyState !== EventSource.CLOSED;
+        
         // Update stats after a short delay to allow form submission to complete
         setTimeout(() => {
-            this.updateStats();
+            if (!streaming) {
+                this.updateStats();
+                this.updateAchievements();
+            }
             this.updateTimeline();
-            this.updateAchievements();
         }, 500);
     }
 
@@ -55,49 +62,7 @@ class ReelTrackerUpdates {
         // Fetch fresh stats from API and update UI
         fetch('/api/stats')
             .then(response => response.json())
-            .then(stats => {
-                // Update data attributes
-                const userLevel = document.querySelector('.user-level');
-                if (userLevel) {
-                    userLevel.dataset.totalMovies = stats.totalMovies;
-                    userLevel.dataset.uniqueGenres = stats.uniqueGenres;
-                    userLevel.dataset.currentStreak = stats.currentStreak;
-                    userLevel.dataset.totalRatings = stats.totalRatings;
-                    userLevel.dataset.weeklyMovies = stats.weeklyMovies;
-                    userLevel.dataset.uniqueDecades = stats.uniqueDecades;
-                    userLevel.dataset.watchlistCompletion = stats.watchlistCompletion;
-                }
-                
-                // Update displayed stat values
-                const statCards = document.querySelectorAll('.stat-value');
-                statCards.forEach((card, index) => {
-                    card.classList.add('updating');
-                    setTimeout(() => {
-                        card.classList.remove('updating');
-                        card.classList.add('updated');
-                        setTimeout(() => card.classList.remove('updated'), 2000);
-                    }, 500);
-                });
-                
-                // Update rating distribution chart if present
-                if (stats.ratingDistribution && window.ReelTrackerCharts) {
-                    const canvas = document.getElementById('ratingsChart');
-                    if (canvas) {
-                        // Destroy existing chart and create new one
-                        const existingChart = Chart.getChart(canvas);
-                        if (existingChart) {
-                            existingChart.destroy();
-                        }
-                        window.ReelTrackerCharts.createRatingChart('ratingsChart', stats.ratingDistribution);
-                    }
-                }
-                
-                // Update gamification elements
-                if (window.ReelTrackerGamification) {
-                    window.ReelTrackerGamification.updateUserLevel(stats.totalMovies);
-                    window.ReelTrackerGamification.updateProgressBars();
-                }
-            })
+            .then(stats => this.applyStats(stats))
             .catch(error => {
                 console.warn('Failed to fetch updated stats:', error);
                 // Fallback to visual feedback only
@@ -109,6 +74,53 @@ class ReelTrackerUpdates {
             });
     }
 
+    applyStats(stats) {
+        this.latestStats = stats;
+        
+        // Update data attributes
+        const userLevel = document.querySelector('.user-level');
+        if (userLevel) {
+            userLevel.dataset.totalMovies = stats.totalMovies;
+            userLevel.dataset.uniqueGenres = stats.uniqueGenres;
+            userLevel.dataset.currentStreak = stats.currentStreak;
+            userLevel.dataset.totalRatings = stats.totalRatings;
+            userLevel.dataset.weeklyMovies = stats.weeklyMovies;
+            userLevel.dataset.uniqueDecades = stats.uniqueDecades;
+            userLevel.dataset.watchlistCompletion = stats.watchlistCompletion;
+        }
+        
+        // Update displayed stat values
+        const statCards = document.querySelectorAll('.stat-value');
+        statCards.forEach((card, index) => {
+            card.classList.add('updating');
+            setTimeout(() => {
+                card.classList.remove('updating');
+                card.classList.add('updated');
+                setTimeout(() => card.classList.remove('updated'), 2000);
+            }, 500);
+        });
+        
+        // Update rating distribution chart if present
+        if (stats.ratingDistribution && window.ReelTrackerCharts) {
+            const canvas = document.getElementById('ratingsChart');
+            if (canvas) {
+                // Destroy existing chart and create new one
+                const existingChart = Chart.getChart(canvas);
+                if (existingChart) {
+                    existingChart.destroy();
+                }
+                window.ReelTrackerCharts.createRatingChart('ratingsChart', stats.ratingDistribution);
+            }
+        }
+        
+        // Update gamification elements
+        if (window.ReelTrackerGamification) {
+            window.ReelTrackerGamification.checkAchievements(stats);
+            window.ReelTrackerGamification.updateUserLevel(stats.totalMovies);
+            window.ReelTrackerGamification.updateProgressBars();
+        }
+    }
+
     refreshStat(element, statType) {
         // This would typically make an AJAX call to get updated stats
         // For now, we'll add visual feedback to show the stat is updating
@@ -213,6 +225,12 @@ class ReelTrackerUpdates {
     }
 
     startPeriodicUpdates() {
+        // Prefer server push; fall back to polling where EventSource is missing
+        if (window.EventSource) {
+            this.subscribeToStats();
+            return;
+        }
+        
         // Check for updates every 30 seconds when page is visible
         setInterval(() => {
             if (!document.hidden) {
@@ -221,6 +239,25 @@ class ReelTrackerUpdates {
         }, 30000);
     }
 
+    subscribeToStats() {
+        // The first event carries the full snapshot, later events only changed fields
+        this.eventSource = new EventSource('/api/stats/stream');
+        
+        this.eventSource.addEventListener('stats', (event) => {
+            const delta = JSON.parse(event.data);
+            const isInitial = this.latestStats === null;
+            const stats = Object.assign({}, this.latestStats || {}, delta);
+            
+            if (isInitial) {
+                this.latestStats = stats;
+                return;
+            }
+            
+            this.applyStats(stats);
+            this.checkForUpdates();
+        });
+    }
+
     checkForUpdates() {
         // This would make an API call to check if stats have changed
         // For now, just update the visual indicators
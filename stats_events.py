@@ -0,0 +1,90 @@
+"""Server-Sent Events push channel for ReelTracker statistics.
+
+Write routes publish a fresh stats payload after they commit; every open
+``/api/stats/stream`` connection is woken once and sends only the fields
+that changed. Idle connections sleep on a condition variable and wake
+only for a periodic keep-alive.
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+
+class StatsBroadcaster:
+    """Fan out stats payloads to any number of waiting subscribers."""
+
+    def __init__(self, heartbeat: float = 15.0):
+        self.heartbeat = heartbeat
+        self.subscribers = 0
+
+        self._condition = threading.Condition()
+        self._refresh_lock = threading.Lock()
+        self._sequence = 0
+        self._payload: Optional[Dict[str, Any]] = None
+        self._token: Optional[str] = None
+
+    def publish(self, payload: Dict[str, Any], token: Optional[str] = None) -> int:
+        """Store a new payload and wake every subscriber."""
+        with self._condition:
+            self._sequence += 1
+            self._payload = payload
+            self._token = token
+            self._condition.notify_all()
+            return self._sequence
+
+    def wait_for_update(self, last_sequence: int, timeout: float) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """Block until a payload newer than ``last_sequence`` or the timeout."""
+        with self._condition:
+            self._condition.wait_for(lambda: self._sequence != last_sequence, timeout)
+            return self._sequence, self._payload
+
+    def refresh_if_stale(self, token: str, load_payload: Callable[[], Dict[str, Any]]) -> None:
+        """Publish a reloaded payload if the data changed behind our back.
+
+        Writes handled by other worker processes never reach this process's
+        ``publish``; they still change the data version token, so the first
+        subscriber to notice reloads once on behalf of everyone.
+        """
+        if token == self._token:
+            return
+        with self._refresh_lock:
+            if token != self._token:
+                self.publish(load_payload(), token)
+
+    @staticmethod
+    def format_event(data: Dict[str, Any], event: str = 'stats') -> str:
+        """Encode one SSE frame."""
+        return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+    def stream(self, initial: Dict[str, Any], current_token: Callable[[], str],
+               load_payload: Callable[[], Dict[str, Any]]) -> Iterator[str]:
+        """Yield SSE frames: the full snapshot first, then deltas."""
+        with self._condition:
+            self.subscribers += 1
+            last_sequence = self._sequence
+
+        last_sent = dict(initial)
+        try:
+            yield 'retry: 5000\n\n'
+            yield self.format_event(last_sent)
+
+            while True:
+                sequence, payload = self.wait_for_update(last_sequence, self.heartbeat)
+
+                if sequence == last_sequence:
+                    self.refresh_if_stale(current_token(), load_payload)
+                    sequence, payload = self._sequence, self._payload
+                    if sequence == last_sequence:
+                        yield ': keep-alive\n\n'
+                        continue
+
+                last_sequence = sequence
+                delta = {key: value for key, value in (payload or {}).items()
+                         if last_sent.get(key) != value}
+                if delta:
+                    last_sent.update(delta)
+                    yield self.format_event(delta)
+        finally:
+            with self._condition:
+                self.subscribers -= 1
@@ -0,0 +1,507 @@
+"""Incrementally maintained statistics for ReelTracker.
+
+Keeps a single-row ``stats_aggregates`` table in step with the write routes,
+so the statistics dashboard and ``/api/stats`` read one row instead of
+re-scanning every table on each request. ``get_stats_snapshot`` assembles
+everything the dashboard shows in at most two statements.
+
+Rating, watchlist size and watch counters are applied by the ``record_*``
+functions the write routes call. Counters that depend on other tables'
+rows (movies, the genres and decades of rated movies, watchlist
+completion, per-movie view counts) are kept by triggers, which touch
+only the rows of the movie being written: per-genre and per-decade counts
+of rated movies, the view totals of watchlisted movies, and the views of
+each movie, indexed by count for the most-watched leaderboard.
+"""
+
+import sqlite3
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from database import execute_script
+
+
+# Dashboard rating histogram: 0-1, 2-3, 4-5, 6-7, 8-10
+RATING_BUCKET_LABELS = ['0-1', '2-3', '4-5', '6-7', '8-10']
+
+STATS_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS stats_aggregates (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total_movies INTEGER NOT NULL DEFAULT 0,
+        total_ratings INTEGER NOT NULL DEFAULT 0,
+        rating_sum REAL NOT NULL DEFAULT 0,
+        watchlist_size INTEGER NOT NULL DEFAULT 0,
+        total_watches INTEGER NOT NULL DEFAULT 0,
+        unique_genres INTEGER NOT NULL DEFAULT 0,
+        unique_decades INTEGER NOT NULL DEFAULT 0,
+        watchlist_completion REAL NOT NULL DEFAULT 0,
+        rating_bucket_0 INTEGER NOT NULL DEFAULT 0,
+        rating_bucket_1 INTEGER NOT NULL DEFAULT 0,
+        rating_bucket_2 INTEGER NOT NULL DEFAULT 0,
+        rating_bucket_3 INTEGER NOT NULL DEFAULT 0,
+        rating_bucket_4 INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        watchlist_views INTEGER NOT NULL DEFAULT 0,
+        watchlist_view_rows INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS stats_rated_genres (
+        genre_id INTEGER PRIMARY KEY,
+        movies INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS stats_rated_decades (
+        decade INTEGER PRIMARY KEY,
+        movies INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS stats_movie_views (
+        movie_id INTEGER PRIMARY KEY,
+        views INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_stats_movie_views ON stats_movie_views(views);
+'''
+
+# Columns added after stats_aggregates was first released
+STATS_ADDED_COLUMNS = {
+    'watchlist_views': 'INTEGER NOT NULL DEFAULT 0',
+    'watchlist_view_rows': 'INTEGER NOT NULL DEFAULT 0',
+}
+
+# SQL twin of rating_bucket(); keep the two in step
+_RATING_BUCKET_SQL = '''
+    CASE
+        WHEN rating <= 1 THEN 0
+        WHEN rating <= 3 THEN 1
+        WHEN rating <= 5 THEN 2
+        WHEN rating <= 7 THEN 3
+        ELSE 4
+    END
+'''
+
+# Statement bodies shared by the triggers. {movie} is the movie id, {year}
+# its year and {row} NEW or OLD.
+_ADD_MOVIE_GENRES = '''
+    INSERT INTO stats_rated_genres (genre_id, movies)
+    SELECT genre_id, 1 FROM movie_genres WHERE movie_id = {movie}
+    ON CONFLICT (genre_id) DO UPDATE SET movies = movies + 1;
+'''
+
+_REMOVE_MOVIE_GENRES = '''
+    UPDATE stats_rated_genres SET movies = movies - 1
+    WHERE genre_id IN (SELECT genre_id FROM movie_genres WHERE movie_id = {movie});
+'''
+
+_ADD_DECADE = '''
+    INSERT INTO stats_rated_decades (decade, movies)
+    SELECT ({year} / 10) * 10, 1 WHERE {year} IS NOT NULL
+    ON CONFLICT (decade) DO UPDATE SET movies = movies + 1;
+'''
+
+_REMOVE_DECADE = '''
+    UPDATE stats_rated_decades SET movies = movies - 1
+    WHERE decade = ({year} / 10) * 10;
+'''
+
+_UPDATE_WATCHLIST_COMPLETION = '''
+    UPDATE stats_aggregates
+    SET watchlist_completion = CASE
+            WHEN watchlist_view_rows = 0 THEN 0
+            ELSE ROUND(watchlist_views * 100.0 / watchlist_view_rows)
+        END
+    WHERE id = 1;
+'''
+
+# Completion is defined over watchlist LEFT JOIN viewing_history: a
+# watchlisted movie with n views adds n viewed rows out of max(n, 1)
+_APPLY_WATCHLIST_ENTRY = '''
+    UPDATE stats_aggregates
+    SET watchlist_views = watchlist_views {sign} v.views,
+        watchlist_view_rows = watchlist_view_rows {sign} MAX(v.views, 1)
+    FROM (SELECT COUNT(*) AS views FROM viewing_history WHERE movie_id = {row}.movie_id) AS v
+    WHERE stats_aggregates.id = 1;
+''' + _UPDATE_WATCHLIST_COMPLETION
+
+# A view of a watchlisted movie adds a joined row only if it has other views
+_APPLY_WATCHLISTED_VIEW = '''
+    UPDATE stats_aggregates
+    SET watchlist_views = watchlist_views {sign} 1,
+        watchlist_view_rows = watchlist_view_rows {sign} EXISTS (
+            SELECT 1 FROM viewing_history WHERE movie_id = {row}.movie_id AND id != {row}.id
+        )
+    WHERE id = 1;
+''' + _UPDATE_WATCHLIST_COMPLETION
+
+_IS_RATED = 'EXISTS (SELECT 1 FROM user_ratings WHERE movie_id = {movie})'
+_IS_SAVED = 'EXISTS (SELECT 1 FROM movies WHERE id = {movie})'
+_IS_WATCHLISTED = 'EXISTS (SELECT 1 FROM watchlist WHERE movie_id = {movie})'
+_MOVIE_YEAR = '(SELECT year FROM movies WHERE id = {movie})'
+
+
+def _add_rated_movie(movie: str, year: str) -> str:
+    return _ADD_MOVIE_GENRES.format(movie=movie) + _ADD_DECADE.format(year=year)
+
+
+def _remove_rated_movie(movie: str, year: str) -> str:
+    return _REMOVE_MOVIE_GENRES.format(movie=movie) + _REMOVE_DECADE.format(year=year)
+
+
+def _count_nonzero(column: str, update: bool) -> str:
+    """Keep ``column`` equal to the number of facet rows above zero."""
+    change = '(NEW.movies > 0) - (OLD.movies > 0)' if update else '(NEW.movies > 0)'
+    return f'UPDATE stats_aggregates SET {column} = {column} + {change} WHERE id = 1;'
+
+
+# name -> (event, body). INSERT OR REPLACE reaches the delete triggers
+# through recursive_triggers, which the connection manager turns on.
+STATS_TRIGGERS = {
+    'stats_movie_insert': ('AFTER INSERT ON movies',
+                           'UPDATE stats_aggregates SET total_movies = total_movies + 1 WHERE id = 1;'),
+    'stats_movie_delete': ('AFTER DELETE ON movies',
+                           'UPDATE stats_aggregates SET total_movies = total_movies - 1 WHERE id = 1;'),
+    'stats_rated_movie_insert': (f"AFTER INSERT ON movies WHEN {_IS_RATED.format(movie='NEW.id')}",
+                                 _add_rated_movie('NEW.id', 'NEW.year')),
+    'stats_rated_movie_delete': (f"AFTER DELETE ON movies WHEN {_IS_RATED.format(movie='OLD.id')}",
+                                 _remove_rated_movie('OLD.id', 'OLD.year')),
+    'stats_rated_movie_year': (f"AFTER UPDATE OF year ON movies WHEN {_IS_RATED.format(movie='NEW.id')}",
+                               _REMOVE_DECADE.format(year='OLD.year') + _ADD_DECADE.format(year='NEW.year')),
+    'stats_rating_insert': (f"AFTER INSERT ON user_ratings WHEN {_IS_SAVED.format(movie='NEW.movie_id')}",
+                            _add_rated_movie('NEW.movie_id', _MOVIE_YEAR.format(movie='NEW.movie_id'))),
+    'stats_rating_delete': (f"AFTER DELETE ON user_ratings WHEN {_IS_SAVED.format(movie='OLD.movie_id')}",
+                            _remove_rated_movie('OLD.movie_id', _MOVIE_YEAR.format(movie='OLD.movie_id'))),
+    'stats_movie_genre_insert': (
+        f"AFTER INSERT ON movie_genres WHEN {_IS_SAVED.format(movie='NEW.movie_id')} "
+        f"AND {_IS_RATED.format(movie='NEW.movie_id')}",
+        'INSERT INTO stats_rated_genres (genre_id, movies) VALUES (NEW.genre_id, 1) '
+        'ON CONFLICT (genre_id) DO UPDATE SET movies = movies + 1;'),
+    'stats_movie_genre_delete': (
+        f"AFTER DELETE ON movie_genres WHEN {_IS_SAVED.format(movie='OLD.movie_id')} "
+        f"AND {_IS_RATED.format(movie='OLD.movie_id')}",
+        'UPDATE stats_rated_genres SET movies = movies - 1 WHERE genre_id = OLD.genre_id;'),
+    'stats_unique_genres_insert': ('AFTER INSERT ON stats_rated_genres',
+                                   _count_nonzero('unique_genres', update=False)),
+    'stats_unique_genres_update': ('AFTER UPDATE OF movies ON stats_rated_genres',
+                                   _count_nonzero('unique_genres', update=True)),
+    'stats_unique_decades_insert': ('AFTER INSERT ON stats_rated_decades',
+                                    _count_nonzero('unique_decades', update=False)),
+    'stats_unique_decades_update': ('AFTER UPDATE OF movies ON stats_rated_decades',
+                                    _count_nonzero('unique_decades', update=True)),
+    'stats_watchlist_insert': ('AFTER INSERT ON watchlist',
+                               _APPLY_WATCHLIST_ENTRY.format(sign='+', row='NEW')),
+    'stats_watchlist_delete': ('AFTER DELETE ON watchlist',
+                               _APPLY_WATCHLIST_ENTRY.format(sign='-', row='OLD')),
+    'stats_movie_view_insert': ('AFTER INSERT ON viewing_history',
+                                'INSERT INTO stats_movie_views (movie_id, views) VALUES (NEW.movie_id, 1) '
+                                'ON CONFLICT (movie_id) DO UPDATE SET views = views + 1;'),
+    'stats_movie_view_delete': ('AFTER DELETE ON viewing_history',
+                                'UPDATE stats_movie_views SET views = views - 1 WHERE movie_id = OLD.movie_id;'),
+    'stats_watchlisted_view_insert': (
+        f"AFTER INSERT ON viewing_history WHEN {_IS_WATCHLISTED.format(movie='NEW.movie_id')}",
+        _APPLY_WATCHLISTED_VIEW.format(sign='+', row='NEW')),
+    'stats_watchlisted_view_delete': (
+        f"AFTER DELETE ON viewing_history WHEN {_IS_WATCHLISTED.format(movie='OLD.movie_id')}",
+        _APPLY_WATCHLISTED_VIEW.format(sign='-', row='OLD')),
+}
+
+
+def rating_bucket(rating: float) -> int:
+    """Return the histogram bucket index for a rating."""
+    r = float(rating)
+    if r <= 1:
+        return 0
+    elif r <= 3:
+        return 1
+    elif r <= 5:
+        return 2
+    elif r <= 7:
+        return 3
+    return 4
+
+
+def create_stats_tables(db: sqlite3.Connection) -> None:
+    """Create the aggregate tables, adding columns an older table lacks."""
+    execute_script(db, STATS_SCHEMA)
+    columns = {row[1] for row in db.execute('PRAGMA table_xinfo(stats_aggregates)')}
+    for name, definition in STATS_ADDED_COLUMNS.items():
+        if name not in columns:
+            db.execute(f'ALTER TABLE stats_aggregates ADD COLUMN {name} {definition}')
+
+
+def ensure_stats_aggregates(db: sqlite3.Connection) -> None:
+    """Create the aggregate tables and seed them from existing data if empty; the caller commits."""
+    create_stats_tables(db)
+    row = db.execute('SELECT id FROM stats_aggregates WHERE id = 1').fetchone()
+    if row is None:
+        rebuild_stats_aggregates(db)
+
+
+def ensure_stats_triggers(db: sqlite3.Connection) -> None:
+    """Create the triggers that keep the movie, facet and completion counters.
+
+    Recreates triggers whose stored SQL predates the current bodies, and
+    then rebuilds the aggregates, since earlier writes were counted
+    differently. The caller commits.
+    """
+    create_stats_tables(db)
+    existing = dict(db.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"))
+    changed = False
+    for name, (event, body) in STATS_TRIGGERS.items():
+        sql = f'CREATE TRIGGER {name} {event} BEGIN {body} END'
+        if existing.get(name) != sql:
+            db.execute(f'DROP TRIGGER IF EXISTS {name}')
+            db.execute(sql)
+            changed = True
+
+    if changed:
+        rebuild_stats_aggregates(db)
+
+
+def rebuild_stats_aggregates(db: sqlite3.Connection) -> None:
+    """Recompute the aggregate row and facet counts from the base tables.
+
+    Used to seed the tables and to repair them; the caller commits.
+    """
+    create_stats_tables(db)
+    db.execute('DELETE FROM stats_rated_genres')
+    db.execute('''
+        INSERT INTO stats_rated_genres (genre_id, movies)
+        SELECT mg.genre_id, COUNT(*)
+        FROM movie_genres mg
+        JOIN movies m ON m.id = mg.movie_id
+        JOIN user_ratings r ON r.movie_id = mg.movie_id
+        GROUP BY mg.genre_id
+    ''')
+    db.execute('DELETE FROM stats_rated_decades')
+    db.execute('''
+        INSERT INTO stats_rated_decades (decade, movies)
+        SELECT (m.year / 10) * 10 AS decade, COUNT(*)
+        FROM movies m
+        JOIN user_ratings r ON m.id = r.movie_id
+        WHERE m.year IS NOT NULL
+        GROUP BY decade
+    ''')
+    db.execute('DELETE FROM stats_movie_views')
+    db.execute('''
+        INSERT INTO stats_movie_views (movie_id, views)
+        SELECT movie_id, COUNT(*) FROM viewing_history GROUP BY movie_id
+    ''')
+    db.execute(f'''
+        INSERT OR REPLACE INTO stats_aggregates (
+            id, total_movies, total_ratings, rating_sum, watchlist_size,
+            total_watches, unique_genres, unique_decades, watchlist_completion,
+            rating_bucket_0, rating_bucket_1, rating_bucket_2,
+            rating_bucket_3, rating_bucket_4, updated_at,
+            watchlist_views, watchlist_view_rows
+        )
+        WITH rating_totals AS (
+            SELECT
+                COUNT(*) AS total_ratings,
+                COALESCE(SUM(rating), 0) AS rating_sum,
+                COALESCE(SUM(bucket = 0), 0) AS bucket_0,
+                COALESCE(SUM(bucket = 1), 0) AS bucket_1,
+                COALESCE(SUM(bucket = 2), 0) AS bucket_2,
+                COALESCE(SUM(bucket = 3), 0) AS bucket_3,
+                COALESCE(SUM(bucket = 4), 0) AS bucket_4
+            FROM (SELECT rating, {_RATING_BUCKET_SQL} AS bucket FROM user_ratings)
+        ),
+        watchlist_totals AS (
+            SELECT
+                COUNT(*) AS size,
+                COALESCE(SUM(views), 0) AS views,
+                COALESCE(SUM(MAX(views, 1)), 0) AS view_rows
+            FROM (SELECT (SELECT COUNT(*) FROM viewing_history vh WHERE vh.movie_id = w.movie_id) AS views
+                  FROM watchlist w)
+        )
+        SELECT
+            1,
+            (SELECT COUNT(*) FROM movies),
+            rt.total_ratings,
+            rt.rating_sum,
+            wt.size,
+            (SELECT COUNT(*) FROM viewing_history),
+            (SELECT COUNT(*) FROM stats_rated_genres WHERE movies > 0),
+            (SELECT COUNT(*) FROM stats_rated_decades WHERE movies > 0),
+            CASE WHEN wt.view_rows = 0 THEN 0 ELSE ROUND(wt.views * 100.0 / wt.view_rows) END,
+            rt.bucket_0, rt.bucket_1, rt.bucket_2, rt.bucket_3, rt.bucket_4,
+            CURRENT_TIMESTAMP,
+            wt.views,
+            wt.view_rows
+        FROM rating_totals rt, watchlist_totals wt
+    ''')
+
+
+def record_rating(db: sqlite3.Connection, rating: float,
+                  previous: Optional[float] = None) -> None:
+    """Apply a new or replaced rating to the aggregates.
+
+    ``previous`` is the rating the movie had before the write, if any.
+    Call after the write and before ``commit()`` so both land together.
+    """
+    new_bucket = rating_bucket(rating)
+    if previous is None:
+        db.execute(f'''
+            UPDATE stats_aggregates
+            SET total_ratings = total_ratings + 1,
+                rating_sum = rating_sum + ?,
+                rating_bucket_{new_bucket} = rating_bucket_{new_bucket} + 1
+            WHERE id = 1
+        ''', (float(rating),))
+    else:
+        old_bucket = rating_bucket(previous)
+        db.execute(f'''
+            UPDATE stats_aggregates
+            SET rating_sum = rating_sum + ?,
+                rating_bucket_{old_bucket} = rating_bucket_{old_bucket} - 1,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE id = 1
+        ''', (float(rating) - float(previous),))
+        db.execute(f'''
+            UPDATE stats_aggregates
+            SET rating_bucket_{new_bucket} = rating_bucket_{new_bucket} + 1
+            WHERE id = 1
+        ''')
+
+
+def record_watch(db: sqlite3.Connection) -> None:
+    """Apply a new viewing_history row to the aggregates."""
+    db.execute('''
+        UPDATE stats_aggregates
+        SET total_watches = total_watches + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''')
+
+
+def record_watchlist_change(db: sqlite3.Connection, delta: int) -> None:
+    """Apply watchlist additions (positive) or removals (negative)."""
+    if not delta:
+        return
+    db.execute('''
+        UPDATE stats_aggregates
+        SET watchlist_size = watchlist_size + ?
+        WHERE id = 1
+    ''', (delta,))
+
+
+@dataclass
+class StatsSnapshot:
+    """Everything the statistics dashboard and ``/api/stats`` display."""
+    total_movies: int
+    total_ratings: int
+    avg_rating: Optional[float]
+    watchlist_size: int
+    total_watches: int
+    unique_genres: int
+    unique_decades: int
+    watchlist_completion: float
+    current_streak: int
+    weekly_movies: int
+    rating_distribution: List[int]
+    top_rated: List[Dict[str, Any]] = field(default_factory=list)
+    most_watched: List[Dict[str, Any]] = field(default_factory=list)
+
+    def to_api_dict(self) -> Dict[str, Any]:
+        """Format the counters for the real-time updates JSON payload."""
+        return {
+            'totalMovies': self.total_watches,
+            'uniqueGenres': self.unique_genres,
+            'currentStreak': self.current_streak,
+            'totalRatings': self.total_ratings,
+            'weeklyMovies': self.weekly_movies,
+            'uniqueDecades': self.unique_decades,
+            'watchlistCompletion': self.watchlist_completion,
+            'ratingDistribution': self.rating_distribution
+        }
+
+
+# The 7- and 30-day windows move with the clock, so they are computed at
+# read time next to the stored counters rather than being persisted. They
+# read at most 30 rows of the daily viewing rollup (viewing_rollup.py).
+_SNAPSHOT_SQL = '''
+    WITH recent AS (
+        SELECT
+            COUNT(*) AS current_streak,
+            COALESCE(SUM(CASE WHEN day >= date('now', '-7 days') THEN views END), 0) AS weekly_movies
+        FROM viewing_daily_rollup
+        WHERE day >= date('now', '-30 days') AND views > 0
+    )
+    SELECT a.*, recent.current_streak, recent.weekly_movies
+    FROM stats_aggregates a, recent
+    WHERE a.id = 1
+'''
+
+_LEADERBOARDS_SQL = '''
+    WITH top_rated AS (
+        SELECT 'top_rated' AS board, m.id, m.title, m.year, r.rating AS value,
+               ROW_NUMBER() OVER (ORDER BY r.rating DESC) AS position
+        FROM user_ratings r
+        JOIN movies m ON r.movie_id = m.id
+        ORDER BY r.rating DESC
+        LIMIT 10
+    ),
+    most_watched AS (
+        SELECT 'most_watched' AS board, m.id, m.title, m.year, v.views AS value,
+               ROW_NUMBER() OVER (ORDER BY v.views DESC) AS position
+        FROM stats_movie_views v
+        JOIN movies m ON v.movie_id = m.id
+        WHERE v.views > 0
+        ORDER BY v.views DESC
+        LIMIT 10
+    )
+    SELECT * FROM top_rated
+    UNION ALL
+    SELECT * FROM most_watched
+    ORDER BY board, position
+'''
+
+
+def _fetch_aggregate_row(db: sqlite3.Connection, sql: str) -> Dict[str, Any]:
+    """Run a query over the aggregate row, seeding the table on first use."""
+    try:
+        cursor = db.execute(sql)
+        row = cursor.fetchone()
+    except sqlite3.OperationalError:
+        row = None
+    if row is None:
+        ensure_stats_aggregates(db)
+        cursor = db.execute(sql)
+        row = cursor.fetchone()
+    return dict(zip([column[0] for column in cursor.description], row))
+
+
+def get_stats_aggregates(db: sqlite3.Connection) -> Dict[str, Any]:
+    """Read the stored aggregate row."""
+    return _fetch_aggregate_row(db, 'SELECT * FROM stats_aggregates WHERE id = 1')
+
+
+def get_stats_snapshot(db: sqlite3.Connection, include_leaderboards: bool = True) -> StatsSnapshot:
+    """Build the dashboard snapshot.
+
+    Reads the aggregate row and the recent-activity windows in one
+    statement, plus one more for the top-rated/most-watched tables when
+    ``include_leaderboards`` is set.
+    """
+    row = _fetch_aggregate_row(db, _SNAPSHOT_SQL)
+    snapshot = StatsSnapshot(
+        total_movies=row['total_movies'],
+        total_ratings=row['total_ratings'],
+        avg_rating=row['rating_sum'] / row['total_ratings'] if row['total_ratings'] else None,
+        watchlist_size=row['watchlist_size'],
+        total_watches=row['total_watches'],
+        unique_genres=row['unique_genres'],
+        unique_decades=row['unique_decades'],
+        watchlist_completion=row['watchlist_completion'],
+        current_streak=row['current_streak'],
+        weekly_movies=row['weekly_movies'],
+        rating_distribution=[row[f'rating_bucket_{i}'] for i in range(len(RATING_BUCKET_LABELS))]
+    )
+
+    if include_leaderboards:
+        for board, movie_id, title, year, value, _ in db.execute(_LEADERBOARDS_SQL):
+            if board == 'top_rated':
+                snapshot.top_rated.append({'id': movie_id, 'title': title, 'year': year, 'rating': value})
+            else:
+                snapshot.most_watched.append({'id': movie_id, 'title': title, 'year': year, 'watch_count': value})
+
+    return snapshot
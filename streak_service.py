@@ -0,0 +1,136 @@
+"""Viewing streaks for ReelTracker.
+
+Keeps a single-row ``streak_state`` table with the first and last viewing
+day, the start and length of the run ending on the last day, the longest
+run and the number of viewing days. ``record_watch_day`` applies a new
+watch in O(1); only a watch that adds a day earlier in history falls back
+to ``rebuild_streak_state``, a gaps-and-islands query over the daily
+viewing rollup.
+"""
+
+import sqlite3
+from datetime import date
+from typing import Any, Dict
+
+from database import execute_script
+from viewing_rollup import ensure_viewing_rollup
+
+
+STREAK_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS streak_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        first_day TEXT,
+        last_day TEXT,
+        run_start TEXT,
+        run_length INTEGER NOT NULL DEFAULT 0,
+        longest INTEGER NOT NULL DEFAULT 0,
+        viewing_days INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );
+'''
+
+# Consecutive days share julianday(day) - row number, so each island is
+# one run of viewing days
+_STREAK_RUNS_SQL = '''
+    WITH days AS (
+        SELECT day, julianday(day) - ROW_NUMBER() OVER (ORDER BY day) AS island
+        FROM viewing_daily_rollup
+        WHERE views > 0
+    )
+    SELECT MIN(day) AS run_start, MAX(day) AS run_end, COUNT(*) AS length
+    FROM days
+    GROUP BY island
+'''
+
+
+def rebuild_streak_state(db: sqlite3.Connection) -> None:
+    """Recompute the streak row from the daily rollup; the caller commits."""
+    db.execute(f'''
+        INSERT OR REPLACE INTO streak_state (
+            id, first_day, last_day, run_start, run_length, longest, viewing_days, updated_at
+        )
+        WITH runs AS ({_STREAK_RUNS_SQL}),
+        latest AS (SELECT run_start, length FROM runs ORDER BY run_end DESC LIMIT 1)
+        SELECT
+            1,
+            (SELECT MIN(run_start) FROM runs),
+            (SELECT MAX(run_end) FROM runs),
+            (SELECT run_start FROM latest),
+            COALESCE((SELECT length FROM latest), 0),
+            COALESCE((SELECT MAX(length) FROM runs), 0),
+            COALESCE((SELECT SUM(length) FROM runs), 0),
+            CURRENT_TIMESTAMP
+    ''')
+
+
+def ensure_streak_state(db: sqlite3.Connection) -> None:
+    """Create the streak table and seed it from viewing history if empty; the caller commits."""
+    tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'viewing_history', 'user_ratings'} <= tables:
+        return
+
+    ensure_viewing_rollup(db)
+    execute_script(db, STREAK_SCHEMA)
+    if db.execute('SELECT id FROM streak_state WHERE id = 1').fetchone() is None:
+        rebuild_streak_state(db)
+
+
+def record_watch_day(db: sqlite3.Connection, day: str) -> None:
+    """Apply a watch on ``day`` (``YYYY-MM-DD``) to the streak state.
+
+    Call after inserting the viewing_history row and before ``commit()``.
+    A watch on or after the last viewing day is applied in place; one that
+    adds a new day earlier in history rebuilds the row.
+    """
+    state = db.execute('SELECT last_day FROM streak_state WHERE id = 1').fetchone()
+    if state is None or state[0] is None:
+        rebuild_streak_state(db)
+        return
+
+    last_day = state[0]
+    if day == last_day:
+        return
+
+    if day < last_day:
+        # Already a viewing day (the rollup trigger has counted this watch)
+        views = db.execute('SELECT views FROM viewing_daily_rollup WHERE day = ?', (day,)).fetchone()
+        if views is None or views[0] <= 1:
+            rebuild_streak_state(db)
+        return
+
+    db.execute('''
+        UPDATE streak_state SET
+            run_start = CASE WHEN julianday(:day) - julianday(last_day) = 1 THEN run_start ELSE :day END,
+            run_length = CASE WHEN julianday(:day) - julianday(last_day) = 1 THEN run_length + 1 ELSE 1 END,
+            longest = MAX(longest, CASE WHEN julianday(:day) - julianday(last_day) = 1
+                                        THEN run_length + 1 ELSE 1 END),
+            last_day = :day,
+            viewing_days = viewing_days + 1,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''', {'day': day})
+
+
+def get_viewing_streaks(db: sqlite3.Connection, today: date) -> Dict[str, Any]:
+    """Current and longest streak, viewing days and consistency score.
+
+    The current streak counts only while the last viewing day is today or
+    yesterday.
+    """
+    state = db.execute('''
+        SELECT first_day, last_day, run_length, longest, viewing_days
+        FROM streak_state WHERE id = 1
+    ''').fetchone()
+    if state is None or not state[4]:
+        return {'current_streak': 0, 'longest_streak': 0, 'total_days': 0}
+
+    first_day, last_day, run_length, longest, viewing_days = state
+    first_day, last_day = date.fromisoformat(first_day), date.fromisoformat(last_day)
+    span_days = (last_day - first_day).days + 1
+
+    return {
+        'current_streak': run_length if (today - last_day).days <= 1 else 0,
+        'longest_streak': longest,
+        'total_viewing_days': viewing_days,
+        'consistency_score': round((viewing_days / span_days) * 100, 1) if viewing_days > 1 else 0
+    }
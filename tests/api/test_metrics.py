@@ -0,0 +1,92 @@
+"""Tests for per-request metrics and the /metrics endpoint.
+
+Runs the app against a small migrated database and checks what the
+request, SQL and cache hooks record, the Prometheus exposition, and the
+slow-query log.
+
+Usage:
+    python -m pytest tests/api/test_metrics.py -q
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+import api_service  # noqa: E402
+import app as reeltracker  # noqa: E402
+from database import get_connection_manager  # noqa: E402
+from request_metrics import request_metrics  # noqa: E402
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    path = str(tmp_path / 'metrics.db')
+    with get_connection_manager(path).writer() as conn:
+        conn.executemany('INSERT INTO movies (id, title, year) VALUES (?, ?, ?)', [
+            (i, f'Movie {i}', 2000 + i % 20) for i in range(1, 51)
+        ])
+        conn.commit()
+
+    monkeypatch.setitem(reeltracker.app.config, 'DATABASE', path)
+    reeltracker.response_cache.invalidate()
+    request_metrics.reset()
+    with reeltracker.app.test_client() as test_client:
+        yield test_client
+    get_connection_manager(path).close_all()
+
+
+def samples(text):
+    """Parse exposition lines into ``{'name{labels}': value}``."""
+    return {line.rsplit(' ', 1)[0]: float(line.rsplit(' ', 1)[1])
+            for line in text.splitlines() if line and not line.startswith('#')}
+
+
+def test_metrics_count_requests_sql_and_cache(client):
+    assert client.get('/movie/7').status_code == 200
+    assert client.get('/stats').status_code == 200
+    assert client.get('/stats').status_code == 200
+    assert client.get('/no-such-page').status_code == 404
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain; version=0.0.4')
+    metrics = samples(response.get_data(as_text=True))
+
+    detail = 'route="/movie/<int:movie_id>",method="GET"'
+    assert metrics[f'reeltracker_http_requests_total{{{detail},status="200"}}'] == 1
+    assert metrics[f'reeltracker_http_request_duration_seconds_count{{{detail}}}'] == 1
+    assert metrics[f'reeltracker_http_request_duration_seconds_bucket{{{detail},le="+Inf"}}'] == 1
+    assert metrics[f'reeltracker_request_sql_statements_total{{{detail}}}'] >= 1
+    assert metrics[f'reeltracker_request_sql_seconds_total{{{detail}}}'] > 0
+
+    stats = 'route="/stats",method="GET"'
+    assert metrics[f'reeltracker_request_cache_lookups_total{{{stats},cache="response",result="miss"}}'] == 1
+    assert metrics[f'reeltracker_request_cache_lookups_total{{{stats},cache="response",result="hit"}}'] == 1
+    assert metrics['reeltracker_http_requests_total{route="<unmatched>",method="GET",status="404"}'] == 1
+
+
+def test_scrape_does_not_create_the_tmdb_service(client, monkeypatch):
+    monkeypatch.setattr(api_service, 'tmdb_service', None)
+
+    assert client.get('/metrics').status_code == 200
+    assert api_service.tmdb_service is None
+    assert 'cache="tmdb_memory"' not in client.get('/metrics').get_data(as_text=True)
+
+
+def test_slow_query_log_records_sql_parameters_and_plan(client, tmp_path, monkeypatch):
+    log_path = tmp_path / 'slow.jsonl'
+    monkeypatch.setattr(request_metrics, 'slow_query_ms', 1e-6)
+    monkeypatch.setattr(request_metrics, 'slow_query_log', str(log_path))
+    assert client.get('/movie/7').status_code == 200
+
+    entries = [json.loads(line) for line in log_path.read_text().splitlines()]
+    movie = next(entry for entry in entries if entry['sql'].startswith('SELECT * FROM movies'))
+    assert movie['route'] == 'GET /movie/<int:movie_id>'
+    assert movie['parameters'] == [7]
+    assert any('movies' in step for step in movie['plan'])
+    assert request_metrics.slow_queries == len(entries)
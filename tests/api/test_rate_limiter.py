@@ -0,0 +1,84 @@
+"""Tests for the shared TMDB rate limiter under lock contention.
+
+Another connection holds a write lock on the bucket file, as a worker
+process taking a token would, for longer than the bucket's busy timeout
+or the caller's wait budget.
+
+Usage:
+    python -m pytest tests/api/test_rate_limiter.py -q
+"""
+
+import os
+import sqlite3
+import sys
+import time
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from api_service import TMDBService  # noqa: E402
+from rate_limiter import RateLimitExceeded, SQLiteTokenBucket  # noqa: E402
+
+
+@pytest.fixture
+def locked_bucket(tmp_path):
+    """A shared bucket whose file another connection keeps write-locked."""
+    path = str(tmp_path / 'rate.db')
+    bucket = SQLiteTokenBucket(path, 'tmdb', rate=10, busy_timeout=0.05)
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    yield bucket
+    holder.execute('ROLLBACK')
+    holder.close()
+
+
+def test_busy_shared_bucket_refuses_the_call(locked_bucket):
+    with pytest.raises(RateLimitExceeded, match='busy'):
+        locked_bucket.acquire(max_wait=1)
+
+    assert locked_bucket.metrics()['rejected'] == 1
+    assert not locked_bucket._conn.in_transaction
+
+
+def test_lock_wait_is_capped_by_the_callers_budget(tmp_path):
+    path = str(tmp_path / 'rate.db')
+    bucket = SQLiteTokenBucket(path, 'tmdb', rate=10, busy_timeout=5.0)
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    try:
+        start = time.monotonic()
+        with pytest.raises(RateLimitExceeded, match='busy'):
+            bucket.acquire(max_wait=0.05)
+        assert time.monotonic() - start < 1.0
+    finally:
+        holder.execute('ROLLBACK')
+        holder.close()
+
+
+def test_busy_shared_bucket_recovers_once_released(tmp_path):
+    path = str(tmp_path / 'rate.db')
+    bucket = SQLiteTokenBucket(path, 'tmdb', rate=10, busy_timeout=0.05)
+    holder = sqlite3.connect(path, isolation_level=None)
+    holder.execute('BEGIN IMMEDIATE')
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(max_wait=1)
+    holder.execute('ROLLBACK')
+    holder.close()
+
+    assert bucket.acquire(max_wait=1) == 0
+
+
+def test_tmdb_lookup_survives_a_busy_shared_bucket(locked_bucket, monkeypatch):
+    monkeypatch.setenv('TMDB_API_KEY', 'test')
+    monkeypatch.setenv('TMDB_CACHE_PATH', '')
+    # Never reached: the limiter refuses the call first
+    monkeypatch.setenv('TMDB_BASE_URL', 'http://127.0.0.1:9/3')
+    service = TMDBService()
+    service.rate_limiter = locked_bucket
+    try:
+        assert service.get_movie_details(550) is None
+        assert service.get_request_stats()['requests'] == 0
+    finally:
+        service.close()
@@ -0,0 +1,46 @@
+"""Tests for the response cache around concurrent invalidation.
+
+A write route may invalidate the cache while another request is still
+computing a view from the data the write replaced.
+
+Usage:
+    python -m pytest tests/api/test_response_cache.py -q
+"""
+
+import os
+import sys
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from response_cache import ResponseCache  # noqa: E402
+
+
+def test_invalidate_during_compute_discards_the_result():
+    cache = ResponseCache()
+    computing = threading.Event()
+    written = threading.Event()
+
+    def stale_compute():
+        computing.set()
+        written.wait(5)
+        return 'stale'
+
+    reader = threading.Thread(target=lambda: cache.get_or_compute('stats:', 60, stale_compute))
+    reader.start()
+    assert computing.wait(5)
+    cache.invalidate()
+    written.set()
+    reader.join(5)
+
+    assert cache.get('stats:') == (False, None)
+    assert cache.get_or_compute('stats:', 60, lambda: 'fresh') == 'fresh'
+    assert cache.get('stats:') == (True, 'fresh')
+
+
+def test_compute_without_invalidation_is_stored():
+    cache = ResponseCache()
+
+    assert cache.get_or_compute('stats:', 60, lambda: 'value') == 'value'
+    assert cache.get('stats:') == (True, 'value')
@@ -0,0 +1,136 @@
+"""Single-flight tests for TMDBService against a local stub TMDB server.
+
+The stub delays every response so concurrent callers overlap, and counts
+the requests it receives per path.
+
+Usage:
+    python -m pytest tests/api/test_tmdb_single_flight.py -q
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from api_service import TMDBService  # noqa: E402
+
+CALLERS = 16
+RESPONSE_DELAY = 0.2
+
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    """Answers /3/movie/<id> slowly; ids starting with 404 are not found."""
+
+    protocol_version = 'HTTP/1.1'
+    hits = Counter()
+    hits_lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path.split('?')[0]
+        with self.hits_lock:
+            self.hits[path] += 1
+        time.sleep(RESPONSE_DELAY)
+
+        movie_id = path.rsplit('/', 1)[-1]
+        if movie_id.startswith('404'):
+            status, body = 404, {'status_message': 'not found'}
+        else:
+            status, body = 200, {'id': int(movie_id), 'title': f'Stub Movie {movie_id}'}
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+@pytest.fixture
+def stub_server():
+    StubTMDBHandler.hits.clear()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubTMDBHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def tmdb(stub_server, monkeypatch):
+    monkeypatch.setenv('TMDB_API_KEY', 'test-key')
+    monkeypatch.setenv('TMDB_CACHE_PATH', '')
+    monkeypatch.setenv('TMDB_MAX_RETRIES', '0')
+    monkeypatch.setenv('TMDB_RATE_LIMIT', '1000')
+    monkeypatch.setenv('TMDB_RATE_BURST', '1000')
+    monkeypatch.delenv('TMDB_RATE_LIMIT_PATH', raising=False)
+
+    service = TMDBService()
+    service.BASE_URL = f'http://127.0.0.1:{stub_server.server_port}/3'
+    yield service
+    service.close()
+
+
+def run_concurrently(func, callers=CALLERS):
+    """Start ``callers`` threads together and collect their results."""
+    barrier = threading.Barrier(callers)
+    results = [None] * callers
+
+    def call(index):
+        barrier.wait()
+        results[index] = func()
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+    return results
+
+
+def test_concurrent_callers_share_one_upstream_request(tmdb):
+    results = run_concurrently(lambda: tmdb.get_movie_details(550))
+
+    assert StubTMDBHandler.hits['/3/movie/550'] == 1
+    assert all(result == {'id': 550, 'title': 'Stub Movie 550'} for result in results)
+    assert tmdb.get_request_stats()['coalesced'] == CALLERS - 1
+
+
+def test_shared_failure_is_fetched_once(tmdb):
+    results = run_concurrently(lambda: tmdb.get_movie_details(404001))
+
+    assert StubTMDBHandler.hits['/3/movie/404001'] == 1
+    assert results == [None] * CALLERS
+
+
+def test_distinct_keys_are_not_coalesced(tmdb):
+    ids = iter(range(1, CALLERS + 1))
+    ids_lock = threading.Lock()
+
+    def fetch_next():
+        with ids_lock:
+            movie_id = next(ids)
+        return tmdb.get_movie_details(movie_id)
+
+    results = run_concurrently(fetch_next)
+
+    assert sum(StubTMDBHandler.hits.values()) == CALLERS
+    assert sorted(result['id'] for result in results) == list(range(1, CALLERS + 1))
+
+
+def test_later_callers_hit_the_cache(tmdb):
+    run_concurrently(lambda: tmdb.get_movie_details(7))
+    tmdb.get_movie_details(7)
+
+    assert StubTMDBHandler.hits['/3/movie/7'] == 1
@@ -0,0 +1,181 @@
+"""Index coverage tests for the SQL the routes and analytics run.
+
+Collects every statement passed to ``execute``/``executemany`` in the
+modules listed in ``SOURCES``, plus module-level ``*_SQL`` constants run
+through a helper, runs ``EXPLAIN QUERY PLAN`` on each against a seeded,
+fully migrated database, and fails on a full table scan. A full walk of an
+index counts as a scan too, unless the statement stops early with
+``LIMIT``. Functions listed in ``FULL_READS`` may read whole tables, and
+reads of the ``sqlite_master`` catalog are not checked.
+
+Usage:
+    python -m pytest tests/database/test_query_plans.py -q
+"""
+
+import ast
+import os
+import random
+import re
+import sys
+import tempfile
+from typing import List, Tuple
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from database import get_connection_manager  # noqa: E402
+
+SOURCES = ['app.py', 'time_series_service.py', 'data_visualizations.py', 'stats_service.py',
+           'genre_service.py', 'viewing_rollup.py', 'streak_service.py', 'search_index.py']
+
+# (file, function) -> why reading the whole table is intended
+FULL_READS = {
+    ('app.py', 'watchlist'): 'the watchlist page lists every entry',
+    ('data_visualizations.py', 'get_rating_vs_popularity'): 'the scatter plot shows every rating',
+    ('data_visualizations.py', 'get_watchlist_priority_breakdown'): 'counts every watchlist entry',
+    ('stats_service.py', 'rebuild_stats_aggregates'): 'seeds or repairs the counters from every row',
+    ('genre_service.py', 'backfill_movie_genres'): 'one-off migration over every movie',
+    ('genre_service.py', 'ensure_genre_tables'): 'one-off migration probe that stops at the first row',
+    ('viewing_rollup.py', 'rebuild_viewing_rollup'): 'seeds or repairs the rollups from every view',
+    ('streak_service.py', 'rebuild_streak_state'): 'recomputes the runs from every viewing day',
+}
+
+# (file, function) -> why a statement built at runtime needs no plan check
+RUNTIME_SQL = {
+    ('stats_service.py', 'create_stats_tables'): 'schema change',
+    ('stats_service.py', 'ensure_stats_triggers'): 'schema change',
+    ('stats_service.py', 'record_rating'): 'primary key update of a bucket column picked by rating',
+    ('stats_service.py', '_fetch_aggregate_row'): 'runs _SNAPSHOT_SQL or a primary key read, both checked',
+    ('viewing_rollup.py', 'ensure_viewing_time_columns'): 'schema change',
+    ('viewing_rollup.py', 'ensure_viewing_rollup'): 'schema change',
+    ('viewing_rollup.py', 'drop_unused_viewing_time_columns'): 'schema change',
+    ('viewing_rollup.py', 'get_viewing_rollup'): 'only the group key varies; the day range uses the primary key',
+}
+
+_STATEMENT = re.compile(r'^\s*(?:WITH|SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE)
+_NAMED_PARAMETER = re.compile(r'(?<![:\w]):([A-Za-z_]\w*)')
+
+_SCAN = re.compile(r'^SCAN (\S+)(?: USING (?:COVERING )?INDEX \S+)?$')
+_SUBQUERY = re.compile(r'^(?:CO-ROUTINE|MATERIALIZE) (\S+)$')
+
+
+class _StatementCollector(ast.NodeVisitor):
+    """Finds SQL passed to execute calls, with the function it appears in."""
+
+    def __init__(self, constants):
+        self.constants = constants
+        self.used = set()
+        self.function = '<module>'
+        self.statements: List[Tuple[str, int, object]] = []
+
+    def resolve(self, node):
+        """Return the SQL text of a literal, a constant or an f-string of constants."""
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name) and node.id in self.constants:
+            self.used.add(node.id)
+            return self.constants[node.id]
+        if isinstance(node, ast.JoinedStr):
+            parts = [self.resolve(value.value if isinstance(value, ast.FormattedValue) else value)
+                     for value in node.values]
+            if None not in parts:
+                return ''.join(parts)
+        return None
+
+    def visit_FunctionDef(self, node):
+        outer, self.function = self.function, node.name
+        self.generic_visit(node)
+        self.function = outer
+
+    def visit_Call(self, node):
+        if (isinstance(node.func, ast.Attribute) and node.func.attr in ('execute', 'executemany')
+                and node.args):
+            # None when built at runtime; reported by test_statements_are_static
+            sql = self.resolve(node.args[0])
+            self.statements.append((self.function, node.lineno, sql))
+        self.generic_visit(node)
+
+
+def collect_statements(filename: str) -> List[Tuple[str, str, int, object]]:
+    """Return ``(file, function, line, sql)`` for every statement in a source file.
+
+    Execute calls report their enclosing function; ``*_SQL`` statements
+    that are not passed to an execute call directly report the constant.
+    """
+    with open(os.path.join(ROOT, filename)) as source:
+        tree = ast.parse(source.read())
+
+    assignments = [
+        (target.id, node.lineno, node.value.value)
+        for node in tree.body if isinstance(node, ast.Assign)
+        and isinstance(node.value, ast.Constant) and isinstance(node.value.value, str)
+        for target in node.targets if isinstance(target, ast.Name)
+    ]
+    collector = _StatementCollector({name: value for name, _, value in assignments})
+    collector.visit(tree)
+    statements = [(filename, function, line, sql) for function, line, sql in collector.statements]
+    statements += [
+        (filename, name, line, sql) for name, line, sql in assignments
+        if name.endswith('_SQL') and name not in collector.used and _STATEMENT.match(sql)
+    ]
+    return statements
+
+
+STATEMENTS = [statement for filename in SOURCES for statement in collect_statements(filename)]
+
+
+@pytest.fixture(scope='module')
+def db():
+    """A migrated database with enough rows that every table is non-trivial."""
+    path = os.path.join(tempfile.mkdtemp(), 'plans.db')
+    manager = get_connection_manager(path)
+    rng = random.Random(7)
+    with manager.writer() as conn:
+        conn.executemany('INSERT INTO movies (id, title, year, genre) VALUES (?, ?, ?, ?)', [
+            (i, f'Movie {i}', rng.randint(1950, 2025), 'Drama, Comedy') for i in range(1, 501)
+        ])
+        conn.executemany('INSERT INTO user_ratings (movie_id, rating) VALUES (?, ?)', [
+            (i, rng.randint(0, 10)) for i in range(1, 501, 2)
+        ])
+        conn.executemany('INSERT INTO watchlist (movie_id, priority) VALUES (?, ?)', [
+            (i, rng.randint(0, 2)) for i in range(1, 501, 5)
+        ])
+        conn.executemany('INSERT INTO viewing_history (movie_id, watched_at) VALUES (?, ?)', [
+            (rng.randint(1, 500), f'2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 20:00:00')
+            for _ in range(5000)
+        ])
+        conn.commit()
+        yield conn
+    manager.close_all()
+
+
+def test_statements_are_static():
+    dynamic = [f'{filename}:{line}' for filename, function, line, sql in STATEMENTS
+               if sql is None and (filename, function) not in RUNTIME_SQL]
+    assert not dynamic, f'SQL built at runtime cannot be checked: {dynamic}'
+
+
+@pytest.mark.parametrize(
+    'filename, function, line, sql',
+    [statement for statement in STATEMENTS if statement[3] is not None],
+    ids=[f'{filename}:{line}' for filename, _, line, sql in STATEMENTS if sql is not None]
+)
+def test_no_full_table_scans(db, filename, function, line, sql):
+    names = _NAMED_PARAMETER.findall(sql)
+    parameters = dict.fromkeys(names) if names else [None] * sql.count('?')
+    plan = [row[3] for row in db.execute(f'EXPLAIN QUERY PLAN {sql}', parameters)]
+    subqueries = {match.group(1) for match in map(_SUBQUERY.match, plan) if match}
+    limited = re.search(r'\bLIMIT\b', sql, re.IGNORECASE) is not None
+    full_read = (filename, function) in FULL_READS
+
+    scans = []
+    for detail in plan:
+        match = _SCAN.match(detail)
+        if match is None or match.group(1) in subqueries or match.group(1) == 'sqlite_master':
+            continue
+        if not full_read and ('INDEX' not in detail or not limited):
+            scans.append(detail)
+
+    assert not scans, f'{filename}:{line} in {function}() scans {scans}; plan: {plan}'
@@ -0,0 +1,137 @@
+"""Consistency tests for the incrementally maintained stats aggregates.
+
+Drives the write routes and the TMDB save path against a small migrated
+database and checks after each step that the stored aggregate row equals
+what ``rebuild_stats_aggregates`` computes from the base tables.
+
+Usage:
+    python -m pytest tests/database/test_stats_aggregates.py -q
+"""
+
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+import app as reeltracker  # noqa: E402
+from database import get_connection_manager  # noqa: E402
+from genre_service import sync_movie_genres  # noqa: E402
+from stats_service import get_stats_aggregates, rebuild_stats_aggregates  # noqa: E402
+
+GENRES = ['Drama', 'Comedy', 'Horror', 'Western']
+
+# Per-key count tables: table -> (key column, count column)
+COUNT_TABLES = {
+    'stats_rated_genres': ('genre_id', 'movies'),
+    'stats_rated_decades': ('decade', 'movies'),
+    'stats_movie_views': ('movie_id', 'views'),
+}
+
+
+class FakeTMDB:
+    def get_director(self, movie_data):
+        return 'Someone'
+
+    def get_poster_url(self, poster_path):
+        return ''
+
+
+def tmdb_movie(movie_id, year, genres, imdb_id=None):
+    return {
+        'id': movie_id,
+        'title': f'Movie {movie_id}',
+        'release_date': f'{year}-01-01' if year else '',
+        'genres': [{'name': name} for name in genres],
+        'imdb_id': imdb_id or f'tt{movie_id:07d}',
+    }
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    path = str(tmp_path / 'stats.db')
+    with get_connection_manager(path).writer() as conn:
+        for i in range(1, 21):
+            conn.execute('INSERT INTO movies (id, title, year, imdb_id) VALUES (?, ?, ?, ?)',
+                         (i, f'Movie {i}', 1950 + i * 3, f'tt{i:07d}'))
+            sync_movie_genres(conn, i, [GENRES[i % 4], GENRES[(i * 3) % 4]])
+        conn.commit()
+
+    monkeypatch.setitem(reeltracker.app.config, 'DATABASE', path)
+    yield path
+    get_connection_manager(path).close_all()
+
+
+def read_counters(conn):
+    """The aggregate row and the non-zero rows of each count table."""
+    row = get_stats_aggregates(conn)
+    row.pop('updated_at')
+    counts = {
+        table: [tuple(r) for r in conn.execute(
+            f'SELECT {key}, {count} FROM {table} WHERE {count} > 0 ORDER BY {key}')]
+        for table, (key, count) in COUNT_TABLES.items()
+    }
+    return row, counts
+
+
+def assert_matches_rebuild(path):
+    with get_connection_manager(path).writer() as conn:
+        stored = read_counters(conn)
+        rebuild_stats_aggregates(conn)
+        rebuilt = read_counters(conn)
+        conn.rollback()
+    assert stored == rebuilt
+
+
+def test_route_writes_keep_aggregates_in_step(db_path):
+    client = reeltracker.app.test_client()
+    steps = [
+        ('/movie/3/rate', {'rating': '8'}),
+        ('/movie/4/rate', {'rating': '2.5'}),
+        ('/movie/3/rate', {'rating': '4'}),
+        ('/movie/99/rate', {'rating': '7'}),
+        ('/movie/5/add-watchlist', {}),
+        ('/movie/5/watched', {}),
+        ('/movie/5/watched', {'watched_date': '2024-03-01'}),
+        ('/movie/6/watched', {}),
+        ('/movie/6/add-watchlist', {}),
+        ('/movie/6/add-watchlist', {}),
+        ('/movie/7/add-watchlist', {}),
+        ('/movie/5/remove-watchlist', {}),
+        ('/movie/8/remove-watchlist', {}),
+    ]
+    for url, form in steps:
+        assert client.post(url, data=form).status_code == 200
+        assert_matches_rebuild(db_path)
+
+    with get_connection_manager(db_path).writer() as conn:
+        aggregates = get_stats_aggregates(conn)
+    assert aggregates['total_ratings'] == 3
+    assert aggregates['watchlist_size'] == 2
+    assert aggregates['watchlist_completion'] == 50
+
+
+def test_saving_movies_keeps_aggregates_in_step(db_path):
+    client = reeltracker.app.test_client()
+    for movie_id in (2, 3, 99):
+        client.post(f'/movie/{movie_id}/rate', data={'rating': '6'})
+    client.post('/movie/99/add-watchlist')
+    client.post('/movie/99/watched')
+
+    with get_connection_manager(db_path).writer() as conn:
+        # A new rated movie, a genre and year change, and an imdb_id that
+        # replaces movie 2's row
+        reeltracker.save_tmdb_movies(conn, FakeTMDB(), [
+            tmdb_movie(99, 1921, ['Western', 'Musical']),
+            tmdb_movie(3, 2011, ['Horror']),
+            tmdb_movie(50, None, ['Drama'], imdb_id='tt0000002'),
+        ])
+    assert_matches_rebuild(db_path)
+
+    with get_connection_manager(db_path).writer() as conn:
+        assert conn.execute('SELECT COUNT(*) FROM movies WHERE id = 2').fetchone()[0] == 0
+        conn.execute('UPDATE movies SET year = 1899 WHERE id = 99')
+        conn.commit()
+    assert_matches_rebuild(db_path)
@@ -0,0 +1,174 @@
+"""Benchmark normalized genre analytics against the string-splitting path.
+
+Builds a synthetic library (default 100k views), then times the old
+Python ``split(',')`` aggregation against the indexed ``movie_genres``
+``GROUP BY`` queries for both the rated-genre breakdown and the
+timeline's per-month/overall genre counts.
+
+Usage:
+    python tests/performance/bench_genres.py --views 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from database import get_connection_manager  # noqa: E402
+from genre_service import (  # noqa: E402
+    GENRE_SCHEMA, backfill_movie_genres, get_rated_genre_counts
+)
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama',
+          'Family', 'Fantasy', 'History', 'Horror', 'Music', 'Mystery', 'Romance',
+          'Science Fiction', 'TV Movie', 'Thriller', 'War', 'Western']
+
+
+def build_database(path: str, movies: int, views: int, seed: int = 42) -> None:
+    """Create a synthetic library with comma-joined genre strings."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript('''
+        CREATE TABLE movies (id INTEGER PRIMARY KEY, title TEXT NOT NULL, year INTEGER,
+                             director TEXT, genre TEXT, plot TEXT, poster_url TEXT,
+                             imdb_id TEXT UNIQUE, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP);
+        CREATE TABLE user_ratings (id INTEGER PRIMARY KEY, movie_id INTEGER NOT NULL, rating REAL NOT NULL,
+                                   review TEXT, rated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, UNIQUE(movie_id));
+        CREATE TABLE viewing_history (id INTEGER PRIMARY KEY, movie_id INTEGER NOT NULL,
+                                      watched_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, notes TEXT);
+        CREATE INDEX idx_viewing_watched_movie ON viewing_history(watched_at, movie_id);
+    ''')
+    conn.executemany('INSERT INTO movies (id, title, year, genre) VALUES (?, ?, ?, ?)', [
+        (i, f'Movie {i}', rng.randint(1950, 2025), ', '.join(rng.sample(GENRES, rng.randint(1, 3))))
+        for i in range(1, movies + 1)
+    ])
+    conn.executemany('INSERT INTO user_ratings (movie_id, rating) VALUES (?, ?)', [
+        (i, round(rng.uniform(0, 10), 1)) for i in range(1, movies + 1) if rng.random() < 0.6
+    ])
+    now = datetime.now()
+    conn.executemany('INSERT INTO viewing_history (movie_id, watched_at) VALUES (?, ?)', [
+        (rng.randint(1, movies),
+         (now - timedelta(minutes=rng.randint(0, 364 * 24 * 60))).strftime('%Y-%m-%d %H:%M:%S'))
+        for _ in range(views)
+    ])
+    conn.executescript(GENRE_SCHEMA)
+    backfill_movie_genres(conn)
+    conn.commit()
+    conn.close()
+
+
+def legacy_rated_genres(conn, limit=10):
+    """Previous get_genre_breakdown aggregation."""
+    rows = conn.execute('''
+        SELECT m.genre FROM movies m
+        JOIN user_ratings ur ON m.id = ur.movie_id
+        WHERE m.genre IS NOT NULL AND m.genre != ''
+    ''').fetchall()
+    counter = Counter()
+    for (genre_text,) in rows:
+        for genre in genre_text.split(', '):
+            genre = genre.strip()
+            if genre:
+                counter[genre] += 1
+    return counter.most_common(limit), sum(counter.values())
+
+
+def legacy_timeline_genres(conn, since):
+    """Previous per-month and overall genre aggregation over timeline rows."""
+    rows = conn.execute('''
+        SELECT m.genre, strftime('%Y-%m', vh.watched_at) AS month
+        FROM viewing_history vh
+        JOIN movies m ON vh.movie_id = m.id
+        WHERE vh.watched_at >= ?
+        ORDER BY vh.watched_at
+    ''', (since,)).fetchall()
+    monthly = defaultdict(list)
+    overall = []
+    for genre_text, month in rows:
+        if genre_text:
+            names = [g.strip() for g in genre_text.split(',')]
+            monthly[month].extend(names)
+            overall.extend(names)
+    return ({month: Counter(names).most_common(3) for month, names in monthly.items()},
+            Counter(overall).most_common(5))
+
+
+def monthly_genre_counts(conn, since):
+    """Count views per month and genre since a timestamp, busiest first."""
+    # Collapse views to (month, movie) first so each movie's genres are
+    # joined once per month rather than once per view.
+    return conn.execute("""
+        WITH monthly_movies AS (
+            SELECT strftime('%Y-%m', watched_at) AS month, movie_id, COUNT(*) AS views
+            FROM viewing_history
+            WHERE watched_at >= ?
+            GROUP BY month, movie_id
+        )
+        SELECT mm.month, g.name AS genre, SUM(mm.views) AS count
+        FROM monthly_movies mm
+        JOIN movie_genres mg ON mg.movie_id = mm.movie_id
+        JOIN genres g ON g.id = mg.genre_id
+        GROUP BY mm.month, g.id
+        ORDER BY mm.month, count DESC, g.name
+    """, (since,)).fetchall()
+
+
+def normalized_timeline_genres(conn, since):
+    """Same result built from the indexed per-month GROUP BY."""
+    monthly = defaultdict(list)
+    totals = Counter()
+    for month, genre, count in monthly_genre_counts(conn, since):
+        if len(monthly[month]) < 3:
+            monthly[month].append((genre, count))
+        totals[genre] += count
+    return monthly, sorted(totals.items(), key=lambda item: (-item[1], item[0]))[:5]
+
+
+def best_of(func, repeat):
+    """Return the best wall time in milliseconds over ``repeat`` runs."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(min(timings), 2)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=5000)
+    parser.add_argument('--views', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.mkdtemp(), 'genres.db')
+    build_database(path, args.movies, args.views)
+    since = (datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d %H:%M:%S')
+
+    with get_connection_manager(path).reader() as conn:
+        results = {
+            'movies': args.movies,
+            'views': args.views,
+            'rated_genres_ms': {
+                'string_split': best_of(lambda: legacy_rated_genres(conn), args.repeat),
+                'movie_genres': best_of(lambda: get_rated_genre_counts(conn), args.repeat),
+            },
+            'timeline_genres_ms': {
+                'string_split': best_of(lambda: legacy_timeline_genres(conn, since), args.repeat),
+                'movie_genres': best_of(lambda: normalized_timeline_genres(conn, since), args.repeat),
+            },
+        }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""Benchmark idle capacity of the /api/stats/stream SSE channel.
+
+Runs the app on a threaded Werkzeug server against a temporary database,
+opens N idle subscribers, then reports the memory and CPU they cost while
+idle and how long one write takes to reach all of them.
+
+Usage:
+    python tests/performance/bench_stats_stream.py --subscribers 500
+"""
+
+import argparse
+import json
+import os
+import resource
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from werkzeug.serving import make_server  # noqa: E402
+
+import app as reeltracker  # noqa: E402
+
+
+def rss_kb() -> int:
+    """Resident set size of this process in KiB (Linux only)."""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def open_subscriber(port: int) -> socket.socket:
+    """Open a raw HTTP connection to the stream and read its first event."""
+    sock = socket.create_connection(('127.0.0.1', port))
+    sock.sendall(b'GET /api/stats/stream HTTP/1.1\r\nHost: localhost\r\n'
+                 b'Accept: text/event-stream\r\n\r\n')
+    buffer = b''
+    while b'event: stats' not in buffer:
+        chunk = sock.recv(4096)
+        if not chunk:
+            raise RuntimeError('stream closed before the initial event')
+        buffer += chunk
+    sock.setblocking(False)
+    return sock
+
+
+def wait_for_fanout(sockets, timeout: float) -> float:
+    """Return seconds until every socket received a stats event."""
+    selector = selectors.DefaultSelector()
+    for sock in sockets:
+        selector.register(sock, selectors.EVENT_READ, b'')
+    start = time.perf_counter()
+    pending = len(sockets)
+    while pending and time.perf_counter() - start < timeout:
+        for key, _ in selector.select(timeout=0.5):
+            data = key.data + key.fileobj.recv(4096)
+            if b'event: stats' in data:
+                selector.unregister(key.fileobj)
+                pending -= 1
+            else:
+                selector.modify(key.fileobj, selectors.EVENT_READ, data)
+    elapsed = time.perf_counter() - start
+    selector.close()
+    if pending:
+        raise RuntimeError(f'{pending} subscribers did not receive the update')
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--idle-seconds', type=float, default=5.0)
+    args = parser.parse_args()
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(hard, max(soft, args.subscribers * 3 + 64)), hard))
+
+    workdir = tempfile.mkdtemp()
+    reeltracker.app.config['DATABASE'] = os.path.join(workdir, 'bench.db')
+    with reeltracker.app.app_context():
+        reeltracker.init_db()
+        db = reeltracker.get_db()
+        db.execute("INSERT INTO movies (id, title, year, genre) VALUES (1, 'Bench', 2000, 'Drama')")
+        db.commit()
+
+    server = make_server('127.0.0.1', 0, reeltracker.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    rss_before = rss_kb()
+    threads_before = threading.active_count()
+    sockets = [open_subscriber(server.port) for _ in range(args.subscribers)]
+    rss_after = rss_kb()
+
+    cpu_start = time.process_time()
+    time.sleep(args.idle_seconds)
+    idle_cpu = time.process_time() - cpu_start
+
+    client = reeltracker.app.test_client()
+    write_start = time.perf_counter()
+    client.post('/movie/1/watched')
+    write_seconds = time.perf_counter() - write_start
+    fanout_seconds = wait_for_fanout(sockets, timeout=30)
+
+    results = {
+        'subscribers': args.subscribers,
+        'server_threads': threading.active_count() - threads_before,
+        'rss_kb_per_subscriber': round((rss_after - rss_before) / args.subscribers, 1),
+        'idle_cpu_seconds': round(idle_cpu, 4),
+        'idle_window_seconds': args.idle_seconds,
+        'write_route_seconds': round(write_seconds, 4),
+        'fanout_seconds': round(fanout_seconds, 4),
+    }
+    print(json.dumps(results, indent=2))
+
+    for sock in sockets:
+        sock.close()
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
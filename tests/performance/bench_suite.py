@@ -0,0 +1,194 @@
+"""Benchmark ReelTracker's Python hot paths and fail on regressions.
+
+For each library scale, generates a deterministic library (``scale``
+movies, 60% rated, 10% on the watchlist, one view per movie; see
+``library_generator``) and times, with every cache cleared before each run:
+
+- each local route through Flask's test client, reads before writes, with
+  every write run on a movie that has no rating, watchlist entry or view;
+- ``TimeSeriesService.get_viewing_timeline_extended`` and
+  ``get_viewing_streaks``;
+- each ``data_visualizations`` chart function.
+
+Results are compared with the baselines in ``baselines.json`` next to this
+file. A case regresses when it is slower than its baseline by more than
+``--tolerance`` and by more than ``--min-delta-ms``; any regression exits
+with status 1. Baselines depend on the machine, so record them with
+``--update-baseline`` on the machine that will compare against them.
+
+TMDB-backed routes and the SSE stream are not timed.
+
+Usage:
+    python tests/performance/bench_suite.py
+    python tests/performance/bench_suite.py --scales 1000 100000 1000000 --update-baseline
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+import app as reeltracker  # noqa: E402
+import data_visualizations  # noqa: E402
+from database import get_connection_manager  # noqa: E402
+from library_generator import generate_library  # noqa: E402
+from result_memo import analytics_memo  # noqa: E402
+from time_series_service import TimeSeriesService  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+CHART_FUNCTIONS = ['get_rating_distribution', 'get_genre_breakdown', 'get_viewing_timeline',
+                   'get_rating_vs_popularity', 'get_watchlist_priority_breakdown', 'get_monthly_stats']
+
+
+def best_cold_ms(func: Callable[[], None], repeat: int) -> float:
+    """Best wall time in milliseconds over ``repeat`` runs, caches cleared before each."""
+    timings = []
+    for _ in range(repeat):
+        reeltracker.response_cache.invalidate()
+        analytics_memo.clear()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return round(min(timings), 2)
+
+
+def untouched_movies(path: str) -> Iterator[int]:
+    """Ids of movies with no rating, watchlist entry or view, lowest first."""
+    with get_connection_manager(path).reader() as conn:
+        rows = conn.execute('''
+            SELECT id FROM movies m
+            WHERE NOT EXISTS (SELECT 1 FROM user_ratings WHERE movie_id = m.id)
+              AND NOT EXISTS (SELECT 1 FROM watchlist WHERE movie_id = m.id)
+              AND NOT EXISTS (SELECT 1 FROM viewing_history WHERE movie_id = m.id)
+            ORDER BY id
+        ''').fetchall()
+    return iter([row[0] for row in rows])
+
+
+def route_cases(client, scale: int, today: date, fresh_ids: Iterator[int]) -> Dict[str, Callable[[], None]]:
+    """Requests for every local route; each checks its status code.
+
+    Each run of a write takes the next id from ``fresh_ids``, so every
+    rating is a first rating and every watch a movie's first view.
+    """
+    movie_id = scale // 2
+
+    def request(method: str, url: str, data=None) -> Callable[[], None]:
+        def run():
+            response = client.open(url, method=method, data=data)
+            if response.status_code != 200:
+                raise RuntimeError(f'{method} {url} returned {response.status_code}')
+        return run
+
+    def fresh_request(path: str, data=None) -> Callable[[], None]:
+        def run():
+            request('POST', f'/movie/{next(fresh_ids)}/{path}', data)()
+        return run
+
+    def watchlist_round_trip():
+        fresh_id = next(fresh_ids)
+        request('POST', f'/movie/{fresh_id}/add-watchlist')()
+        request('POST', f'/movie/{fresh_id}/remove-watchlist')()
+
+    return {
+        'GET /': request('GET', '/'),
+        'GET /search': request('GET', '/search?q=midnight+harbor&source=local'),
+        'GET /movie/<id>': request('GET', f'/movie/{movie_id}'),
+        'GET /watchlist': request('GET', '/watchlist'),
+        'GET /stats': request('GET', '/stats'),
+        'GET /timeline': request('GET', '/timeline'),
+        'GET /api/stats': request('GET', '/api/stats'),
+        'POST /movie/<id>/rate': fresh_request('rate', {'rating': '7'}),
+        'POST /movie/<id>/add-watchlist + remove-watchlist': watchlist_round_trip,
+        'POST /movie/<id>/watched': fresh_request('watched',
+                                                  {'watched_date': (today - timedelta(days=1)).isoformat()}),
+    }
+
+
+def bench_scale(scale: int, repeat: int) -> Dict[str, float]:
+    """Generate one library and time every case against it."""
+    path = os.path.join(tempfile.mkdtemp(), f'suite_{scale}.db')
+    today = date.today()
+    generate_library(path, scale, end=today)
+
+    service = TimeSeriesService(path, backend='python')
+    analytics = {
+        'TimeSeriesService.get_viewing_timeline_extended': service.get_viewing_timeline_extended,
+        'TimeSeriesService.get_viewing_streaks': service.get_viewing_streaks,
+    }
+    for name in CHART_FUNCTIONS:
+        analytics[f'data_visualizations.{name}'] = (lambda func: lambda: func(path))(
+            getattr(data_visualizations, name))
+
+    reeltracker.app.config['DATABASE'] = path
+    with reeltracker.app.test_client() as client:
+        routes = route_cases(client, scale, today, untouched_movies(path))
+        reads = {name: case for name, case in routes.items() if name.startswith('GET')}
+        writes = {name: case for name, case in routes.items() if name.startswith('POST')}
+        # Writes run last so every read sees the generated library
+        cases = {**reads, **analytics, **writes}
+        results = {name: best_cold_ms(case, repeat) for name, case in cases.items()}
+
+    get_connection_manager(path).close_all()
+    return results
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]],
+                     tolerance: float, min_delta_ms: float) -> List[Dict]:
+    """Cases slower than their baseline by more than both thresholds."""
+    regressions = []
+    for scale, cases in results.items():
+        for name, ms in cases.items():
+            baseline = baselines.get(scale, {}).get(name)
+            if baseline is not None and ms > baseline * (1 + tolerance) and ms - baseline > min_delta_ms:
+                regressions.append({'scale': int(scale), 'case': name, 'baseline_ms': baseline,
+                                    'ms': ms, 'change': f'+{(ms / baseline - 1) * 100:.0f}%'})
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.3,
+                        help='allowed slowdown as a fraction of the baseline')
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help='ignore slowdowns smaller than this, whatever the ratio')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--update-baseline', action='store_true')
+    args = parser.parse_args()
+
+    baselines = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+
+    results = {str(scale): bench_scale(scale, args.repeat) for scale in args.scales}
+
+    if args.update_baseline:
+        baselines.update(results)
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        regressions = []
+    else:
+        regressions = find_regressions(results, baselines, args.tolerance, args.min_delta_ms)
+
+    print(json.dumps({
+        'results': results,
+        'missing_baselines': [scale for scale in results if scale not in baselines],
+        'regressions': regressions
+    }, indent=2))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
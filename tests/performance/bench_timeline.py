@@ -0,0 +1,147 @@
+"""Benchmark the single-pass timeline engine against the per-view passes.
+
+For each history size, builds a synthetic library spread over a year (or
+``--years``) and times:
+
+- the previous approach, which read every view and looped over the rows
+  once per granularity, the summary and the trends, re-parsing timestamps
+  with ``strptime`` and re-sorting rows SQL had already ordered;
+- the ``TimelineAccumulator`` fed from the daily rollup in one pass;
+- the NumPy ``ArrayTimeline`` over the same rows, when NumPy is installed;
+- the whole ``get_viewing_timeline_extended`` call;
+- reading the persisted viewing streaks, and rebuilding them with the
+  gaps-and-islands query.
+
+Spreading the history over several years gives the rollup more day rows
+to bucket.
+
+Usage:
+    python tests/performance/bench_timeline.py --views 10000 100000 1000000
+    python tests/performance/bench_timeline.py --views 1000000 --years 10
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from bench_genres import best_of, build_database  # noqa: E402
+from database import get_connection_manager  # noqa: E402
+from migrations import apply_migrations  # noqa: E402
+from streak_service import rebuild_streak_state  # noqa: E402
+from time_series_service import TimelineAccumulator, TimeSeriesService  # noqa: E402
+from timeline_arrays import NUMPY_AVAILABLE, ArrayTimeline  # noqa: E402
+from viewing_rollup import get_viewing_rollup  # noqa: E402
+
+
+def legacy_passes(conn, since):
+    """Previous timeline aggregation: one loop over every view per output."""
+    views = conn.execute('''
+        SELECT vh.watched_at, m.title, m.genre, m.year, ur.rating,
+               strftime('%Y-%m-%d', vh.watched_at) AS day,
+               strftime('%Y-%m', vh.watched_at) AS month,
+               strftime('%Y-W%W', vh.watched_at) AS week,
+               strftime('%w', vh.watched_at) AS day_of_week
+        FROM viewing_history vh
+        JOIN movies m ON vh.movie_id = m.id
+        LEFT JOIN user_ratings ur ON vh.movie_id = ur.movie_id
+        WHERE vh.watched_at >= ?
+        ORDER BY vh.watched_at
+    ''', (since,)).fetchall()
+
+    series = {}
+    for key in ('day', 'week', 'month', 'day_of_week'):
+        counts, ratings = defaultdict(int), defaultdict(list)
+        for view in views:
+            counts[view[key]] += 1
+            if view['rating']:
+                ratings[view[key]].append(view['rating'])
+        series[key] = (counts, ratings)
+
+    genres = Counter()
+    for view in views:
+        if view['genre']:
+            genres.update(g.strip() for g in view['genre'].split(','))
+    dates = [datetime.strptime(view['watched_at'], '%Y-%m-%d %H:%M:%S').date() for view in views]
+    summary = (len(views), len({view['title'] for view in views}), min(dates), max(dates),
+               genres.most_common(5))
+
+    ordered = sorted(views, key=lambda view: view['watched_at'])
+    halves = ordered[:len(ordered) // 2], ordered[len(ordered) // 2:]
+    spans = [(datetime.strptime(half[-1]['watched_at'], '%Y-%m-%d %H:%M:%S') -
+              datetime.strptime(half[0]['watched_at'], '%Y-%m-%d %H:%M:%S')).days for half in halves]
+    return series, summary, spans
+
+
+def single_pass(conn, since):
+    """Daily rollup rows fed through the accumulator."""
+    return single_pass_rows(get_viewing_rollup(conn, since, 'day'))
+
+
+def single_pass_rows(rows):
+    """Accumulator pass over already fetched rollup rows."""
+    timeline = TimelineAccumulator()
+    for row in rows:
+        timeline.add(*row)
+    return timeline
+
+
+def bench_size(movies: int, views: int, years: int, repeat: int) -> dict:
+    """Build one synthetic history and time every path against it."""
+    path = os.path.join(tempfile.mkdtemp(), f'timeline_{views}.db')
+    start = time.perf_counter()
+    build_database(path, movies, views)
+    conn = sqlite3.connect(path)
+    conn.execute("UPDATE viewing_history SET watched_at = datetime(watched_at, '-' || (id % ?) || ' years')",
+                 (years,))
+    conn.commit()
+    apply_migrations(conn)
+    conn.close()
+    build_s = round(time.perf_counter() - start, 1)
+
+    days = 365 * years
+    since = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+    service = TimeSeriesService(path, backend='python')
+    with get_connection_manager(path).reader() as conn:
+        results = {
+            'views': views,
+            'years': years,
+            'build_s': build_s,
+            'legacy_passes_ms': best_of(lambda: legacy_passes(conn, since), repeat),
+            'single_pass_ms': best_of(lambda: single_pass(conn, since), repeat),
+            'timeline_extended_ms': best_of(lambda: service.get_viewing_timeline_extended(days), repeat),
+            'streaks_ms': best_of(service.get_viewing_streaks, repeat),
+            'streak_rebuild_ms': best_of(lambda: rebuild_streak_state(conn), repeat),
+        }
+        if NUMPY_AVAILABLE:
+            rows = get_viewing_rollup(conn, since, 'day')
+            array_service = TimeSeriesService(path, backend='numpy')
+            results['array_bucketing_ms'] = best_of(lambda: ArrayTimeline(rows), repeat)
+            results['python_bucketing_ms'] = best_of(lambda: single_pass_rows(rows), repeat)
+            results['array_timeline_extended_ms'] = best_of(
+                lambda: array_service.get_viewing_timeline_extended(days), repeat)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--movies', type=int, default=5000)
+    parser.add_argument('--views', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = [bench_size(args.movies, views, args.years, args.repeat) for views in args.views]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,219 @@
+"""Local stand-in for the TMDB API, for load tests.
+
+Answers the endpoints ``TMDBService`` calls (search, movie details with
+credits, popular, genre list and configuration) with deterministic
+synthetic data. Every response waits ``latency_ms`` plus up to
+``jitter_ms``; a ``error_429`` fraction of requests get 429 with a
+``Retry-After`` header and a ``error_5xx`` fraction get 500, 502 or 503,
+so callers' retries, rate limiting and stale fallbacks can be watched
+under load. ``stats()`` counts requests per endpoint and status.
+
+Point the app at it with ``TMDB_BASE_URL=http://127.0.0.1:<port>/3``.
+
+Usage:
+    python tests/performance/fake_tmdb.py --port 8765 --latency-ms 300 --error-429 0.05 --error-5xx 0.02
+"""
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+GENRES = {28: 'Action', 12: 'Adventure', 16: 'Animation', 35: 'Comedy', 80: 'Crime',
+          99: 'Documentary', 18: 'Drama', 10751: 'Family', 14: 'Fantasy', 36: 'History',
+          27: 'Horror', 10402: 'Music', 9648: 'Mystery', 10749: 'Romance',
+          878: 'Science Fiction', 10770: 'TV Movie', 53: 'Thriller', 10752: 'War', 37: 'Western'}
+
+_MOVIE_PATH = re.compile(r'^/3/movie/(\d+)$')
+
+
+def _summary(movie_id: int, title: str) -> Dict[str, Any]:
+    """Search/popular result for a movie id."""
+    rng = random.Random(movie_id)
+    return {
+        'id': movie_id,
+        'title': title,
+        'release_date': f'{rng.randint(1950, 2025)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}',
+        'genre_ids': rng.sample(sorted(GENRES), rng.randint(1, 3)),
+        'overview': f'Synthetic overview for {title}.',
+        'poster_path': f'/poster{movie_id}.jpg',
+        'vote_average': round(rng.uniform(3.0, 9.5), 1),
+    }
+
+
+def _details(movie_id: int) -> Dict[str, Any]:
+    """Movie details with ``append_to_response=credits``."""
+    movie = _summary(movie_id, f'Fake Movie {movie_id}')
+    rng = random.Random(-movie_id)
+    movie.update({
+        'genres': [{'id': genre_id, 'name': GENRES[genre_id]} for genre_id in movie.pop('genre_ids')],
+        'runtime': rng.randint(80, 180),
+        'imdb_id': f'tt{movie_id:08d}',
+        'tagline': '',
+        'credits': {
+            'cast': [{'name': f'Actor {rng.randint(1, 5000)}', 'character': 'Lead'}],
+            'crew': [{'name': f'Director {rng.randint(1, 500)}', 'job': 'Director'}],
+        },
+    })
+    return movie
+
+
+class FakeTMDBHandler(BaseHTTPRequestHandler):
+    """Routes TMDB v3 paths to synthetic responses."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        server: FakeTMDBServer = self.server
+
+        time.sleep(server.next_delay())
+        failure = server.next_failure()
+        if failure is not None:
+            status, body = failure, {'status_code': 25 if failure == 429 else 11,
+                                     'status_message': 'Injected failure'}
+        else:
+            status, body = self.respond(url.path, params)
+        server.record(url.path, status)
+
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        if status == 429:
+            self.send_header('Retry-After', str(server.retry_after))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, Dict[str, Any]]:
+        """Status and body for a successful request."""
+        if path == '/3/configuration':
+            base_url = f'http://{self.server.server_address[0]}:{self.server.server_port}/t/p'
+            return 200, {'images': {'base_url': base_url, 'secure_base_url': base_url}}
+
+        if path == '/3/genre/movie/list':
+            return 200, {'genres': [{'id': genre_id, 'name': name} for genre_id, name in GENRES.items()]}
+
+        if path == '/3/search/movie':
+            query = params.get('query', '')
+            first_id = 100000 + zlib.crc32(query.lower().encode()) % 800000
+            results = [_summary(first_id + i, f'{query.title()} {i + 1}') for i in range(20)]
+            return 200, {'page': int(params.get('page', 1)), 'results': results,
+                         'total_results': 20, 'total_pages': 1}
+
+        if path == '/3/movie/popular':
+            page = int(params.get('page', 1))
+            results = [_summary(page * 100 + i, f'Popular Movie {page * 100 + i}') for i in range(20)]
+            return 200, {'page': page, 'results': results, 'total_results': 10000, 'total_pages': 500}
+
+        match = _MOVIE_PATH.match(path)
+        if match and int(match.group(1)) > 0:
+            return 200, _details(int(match.group(1)))
+
+        return 404, {'status_code': 34, 'status_message': 'The resource you requested could not be found.'}
+
+
+class FakeTMDBServer(ThreadingHTTPServer):
+    """Threaded fake TMDB with configurable latency and failure injection."""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency_ms: float = 0.0,
+                 jitter_ms: float = 0.0, error_429: float = 0.0, error_5xx: float = 0.0,
+                 retry_after: int = 1, seed: Optional[int] = None):
+        super().__init__((host, port), FakeTMDBHandler)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_429 = error_429
+        self.error_5xx = error_5xx
+        self.retry_after = retry_after
+
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts: Counter = Counter()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for ``TMDB_BASE_URL``."""
+        return f'http://{self.server_address[0]}:{self.server_port}/3'
+
+    def next_delay(self) -> float:
+        """Seconds to wait before answering."""
+        with self._lock:
+            return (self.latency_ms + self._rng.uniform(0, self.jitter_ms)) / 1000
+
+    def next_failure(self) -> Optional[int]:
+        """Injected status for this request, or None to answer normally."""
+        with self._lock:
+            draw = self._rng.random()
+            if draw < self.error_429:
+                return 429
+            if draw < self.error_429 + self.error_5xx:
+                return self._rng.choice([500, 502, 503])
+            return None
+
+    def record(self, path: str, status: int) -> None:
+        """Count one answered request under its endpoint and status."""
+        endpoint = _MOVIE_PATH.sub('/3/movie/{id}', path)
+        with self._lock:
+            self._counts[(endpoint, status)] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Requests served, overall and per endpoint, by status code."""
+        with self._lock:
+            counts = dict(self._counts)
+        by_status: Counter = Counter()
+        by_endpoint: Dict[str, Dict[str, int]] = {}
+        for (endpoint, status), count in sorted(counts.items()):
+            by_status[str(status)] += count
+            by_endpoint.setdefault(endpoint, {})[str(status)] = count
+        return {'requests': sum(counts.values()), 'by_status': dict(by_status), 'by_endpoint': by_endpoint}
+
+    def start(self) -> 'FakeTMDBServer':
+        """Serve from a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=float, default=0.0)
+    parser.add_argument('--jitter-ms', type=float, default=0.0)
+    parser.add_argument('--error-429', type=float, default=0.0, help='fraction of requests answered 429')
+    parser.add_argument('--error-5xx', type=float, default=0.0, help='fraction of requests answered 5xx')
+    parser.add_argument('--retry-after', type=int, default=1)
+    args = parser.parse_args()
+
+    server = FakeTMDBServer(args.host, args.port, args.latency_ms, args.jitter_ms,
+                            args.error_429, args.error_5xx, args.retry_after)
+    print(f'Fake TMDB at {server.base_url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print(json.dumps(server.stats(), indent=2))
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
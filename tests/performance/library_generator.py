@@ -0,0 +1,134 @@
+"""Deterministic synthetic libraries for ReelTracker benchmarks.
+
+``generate_library`` writes movies, ratings, watchlist entries and viewing
+history into a new database, then applies the schema migrations so the
+genre tables, search index, rollups, streaks and stats aggregates are built
+once in bulk instead of row by row through their triggers.
+
+The same seed and end date always produce the same library. Timestamps are
+spread over the ``years`` before ``end``, which defaults to today so the
+app's "last N days" windows have data; pass ``--end`` to pin it.
+
+Usage:
+    python tests/performance/library_generator.py library.db --movies 100000
+    python tests/performance/library_generator.py library.db --movies 1000000 --views 1000000 --end 2026-01-01
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import time
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, Optional, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from migrations import add_movie_imdb_rating, apply_migrations, create_base_tables  # noqa: E402
+
+GENRES = ['Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama',
+          'Family', 'Fantasy', 'History', 'Horror', 'Music', 'Mystery', 'Romance',
+          'Science Fiction', 'TV Movie', 'Thriller', 'War', 'Western']
+
+TITLE_WORDS = ['Silent', 'Crimson', 'Last', 'Hidden', 'Broken', 'Golden', 'Midnight', 'Lost',
+               'River', 'Empire', 'Garden', 'Winter', 'Shadow', 'Harbor', 'Signal', 'Stranger',
+               'Machine', 'Summer', 'Station', 'Kingdom', 'Echo', 'Orchard', 'Voyage', 'Frontier']
+
+PLOT_WORDS = ['a', 'detective', 'family', 'journey', 'across', 'city', 'secret', 'war', 'love',
+              'returns', 'home', 'after', 'years', 'discovers', 'truth', 'about', 'the', 'past',
+              'small', 'town', 'band', 'of', 'outsiders', 'must', 'survive', 'one', 'night']
+
+
+def _timestamps(rng: random.Random, end: datetime, years: int) -> Iterator[str]:
+    """Endless uniformly spread ``YYYY-MM-DD HH:MM:SS`` strings before ``end``."""
+    span = years * 365 * 86400
+    while True:
+        yield (end - timedelta(seconds=rng.randrange(span))).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def _movie_rows(rng: random.Random, movies: int) -> Iterator[Tuple]:
+    """Movie rows with a searchable title, 1-3 genres and an IMDb rating."""
+    directors = max(movies // 20, 1)
+    for movie_id in range(1, movies + 1):
+        title = ' '.join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+        yield (
+            movie_id,
+            f'{title} {movie_id}',
+            rng.randint(1950, 2025),
+            f'Director {rng.randint(1, directors)}',
+            ', '.join(rng.sample(GENRES, rng.randint(1, 3))),
+            ' '.join(rng.choice(PLOT_WORDS) for _ in range(12)).capitalize() + '.',
+            f'tt{movie_id:08d}',
+            round(rng.uniform(3.0, 9.5), 1)
+        )
+
+
+def generate_library(path: str, movies: int, ratings: Optional[int] = None,
+                     views: Optional[int] = None, watchlist: Optional[int] = None,
+                     years: int = 1, seed: int = 42, end: Optional[date] = None) -> Dict[str, int]:
+    """Write a synthetic library to a new database at ``path``.
+
+    Defaults scale with ``movies``: 60% rated, 10% on the watchlist and one
+    view per movie. Returns the row counts written.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(path)
+
+    ratings = int(movies * 0.6) if ratings is None else min(ratings, movies)
+    views = movies if views is None else views
+    watchlist = int(movies * 0.1) if watchlist is None else min(watchlist, movies)
+    end_time = datetime.combine(end or date.today(), datetime.min.time())
+    rng = random.Random(seed)
+    stamps = _timestamps(rng, end_time, years)
+
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    create_base_tables(conn)
+    add_movie_imdb_rating(conn)
+
+    conn.executemany('''
+        INSERT INTO movies (id, title, year, director, genre, plot, imdb_id, imdb_rating)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ''', _movie_rows(rng, movies))
+    conn.executemany('INSERT INTO user_ratings (movie_id, rating, rated_at) VALUES (?, ?, ?)', (
+        (movie_id, rng.randint(1, 10), next(stamps))
+        for movie_id in sorted(rng.sample(range(1, movies + 1), ratings))
+    ))
+    conn.executemany('INSERT INTO watchlist (movie_id, priority, added_at) VALUES (?, ?, ?)', (
+        (movie_id, rng.randint(0, 2), next(stamps))
+        for movie_id in sorted(rng.sample(range(1, movies + 1), watchlist))
+    ))
+    conn.executemany('INSERT INTO viewing_history (movie_id, watched_at) VALUES (?, ?)', (
+        (rng.randint(1, movies), next(stamps)) for _ in range(views)
+    ))
+    conn.commit()
+
+    # Backfills every derived table from the rows above
+    apply_migrations(conn)
+    conn.close()
+    return {'movies': movies, 'ratings': ratings, 'watchlist': watchlist, 'views': views}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('path')
+    parser.add_argument('--movies', type=int, default=1000)
+    parser.add_argument('--ratings', type=int)
+    parser.add_argument('--views', type=int)
+    parser.add_argument('--watchlist', type=int)
+    parser.add_argument('--years', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--end', type=date.fromisoformat)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = generate_library(args.path, args.movies, args.ratings, args.views, args.watchlist,
+                              args.years, args.seed, args.end)
+    print(json.dumps(dict(counts, build_s=round(time.perf_counter() - start, 1)), indent=2))
+
+
+if __name__ == '__main__':
+    main()
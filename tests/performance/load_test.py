@@ -0,0 +1,239 @@
+"""Load test ReelTracker under a multi-worker server against a fake TMDB.
+
+Starts the bundled fake TMDB (``fake_tmdb.py``) with the requested latency
+and 429/5xx injection, generates a library (``library_generator.py``), and
+serves the app from ``--workers`` processes sharing one listening socket,
+each a threaded Werkzeug server, with ``TMDB_BASE_URL`` pointed at the
+fake. ``--concurrency`` client threads then send a weighted mix of:
+
+- ``search``: TMDB search (``/search?q=...``) over ``--queries`` terms, so
+  some repeat and hit the TMDB caches;
+- ``detail``: details of a TMDB movie not in the library;
+- ``rate`` and ``watched``: writes against library movies;
+- ``stats``: ``/api/stats`` polling.
+
+Reports requests, errors, throughput and p50/p95/p99/max latency per route,
+plus what the fake TMDB served. Other TMDB_* variables (rate limit,
+retries, timeout, cache settings) pass through to the workers.
+
+Usage:
+    python tests/performance/load_test.py --duration 30 --concurrency 32 --workers 4
+    python tests/performance/load_test.py --tmdb-latency-ms 800 --tmdb-429 0.1 --tmdb-5xx 0.05
+    python tests/performance/load_test.py --mix search=50,detail=50
+"""
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import date
+from typing import Dict, List, Tuple
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from fake_tmdb import FakeTMDBServer  # noqa: E402
+from library_generator import TITLE_WORDS, generate_library  # noqa: E402
+
+DEFAULT_MIX = 'search=30,detail=30,rate=10,watched=10,stats=20'
+ROUTES = [part.split('=')[0] for part in DEFAULT_MIX.split(',')]
+
+# TMDB ids the fake knows but the generated library does not
+TMDB_ONLY_IDS = 5000000
+
+
+def _serve_worker(fd: int, host: str, port: int, db_path: str) -> None:
+    """Worker process: a threaded Werkzeug server on the inherited socket."""
+    from werkzeug.serving import make_server
+
+    import app as reeltracker
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    reeltracker.app.config['DATABASE'] = db_path
+    make_server(host, port, reeltracker.app, threaded=True, fd=fd).serve_forever()
+
+
+def start_workers(workers: int, db_path: str) -> Tuple[List[multiprocessing.Process], str]:
+    """Bind one socket and fork ``workers`` servers accepting on it."""
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(1024)
+    host, port = listener.getsockname()
+
+    context = multiprocessing.get_context('fork')
+    processes = [context.Process(target=_serve_worker, args=(listener.fileno(), host, port, db_path),
+                                 daemon=True) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    listener.close()
+    return processes, f'http://{host}:{port}'
+
+
+def wait_until_ready(base_url: str, timeout: float = 30.0) -> None:
+    """Poll ``/api/stats`` until a worker answers."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f'{base_url}/api/stats', timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f'app did not start at {base_url}')
+
+
+def parse_mix(mix: str) -> Dict[str, float]:
+    """``search=30,detail=30`` -> route weights."""
+    weights = {}
+    for part in mix.split(','):
+        name, _, weight = part.partition('=')
+        weights[name.strip()] = float(weight)
+    unknown = set(weights) - set(ROUTES)
+    if unknown:
+        raise ValueError(f'unknown routes in --mix: {sorted(unknown)}')
+    return weights
+
+
+def build_request(route: str, rng: random.Random, queries: List[str], movies: int,
+                  tmdb_movies: int) -> Tuple[str, str, Dict]:
+    """Method, path and form data for one request on a route."""
+    if route == 'search':
+        return 'GET', f'/search?q={rng.choice(queries)}', None
+    if route == 'detail':
+        return 'GET', f'/movie/{TMDB_ONLY_IDS + rng.randrange(tmdb_movies)}?source=tmdb', None
+    if route == 'rate':
+        return 'POST', f'/movie/{rng.randint(1, movies)}/rate', {'rating': str(rng.randint(1, 10))}
+    if route == 'watched':
+        return 'POST', f'/movie/{rng.randint(1, movies)}/watched', {}
+    return 'GET', '/api/stats', None
+
+
+def run_clients(base_url: str, args, weights: Dict[str, float]) -> Tuple[Dict[str, List], float]:
+    """Send the mix from ``args.concurrency`` threads for ``args.duration`` seconds.
+
+    Returns ``route -> [(latency_ms, ok), ...]`` and the elapsed seconds.
+    """
+    words = random.Random(args.seed)
+    queries = ['+'.join(words.sample(TITLE_WORDS, 2)) for _ in range(args.queries)]
+    routes, route_weights = list(weights), list(weights.values())
+    samples: Dict[str, List] = defaultdict(list)
+    samples_lock = threading.Lock()
+    start = time.monotonic()
+    deadline = start + args.duration
+
+    def client(index: int) -> None:
+        rng = random.Random(args.seed * 1000 + index)
+        session = requests.Session()
+        local = defaultdict(list)
+        while time.monotonic() < deadline:
+            route = rng.choices(routes, route_weights)[0]
+            method, path, data = build_request(route, rng, queries, args.movies, args.tmdb_movies)
+            began = time.perf_counter()
+            try:
+                response = session.request(method, base_url + path, data=data, timeout=args.timeout)
+                ok = response.status_code < 400
+            except requests.RequestException:
+                ok = False
+            local[route].append(((time.perf_counter() - began) * 1000, ok))
+        session.close()
+        with samples_lock:
+            for route, results in local.items():
+                samples[route].extend(results)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.monotonic() - start
+
+
+def percentile(ordered: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return round(ordered[index], 1)
+
+
+def summarize(samples: List[Tuple[float, bool]], elapsed: float) -> Dict[str, float]:
+    """Request count, errors, throughput and latency percentiles for one route."""
+    latencies = sorted(latency for latency, _ in samples)
+    return {
+        'requests': len(samples),
+        'errors': sum(1 for _, ok in samples if not ok),
+        'throughput_rps': round(len(samples) / elapsed, 1),
+        'p50_ms': percentile(latencies, 0.50),
+        'p95_ms': percentile(latencies, 0.95),
+        'p99_ms': percentile(latencies, 0.99),
+        'max_ms': round(latencies[-1], 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds of traffic')
+    parser.add_argument('--concurrency', type=int, default=16, help='client threads')
+    parser.add_argument('--workers', type=int, default=4, help='app worker processes')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help='route weights')
+    parser.add_argument('--movies', type=int, default=10000, help='library size')
+    parser.add_argument('--queries', type=int, default=200, help='distinct search terms')
+    parser.add_argument('--tmdb-movies', type=int, default=5000, help='distinct TMDB-only detail ids')
+    parser.add_argument('--tmdb-latency-ms', type=float, default=150.0)
+    parser.add_argument('--tmdb-jitter-ms', type=float, default=100.0)
+    parser.add_argument('--tmdb-429', type=float, default=0.0, help='fraction of TMDB requests answered 429')
+    parser.add_argument('--tmdb-5xx', type=float, default=0.0, help='fraction of TMDB requests answered 5xx')
+    parser.add_argument('--tmdb-retry-after', type=int, default=1)
+    parser.add_argument('--timeout', type=float, default=30.0, help='client timeout in seconds')
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'load.db')
+    generate_library(db_path, args.movies, end=date.today())
+
+    tmdb = FakeTMDBServer(latency_ms=args.tmdb_latency_ms, jitter_ms=args.tmdb_jitter_ms,
+                          error_429=args.tmdb_429, error_5xx=args.tmdb_5xx,
+                          retry_after=args.tmdb_retry_after, seed=args.seed).start()
+    os.environ['TMDB_BASE_URL'] = tmdb.base_url
+    os.environ['TMDB_API_KEY'] = 'load-test'
+    os.environ.pop('TMDB_ACCESS_TOKEN', None)
+    # Fresh disk cache shared by the workers, unless the caller chose one
+    os.environ.setdefault('TMDB_CACHE_PATH', os.path.join(workdir, 'tmdb_cache.db'))
+
+    processes, base_url = start_workers(args.workers, db_path)
+    try:
+        wait_until_ready(base_url)
+        samples, elapsed = run_clients(base_url, args, weights)
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join(timeout=5)
+        tmdb.stop()
+
+    total = sum(len(results) for results in samples.values())
+    print(json.dumps({
+        'config': {name: getattr(args, name) for name in (
+            'duration', 'concurrency', 'workers', 'mix', 'movies', 'tmdb_latency_ms',
+            'tmdb_jitter_ms', 'tmdb_429', 'tmdb_5xx')},
+        'elapsed_s': round(elapsed, 1),
+        'total': {'requests': total, 'throughput_rps': round(total / elapsed, 1)},
+        'routes': {route: summarize(samples[route], elapsed) for route in weights if samples.get(route)},
+        'tmdb': tmdb.stats(),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
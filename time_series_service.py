@@ -4,13 +4,23 @@ Provides comprehensive time series data for viewing patterns, habits analysis,
 and trend visualization with multiple time granularities.
 """
 
+import os
 import sqlite3
 import json
-from datetime import datetime, timedelta
+from bisect import bisect_right
+from datetime import date, datetime, timedelta
 from collections import defaultdict, Counter
 from typing import Dict, List, Any, Optional, Tuple
 from dataclasses import dataclass
 
+from database import get_connection_manager
+from result_memo import memoize
+from streak_service import get_viewing_streaks
+from timeline_arrays import NUMPY_AVAILABLE, ArrayTimeline
+from viewing_rollup import get_monthly_genre_rollup, get_viewing_rollup
+
+DAY_NAMES = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+
 
 @dataclass
 class ViewingTrend:
@@ -22,214 +32,232 @@ class ViewingTrend:
     date: datetime
 
 
+class TimelineAccumulator:
+    """Single-pass aggregation of daily rollup rows.
+    
+    Each ``add`` parses the day once and updates the weekly, monthly and
+    day-of-week buckets, the overall totals and a running prefix used to
+    split the range into halves. Rows must arrive in day order.
+    """
+    
+    def __init__(self):
+        self.days: List[Tuple[str, int, Optional[float]]] = []
+        self.weeks: Dict[str, List] = {}
+        self.months: Dict[str, List] = {}
+        self.weekdays = [[0, 0.0, 0] for _ in range(7)]
+        self.total_views = 0
+        self.rating_sum = 0.0
+        self.rating_count = 0
+        self.first_day: Optional[date] = None
+        self.last_day: Optional[date] = None
+        
+        # Running view and rating totals before each day, for splitting by position
+        self._views_before: List[int] = []
+        self._prefix: List[Tuple[str, float, int]] = []
+    
+    def add(self, day: str, views: int, rating_sum: float, rating_count: int) -> None:
+        """Feed one ``(day, views, rating_sum, rating_count)`` rollup row."""
+        parsed = date.fromisoformat(day)
+        if self.first_day is None:
+            self.first_day = parsed
+        self.last_day = parsed
+        
+        self._views_before.append(self.total_views)
+        self._prefix.append((day, self.rating_sum, self.rating_count))
+        self.days.append((day, views, _average(rating_sum, rating_count)))
+        
+        # Same keys as the SQL rollup periods: %W weeks and Sunday-first weekdays
+        for bucket in (self.weeks.setdefault(parsed.strftime('%Y-W%W'), [0, 0.0, 0]),
+                       self.months.setdefault(day[:7], [0, 0.0, 0]),
+                       self.weekdays[(parsed.weekday() + 1) % 7]):
+            bucket[0] += views
+            bucket[1] += rating_sum
+            bucket[2] += rating_count
+        
+        self.total_views += views
+        self.rating_sum += rating_sum
+        self.rating_count += rating_count
+    
+    def locate_view(self, position: int) -> Tuple[str, int, float, int]:
+        """Find the day holding the view at a 0-based position in time order.
+        
+        Returns the day and the view count, rating sum and rating count of
+        every day before it.
+        """
+        index = bisect_right(self._views_before, position) - 1
+        day, rating_sum, rating_count = self._prefix[index]
+        return day, self._views_before[index], rating_sum, rating_count
+
+
+def _average(rating_sum: float, rating_count: int) -> Optional[float]:
+    """Average rating of a rollup bucket, or None when nothing was rated."""
+    return round(rating_sum / rating_count, 1) if rating_count else None
+
+
 class TimeSeriesService:
     """Service for time series analysis of viewing habits."""
     
-    def __init__(self, db_path: str = 'reeltracker.db'):
+    def __init__(self, db_path: str = 'reeltracker.db', backend: Optional[str] = None):
         self.db_path = db_path
+        
+        # 'numpy' buckets with array operations; needs NumPy installed
+        self.backend = backend or os.environ.get('TIMESERIES_BACKEND', 'python')
+        if self.backend == 'numpy' and not NUMPY_AVAILABLE:
+            print("Note: NumPy not installed. Using the pure-Python time series backend.")
+            self.backend = 'python'
     
+    @memoize
     def get_viewing_timeline_extended(self, days: int = 365) -> Dict[str, Any]:
         """Get extended viewing timeline with multiple granularities."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
         cutoff_date = datetime.now() - timedelta(days=days)
-        
-        # Get detailed viewing data
-        views = conn.execute("""
-            SELECT 
-                vh.watched_at,
-                m.title,
-                m.genre,
-                m.year,
-                ur.rating,
-                strftime('%Y-%m-%d', vh.watched_at) as day,
-                strftime('%Y-%m', vh.watched_at) as month,
-                strftime('%Y-W%W', vh.watched_at) as week,
-                strftime('%w', vh.watched_at) as day_of_week
-            FROM viewing_history vh
-            JOIN movies m ON vh.movie_id = m.id
-            LEFT JOIN user_ratings ur ON vh.movie_id = ur.movie_id
-            WHERE vh.watched_at >= ?
-            ORDER BY vh.watched_at
-        """, (cutoff_date.strftime('%Y-%m-%d %H:%M:%S'),)).fetchall()
-        
-        conn.close()
-        
-        if not views:
-            return self._empty_timeline_response()
-        
-        # Process data for different time granularities
-        daily_data = self._process_daily_data(views, cutoff_date, days)
-        weekly_data = self._process_weekly_data(views)
-        monthly_data = self._process_monthly_data(views)
-        day_of_week_data = self._process_day_of_week_data(views)
+        since_day = cutoff_date.strftime('%Y-%m-%d')
+        
+        # Every series is built in one pass over the daily rollup; only the
+        # summary facets and the trend split read individual views
+        with get_connection_manager(self.db_path).reader() as conn:
+            timeline = self._build_timeline(get_viewing_rollup(conn, since_day, 'day'))
+            if not timeline.days:
+                return self._empty_timeline_response()
+            
+            genre_counts = get_monthly_genre_rollup(conn, since_day)
+            
+            # Without the hint DISTINCT walks the whole (movie_id, day) index
+            # to skip a sort, reading every view instead of the window's
+            movie_facets = conn.execute("""
+                SELECT COUNT(*) AS unique_movies,
+                       MIN(m.year) AS min_year,
+                       MAX(m.year) AS max_year
+                FROM (SELECT DISTINCT movie_id FROM viewing_history INDEXED BY idx_viewing_day_movie
+                      WHERE day >= ?) v
+                LEFT JOIN movies m ON m.id = v.movie_id
+            """, (since_day,)).fetchone()
+            
+            halves = self._fetch_trend_halves(conn, since_day, timeline)
         
         return {
-            'daily': daily_data,
-            'weekly': weekly_data,
-            'monthly': monthly_data,
-            'day_patterns': day_of_week_data,
-            'summary': self._generate_viewing_summary(views),
-            'trends': self._analyze_trends(views)
+            'daily': self._process_daily_data(timeline, cutoff_date),
+            'weekly': self._process_weekly_data(timeline),
+            'monthly': self._process_monthly_data(timeline, genre_counts),
+            'day_patterns': self._process_day_of_week_data(timeline),
+            'summary': self._generate_viewing_summary(timeline, movie_facets, genre_counts),
+            'trends': self._analyze_trends(halves)
         }
     
-    def _process_daily_data(self, views: List, cutoff_date: datetime, days: int) -> Dict[str, Any]:
-        """Process daily viewing data."""
-        daily_counts = defaultdict(int)
-        daily_ratings = defaultdict(list)
-        daily_genres = defaultdict(list)
+    def _build_timeline(self, daily_rows: List[Tuple]):
+        """Bucket daily rollup rows with the configured backend."""
+        if self.backend == 'numpy':
+            return ArrayTimeline(daily_rows)
+        
+        timeline = TimelineAccumulator()
+        for row in daily_rows:
+            timeline.add(*row)
+        return timeline
+    
+    def _process_daily_data(self, timeline: TimelineAccumulator, cutoff_date: datetime) -> Dict[str, Any]:
+        """Process daily viewing data, filling days without views with zero."""
+        labels, counts, ratings = [], [], []
+        next_row = iter(timeline.days)
+        row = next(next_row, None)
         
-        # Initialize all days with zero
         current_date = cutoff_date.date()
         end_date = datetime.now().date()
         
         while current_date <= end_date:
-            daily_counts[current_date.strftime('%Y-%m-%d')] = 0
+            day = current_date.isoformat()
+            labels.append(current_date.strftime('%m/%d'))
+            if row is not None and row[0] == day:
+                counts.append(row[1])
+                ratings.append(row[2])
+                row = next(next_row, None)
+            else:
+                counts.append(0)
+                ratings.append(None)
             current_date += timedelta(days=1)
         
-        # Add actual data
-        for view in views:
-            day = view['day']
-            daily_counts[day] += 1
-            
-            if view['rating']:
-                daily_ratings[day].append(view['rating'])
-            
-            if view['genre']:
-                daily_genres[day].extend([g.strip() for g in view['genre'].split(',')])
-        
-        # Format for charts
-        sorted_dates = sorted(daily_counts.keys())
+        # Views stamped after today still count, as their own days
+        while row is not None:
+            labels.append(date.fromisoformat(row[0]).strftime('%m/%d'))
+            counts.append(row[1])
+            ratings.append(row[2])
+            row = next(next_row, None)
         
         return {
-            'labels': [datetime.strptime(date, '%Y-%m-%d').strftime('%m/%d') for date in sorted_dates],
-            'counts': [daily_counts[date] for date in sorted_dates],
-            'ratings': [
-                round(sum(daily_ratings[date]) / len(daily_ratings[date]), 1) 
-                if daily_ratings[date] else None 
-                for date in sorted_dates
-            ],
-            'total': sum(daily_counts.values()),
-            'max_day': max(daily_counts.values()) if daily_counts else 0
+            'labels': labels,
+            'counts': counts,
+            'ratings': ratings,
+            'total': sum(counts),
+            'max_day': max(counts) if counts else 0
         }
     
-    def _process_weekly_data(self, views: List) -> Dict[str, Any]:
+    def _process_weekly_data(self, timeline: TimelineAccumulator) -> Dict[str, Any]:
         """Process weekly viewing patterns."""
-        weekly_counts = defaultdict(int)
-        weekly_ratings = defaultdict(list)
-        
-        for view in views:
-            week = view['week']
-            weekly_counts[week] += 1
-            
-            if view['rating']:
-                weekly_ratings[week].append(view['rating'])
-        
-        sorted_weeks = sorted(weekly_counts.keys())
-        
+        weeks = timeline.weeks.items()
         return {
-            'labels': [f"Week {week.split('-W')[1]}" for week in sorted_weeks],
-            'counts': [weekly_counts[week] for week in sorted_weeks],
-            'ratings': [
-                round(sum(weekly_ratings[week]) / len(weekly_ratings[week]), 1)
-                if weekly_ratings[week] else None
-                for week in sorted_weeks
-            ],
-            'total': sum(weekly_counts.values())
+            'labels': [f"Week {week.split('-W')[1]}" for week, _ in weeks],
+            'counts': [bucket[0] for _, bucket in weeks],
+            'ratings': [_average(bucket[1], bucket[2]) for _, bucket in weeks],
+            'total': timeline.total_views
         }
     
-    def _process_monthly_data(self, views: List) -> Dict[str, Any]:
+    def _process_monthly_data(self, timeline: TimelineAccumulator,
+                              genre_counts: List[Tuple[str, str, int]]) -> Dict[str, Any]:
         """Process monthly viewing patterns."""
-        monthly_counts = defaultdict(int)
-        monthly_ratings = defaultdict(list)
         monthly_genres = defaultdict(list)
         
-        for view in views:
-            month = view['month']
-            monthly_counts[month] += 1
-            
-            if view['rating']:
-                monthly_ratings[month].append(view['rating'])
-            
-            if view['genre']:
-                monthly_genres[month].extend([g.strip() for g in view['genre'].split(',')])
-        
-        sorted_months = sorted(monthly_counts.keys())
+        # Rows arrive ordered by count within each month
+        for month, genre, count in genre_counts:
+            if len(monthly_genres[month]) < 3:
+                monthly_genres[month].append((genre, count))
         
+        months = timeline.months.items()
         return {
-            'labels': [datetime.strptime(month, '%Y-%m').strftime('%b %Y') for month in sorted_months],
-            'counts': [monthly_counts[month] for month in sorted_months],
-            'ratings': [
-                round(sum(monthly_ratings[month]) / len(monthly_ratings[month]), 1)
-                if monthly_ratings[month] else None
-                for month in sorted_months
-            ],
-            'genres': [
-                Counter(monthly_genres[month]).most_common(3) if monthly_genres[month] else []
-                for month in sorted_months
-            ],
-            'total': sum(monthly_counts.values())
+            'labels': [date(int(month[:4]), int(month[5:7]), 1).strftime('%b %Y') for month, _ in months],
+            'counts': [bucket[0] for _, bucket in months],
+            'ratings': [_average(bucket[1], bucket[2]) for _, bucket in months],
+            'genres': [monthly_genres[month] for month, _ in months],
+            'total': timeline.total_views
         }
     
-    def _process_day_of_week_data(self, views: List) -> Dict[str, Any]:
+    def _process_day_of_week_data(self, timeline: TimelineAccumulator) -> Dict[str, Any]:
         """Analyze viewing patterns by day of week."""
-        day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
-        day_counts = [0] * 7
-        day_ratings = [[] for _ in range(7)]
-        
-        for view in views:
-            day_num = int(view['day_of_week'])
-            day_counts[day_num] += 1
-            
-            if view['rating']:
-                day_ratings[day_num].append(view['rating'])
-        
         return {
-            'labels': day_names,
-            'counts': day_counts,
-            'ratings': [
-                round(sum(ratings) / len(ratings), 1) if ratings else None
-                for ratings in day_ratings
-            ],
-            'total': sum(day_counts)
+            'labels': DAY_NAMES,
+            'counts': [bucket[0] for bucket in timeline.weekdays],
+            'ratings': [_average(bucket[1], bucket[2]) for bucket in timeline.weekdays],
+            'total': timeline.total_views
         }
     
-    def _generate_viewing_summary(self, views: List) -> Dict[str, Any]:
+    def _generate_viewing_summary(self, timeline: TimelineAccumulator, movie_facets: sqlite3.Row,
+                                  genre_counts: List[Tuple[str, str, int]]) -> Dict[str, Any]:
         """Generate viewing habit summary statistics."""
-        if not views:
+        if not timeline.days:
             return {}
         
         # Basic stats
-        total_views = len(views)
-        unique_movies = len(set(view['title'] for view in views))
+        total_views = timeline.total_views
         
         # Rating stats
-        ratings = [view['rating'] for view in views if view['rating']]
-        avg_rating = round(sum(ratings) / len(ratings), 1) if ratings else None
+        avg_rating = _average(timeline.rating_sum, timeline.rating_count)
         
-        # Genre analysis
-        all_genres = []
-        for view in views:
-            if view['genre']:
-                all_genres.extend([g.strip() for g in view['genre'].split(',')])
+        # Genre analysis from the per-month genre counts
+        genre_totals = Counter()
+        for _, genre, count in genre_counts:
+            genre_totals[genre] += count
         
-        top_genres = Counter(all_genres).most_common(5)
+        top_genres = sorted(genre_totals.items(), key=lambda item: (-item[1], item[0]))[:5]
         
         # Year analysis
-        years = [view['year'] for view in views if view['year']]
-        year_range = (min(years), max(years)) if years else None
+        year_range = ((movie_facets['min_year'], movie_facets['max_year'])
+                      if movie_facets['min_year'] is not None else None)
         
         # Viewing frequency
-        dates = [datetime.strptime(view['watched_at'], '%Y-%m-%d %H:%M:%S').date() 
-                for view in views]
-        date_range = (min(dates), max(dates)) if dates else None
-        days_span = (date_range[1] - date_range[0]).days if date_range else 0
+        date_range = (timeline.first_day, timeline.last_day)
+        days_span = (date_range[1] - date_range[0]).days
         avg_per_week = round((total_views / days_span) * 7, 1) if days_span > 0 else 0
         
         return {
             'total_views': total_views,
-            'unique_movies': unique_movies,
+            'unique_movies': movie_facets['unique_movies'],
             'avg_rating': avg_rating,
             'top_genres': top_genres,
             'year_range': year_range,
@@ -238,37 +266,86 @@ class TimeSeriesService:
             'viewing_span_days': days_span
         }
     
-    def _analyze_trends(self, views: List) -> Dict[str, Any]:
+    def _fetch_trend_halves(self, conn: sqlite3.Connection, since_day: str,
+                            timeline: TimelineAccumulator) -> List[Dict[str, Any]]:
+        """Summarize the earlier and later halves of the views since a date.
+        
+        Returns one dict per half with its average rating, first and last
+        view time as epoch seconds and view count. The accumulator locates the day the split
+        falls in, so only that day's views are read individually.
+        """
+        total_views = timeline.total_views
+        if total_views < 2:
+            return []
+        
+        mid = total_views // 2
+        split_day, views_before, rating_sum, rating_count = timeline.locate_view(mid - 1)
+        
+        # Last view of the first half and first view of the second half
+        boundary = conn.execute("""
+            SELECT watched_at, movie_id, id, watched_epoch FROM viewing_history
+            WHERE watched_at >= ?
+            ORDER BY watched_at, movie_id, id
+            LIMIT 2 OFFSET ?
+        """, (split_day, mid - 1 - views_before)).fetchall()
+        if len(boundary) < 2:
+            return []
+        
+        # Separate subqueries so each reads one end of the watched_at index
+        first_view, last_view = conn.execute("""
+            SELECT (SELECT watched_epoch FROM viewing_history WHERE watched_at >= ?
+                    ORDER BY watched_at LIMIT 1),
+                   (SELECT watched_epoch FROM viewing_history WHERE watched_at >= ?
+                    ORDER BY watched_at DESC LIMIT 1)
+        """, (since_day, since_day)).fetchone()
+        
+        partial_sum, partial_count = conn.execute("""
+            SELECT COALESCE(SUM(ur.rating), 0), COUNT(ur.rating)
+            FROM viewing_history vh
+            LEFT JOIN user_ratings ur ON ur.movie_id = vh.movie_id
+            WHERE vh.watched_at BETWEEN ? AND ?
+              AND (vh.watched_at, vh.movie_id, vh.id) <= (?, ?, ?)
+        """, (split_day, boundary[0]['watched_at'], *boundary[0][:3])).fetchone()
+        rating_sum += partial_sum
+        rating_count += partial_count
+        
+        total_sum, total_count = timeline.rating_sum, timeline.rating_count
+        
+        return [
+            {
+                'avg_rating': rating_sum / rating_count if rating_count else None,
+                'first_view': first_view,
+                'last_view': boundary[0]['watched_epoch'],
+                'views': mid
+            },
+            {
+                'avg_rating': (total_sum - rating_sum) / (total_count - rating_count)
+                              if total_count > rating_count else None,
+                'first_view': boundary[1]['watched_epoch'],
+                'last_view': last_view,
+                'views': total_views - mid
+            }
+        ]
+    
+    def _analyze_trends(self, halves: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Analyze viewing trends and patterns."""
-        if len(views) < 2:
+        if len(halves) < 2:
             return {}
         
-        # Sort by date
-        sorted_views = sorted(views, key=lambda x: x['watched_at'])
-        
         # Calculate trends (comparing first and second half)
-        mid_point = len(sorted_views) // 2
-        first_half = sorted_views[:mid_point]
-        second_half = sorted_views[mid_point:]
+        first_half, second_half = halves
         
         # Rating trend
-        first_ratings = [v['rating'] for v in first_half if v['rating']]
-        second_ratings = [v['rating'] for v in second_half if v['rating']]
-        
         rating_trend = None
-        if first_ratings and second_ratings:
-            first_avg = sum(first_ratings) / len(first_ratings)
-            second_avg = sum(second_ratings) / len(second_ratings)
-            rating_trend = round(second_avg - first_avg, 1)
-        
-        # Viewing frequency trend
-        first_days = (datetime.strptime(first_half[-1]['watched_at'], '%Y-%m-%d %H:%M:%S') - 
-                     datetime.strptime(first_half[0]['watched_at'], '%Y-%m-%d %H:%M:%S')).days
-        second_days = (datetime.strptime(second_half[-1]['watched_at'], '%Y-%m-%d %H:%M:%S') - 
-                      datetime.strptime(second_half[0]['watched_at'], '%Y-%m-%d %H:%M:%S')).days
-        
-        first_freq = len(first_half) / max(first_days, 1)
-        second_freq = len(second_half) / max(second_days, 1)
+        if first_half['avg_rating'] is not None and second_half['avg_rating'] is not None:
+            rating_trend = round(second_half['avg_rating'] - first_half['avg_rating'], 1)
+        
+        # Viewing frequency trend; whole days between epoch seconds
+        first_days = (first_half['last_view'] - first_half['first_view']) // 86400
+        second_days = (second_half['last_view'] - second_half['first_view']) // 86400
+        
+        first_freq = first_half['views'] / max(first_days, 1)
+        second_freq = second_half['views'] / max(second_days, 1)
         frequency_trend = round(second_freq - first_freq, 2)
         
         return {
@@ -283,62 +360,17 @@ class TimeSeriesService:
             'daily': {'labels': [], 'counts': [], 'ratings': [], 'total': 0, 'max_day': 0},
             'weekly': {'labels': [], 'counts': [], 'ratings': [], 'total': 0},
             'monthly': {'labels': [], 'counts': [], 'ratings': [], 'total': 0},
-            'day_patterns': {'labels': ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday'], 
+            'day_patterns': {'labels': DAY_NAMES,
                            'counts': [0]*7, 'ratings': [None]*7, 'total': 0},
             'summary': {},
             'trends': {}
         }
     
+    @memoize
     def get_viewing_streaks(self) -> Dict[str, Any]:
         """Analyze viewing streaks and consistency."""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        
-        views = conn.execute("""
-            SELECT DISTINCT date(watched_at) as view_date
-            FROM viewing_history 
-            ORDER BY view_date
-        """).fetchall()
-        
-        conn.close()
-        
-        if not views:
-            return {'current_streak': 0, 'longest_streak': 0, 'total_days': 0}
-        
-        dates = [datetime.strptime(view['view_date'], '%Y-%m-%d').date() for view in views]
-        
-        # Calculate streaks
-        current_streak = 0
-        longest_streak = 0
-        temp_streak = 1
-        
-        today = datetime.now().date()
-        
-        # Check for current streak
-        if dates and (today - dates[-1]).days <= 1:
-            current_streak = 1
-            for i in range(len(dates) - 2, -1, -1):
-                if (dates[i + 1] - dates[i]).days == 1:
-                    current_streak += 1
-                else:
-                    break
-        
-        # Find longest streak
-        for i in range(1, len(dates)):
-            if (dates[i] - dates[i - 1]).days == 1:
-                temp_streak += 1
-                longest_streak = max(longest_streak, temp_streak)
-            else:
-                temp_streak = 1
-        
-        longest_streak = max(longest_streak, temp_streak)
-        
-        return {
-            'current_streak': current_streak,
-            'longest_streak': longest_streak,
-            'total_viewing_days': len(dates),
-            'consistency_score': round((len(dates) / ((dates[-1] - dates[0]).days + 1)) * 100, 1) if len(dates) > 1 else 0
-        }
+        with get_connection_manager(self.db_path).reader() as conn:
+            return get_viewing_streaks(conn, datetime.now().date())
 
 
 def get_time_series_service(db_path: str = 'reeltracker.db') -> TimeSeriesService:
@@ -0,0 +1,103 @@
+"""NumPy backend for ReelTracker time series bucketing.
+
+``ArrayTimeline`` loads the daily rollup as int64 epoch days with view
+counts and rating sums, then builds the weekly, monthly and day-of-week
+buckets with ``bincount`` instead of a Python loop per row. It exposes the
+same attributes as ``TimelineAccumulator`` so ``TimeSeriesService`` formats
+either one into the same chart payloads.
+
+NumPy is optional; ``NUMPY_AVAILABLE`` is False when it is not installed
+and the service keeps its pure-Python path.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
+
+def _rounded_means(sums, counts) -> List[Optional[float]]:
+    """Per-bucket average rating rounded to one place, None where nothing was rated."""
+    return [round(s / c, 1) if c else None for s, c in zip(sums.tolist(), counts.tolist())]
+
+
+class ArrayTimeline:
+    """Array-backed counterpart of ``TimelineAccumulator``."""
+
+    def __init__(self, rows: Sequence[Tuple[str, int, float, int]]):
+        """Bucket ``(day, views, rating_sum, rating_count)`` rollup rows in day order."""
+        self.days: List[Tuple[str, int, Optional[float]]] = []
+        self.weeks: Dict[str, List] = {}
+        self.months: Dict[str, List] = {}
+        self.weekdays = [[0, 0.0, 0] for _ in range(7)]
+        self.total_views = 0
+        self.rating_sum = 0.0
+        self.rating_count = 0
+        self.first_day: Optional[date] = None
+        self.last_day: Optional[date] = None
+        if not rows:
+            return
+
+        day_keys, views, sums, counts = zip(*rows)
+        epoch_days = np.array(day_keys, dtype='datetime64[D]')
+        days = epoch_days.astype(np.int64)
+        views = np.array(views, dtype=np.int64)
+        sums = np.array(sums, dtype=np.float64)
+        counts = np.array(counts, dtype=np.int64)
+
+        self.days = list(zip(day_keys, views.tolist(), _rounded_means(sums, counts)))
+        self.first_day, self.last_day = date.fromisoformat(day_keys[0]), date.fromisoformat(day_keys[-1])
+        self.total_views = int(views.sum())
+        self.rating_sum = float(sums.sum())
+        self.rating_count = int(counts.sum())
+
+        # 1970-01-01 was a Thursday: Sunday-first weekday is (days + 4) % 7
+        weekday = (days + 4) % 7
+        for bucket, total_views, total_sum, total_count in zip(
+                self.weekdays,
+                np.bincount(weekday, weights=views, minlength=7).tolist(),
+                np.bincount(weekday, weights=sums, minlength=7).tolist(),
+                np.bincount(weekday, weights=counts, minlength=7).tolist()):
+            bucket[:] = [int(total_views), total_sum, int(total_count)]
+
+        # %W weeks: days before the year's first Monday are week 00
+        year_start = epoch_days.astype('datetime64[Y]').astype('datetime64[D]').astype(np.int64)
+        week = (days - year_start + 7 - (days + 3) % 7) // 7
+        year = epoch_days.astype('datetime64[Y]').astype(np.int64) + 1970
+        self.weeks = self._bucket(year * 100 + week, views, sums, counts,
+                                  lambda key: f'{key // 100}-W{key % 100:02d}')
+
+        month = epoch_days.astype('datetime64[M]').astype(np.int64)
+        self.months = self._bucket(month, views, sums, counts,
+                                   lambda key: f'{1970 + key // 12}-{key % 12 + 1:02d}')
+
+        # Views and ratings before each day, for splitting by position
+        self._views_before = np.cumsum(views) - views
+        self._sums_before = np.cumsum(sums) - sums
+        self._counts_before = np.cumsum(counts) - counts
+        self._day_keys = day_keys
+
+    @staticmethod
+    def _bucket(keys, views, sums, counts, label) -> Dict[str, List]:
+        """Sum views and ratings per ascending integer key, labelled for display."""
+        unique, inverse = np.unique(keys, return_inverse=True)
+        totals = zip(np.bincount(inverse, weights=views).tolist(),
+                     np.bincount(inverse, weights=sums).tolist(),
+                     np.bincount(inverse, weights=counts).tolist())
+        return {label(key): [int(v), s, int(c)] for key, (v, s, c) in zip(unique.tolist(), totals)}
+
+    def locate_view(self, position: int) -> Tuple[str, int, float, int]:
+        """Find the day holding the view at a 0-based position in time order.
+
+        Returns the day and the view count, rating sum and rating count of
+        every day before it.
+        """
+        index = int(np.searchsorted(self._views_before, position, side='right')) - 1
+        return (self._day_keys[index], int(self._views_before[index]),
+                float(self._sums_before[index]), int(self._counts_before[index]))
+
@@ -0,0 +1,189 @@
+"""TMDB response caches for ReelTracker.
+
+``TMDBMemoryCache`` is the in-process tier: an LRU per cache type with a
+byte budget each, so a burst of distinct searches cannot grow memory or
+push out movie details. ``TMDBCache`` stores responses in a small SQLite
+file so restarts and new workers start warm.
+
+Entries keep the time they were fetched; freshness is decided by the
+caller's TTLs, which lets expired entries still be served while a refresh
+runs or when TMDB is unreachable. A ``None`` payload records a negative
+result (not found, empty or failed response).
+"""
+
+import json
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+# Share of the memory budget given to each cache type
+MEMORY_BUDGET_SHARES = {
+    'search': 0.35,
+    'movie': 0.45,
+    'popular': 0.1,
+    'config': 0.1
+}
+
+
+def _deep_size(value: Any) -> int:
+    """Approximate the memory held by a decoded JSON value in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(item) for item in value)
+    return size
+
+
+class TMDBMemoryCache:
+    """Thread-safe LRU of ``(data, fetched_at)`` entries, bounded in bytes per cache type."""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, shares: Optional[Dict[str, float]] = None):
+        self.max_bytes = max_bytes
+        self.shares = shares or MEMORY_BUDGET_SHARES
+        self._lock = threading.Lock()
+
+        # cache_type -> OrderedDict of key -> (entry, size)
+        self._entries: Dict[str, "OrderedDict[str, Tuple[Tuple[Any, float], int]]"] = {}
+        self._stats: Dict[str, Dict[str, int]] = {}
+
+    def budget(self, cache_type: str) -> int:
+        """Byte budget for one cache type; unknown types get the smallest share."""
+        share = self.shares.get(cache_type, min(self.shares.values()))
+        return int(self.max_bytes * share)
+
+    def _type(self, cache_type: str):
+        """Get the entries and counters for a type; caller holds ``self._lock``."""
+        if cache_type not in self._entries:
+            self._entries[cache_type] = OrderedDict()
+            self._stats[cache_type] = {'bytes': 0, 'hits': 0, 'misses': 0, 'evictions': 0}
+        return self._entries[cache_type], self._stats[cache_type]
+
+    def get(self, key: str, cache_type: str) -> Optional[Tuple[Any, float]]:
+        """Return the ``(data, fetched_at)`` entry for a key, counting the hit or miss."""
+        with self._lock:
+            entries, stats = self._type(cache_type)
+            item = entries.get(key)
+            if item is None:
+                stats['misses'] += 1
+                return None
+            entries.move_to_end(key)
+            stats['hits'] += 1
+            return item[0]
+
+    def set(self, key: str, cache_type: str, entry: Tuple[Any, float]) -> None:
+        """Store an entry, evicting the type's least recently used entries to fit."""
+        size = _deep_size(key) + _deep_size(entry[0])
+        budget = self.budget(cache_type)
+
+        with self._lock:
+            entries, stats = self._type(cache_type)
+            if key in entries:
+                stats['bytes'] -= entries.pop(key)[1]
+            if size > budget:
+                return  # Never cache something larger than the whole budget
+
+            entries[key] = (entry, size)
+            stats['bytes'] += size
+            while stats['bytes'] > budget:
+                _, (_, evicted_size) = entries.popitem(last=False)
+                stats['bytes'] -= evicted_size
+                stats['evictions'] += 1
+
+    def clear(self) -> None:
+        """Drop every entry, keeping the counters."""
+        with self._lock:
+            for cache_type, entries in self._entries.items():
+                entries.clear()
+                self._stats[cache_type]['bytes'] = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(entries) for entries in self._entries.values())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Get entry count, approximate bytes and hit ratio per cache type."""
+        with self._lock:
+            report = {}
+            for cache_type, entries in self._entries.items():
+                stats = dict(self._stats[cache_type])
+                lookups = stats['hits'] + stats['misses']
+                stats.update({
+                    'entries': len(entries),
+                    'budget_bytes': self.budget(cache_type),
+                    'hit_ratio': round(stats['hits'] / lookups, 3) if lookups else 0
+                })
+                report[cache_type] = stats
+            return report
+
+
+CACHE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS tmdb_cache (
+        key TEXT PRIMARY KEY,
+        cache_type TEXT NOT NULL,
+        payload TEXT,
+        fetched_at REAL NOT NULL
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_tmdb_cache_fetched ON tmdb_cache(fetched_at);
+'''
+
+
+class TMDBCache:
+    """SQLite-backed key/value store for TMDB responses."""
+
+    def __init__(self, db_path: str = 'tmdb_cache.db'):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA busy_timeout=5000')
+        self._conn.executescript(CACHE_SCHEMA)
+
+    def get(self, key: str) -> Optional[Tuple[Any, float]]:
+        """Return ``(data, fetched_at)`` or None; data is None for negative entries."""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT payload, fetched_at FROM tmdb_cache WHERE key = ?', (key,)
+            ).fetchone()
+        if row is None:
+            return None
+
+        payload, fetched_at = row
+        try:
+            data = json.loads(payload) if payload is not None else None
+        except ValueError:
+            return None
+        return data, fetched_at
+
+    def set(self, key: str, cache_type: str, data: Any, fetched_at: Optional[float] = None) -> None:
+        """Store a response, or a negative entry when ``data`` is None."""
+        payload = json.dumps(data) if data is not None else None
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO tmdb_cache (key, cache_type, payload, fetched_at) VALUES (?, ?, ?, ?)',
+                (key, cache_type, payload, fetched_at or time.time())
+            )
+
+    def prune(self, max_age: float) -> int:
+        """Delete entries fetched more than ``max_age`` seconds ago; returns rows removed."""
+        with self._lock:
+            cursor = self._conn.execute(
+                'DELETE FROM tmdb_cache WHERE fetched_at < ?', (time.time() - max_age,)
+            )
+        return cursor.rowcount
+
+    def clear(self) -> None:
+        """Remove every cached response."""
+        with self._lock:
+            self._conn.execute('DELETE FROM tmdb_cache')
+
+    def close(self) -> None:
+        """Close the cache database."""
+        with self._lock:
+            self._conn.close()
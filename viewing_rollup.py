@@ -0,0 +1,234 @@
+"""Daily viewing rollups for ReelTracker timelines.
+
+``viewing_daily_rollup`` holds one row per day with the number of views and
+the sum and count of the ratings of the movies watched that day;
+``viewing_daily_genres`` holds views per day and genre. Triggers keep both
+current as viewing history, ratings and movie genres change, so timeline
+charts aggregate a few hundred day rows instead of re-reading every view.
+
+Days are the base tier. Week, month and weekday series are ``GROUP BY``
+sums over the day rows, so a multi-year range reads at most one row per
+day whatever the granularity.
+
+``viewing_history`` also gets generated ``watched_epoch`` and ``day``
+columns derived from ``watched_at``, with indexes on the day, so per-day
+grouping and day windows read an index instead of applying ``date()`` to
+every row.
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+from database import execute_script
+from genre_service import ensure_genre_tables
+
+
+# Generated from watched_at, which stays the column the app writes
+VIEWING_TIME_COLUMNS = {
+    'watched_epoch': "INTEGER GENERATED ALWAYS AS (CAST(strftime('%s', watched_at) AS INTEGER)) VIRTUAL",
+    'day': "TEXT GENERATED ALWAYS AS (date(watched_at)) VIRTUAL",
+}
+
+# Added by earlier releases; weeks and months are summed from the day rollup
+DROPPED_VIEWING_TIME_COLUMNS = ['week', 'month']
+
+VIEWING_TIME_INDEXES = '''
+    DROP INDEX IF EXISTS idx_viewing_movie;
+    CREATE INDEX IF NOT EXISTS idx_viewing_day_movie ON viewing_history(day, movie_id);
+    CREATE INDEX IF NOT EXISTS idx_viewing_movie_day ON viewing_history(movie_id, day);
+'''
+
+ROLLUP_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS viewing_daily_rollup (
+        day TEXT PRIMARY KEY,
+        views INTEGER NOT NULL DEFAULT 0,
+        rating_sum REAL NOT NULL DEFAULT 0,
+        rating_count INTEGER NOT NULL DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS viewing_daily_genres (
+        day TEXT NOT NULL,
+        genre_id INTEGER NOT NULL,
+        views INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (day, genre_id)
+    ) WITHOUT ROWID;
+'''
+
+# Statement bodies shared by the triggers; {row} is NEW or OLD
+_ADD_VIEW = '''
+    INSERT INTO viewing_daily_rollup (day, views, rating_sum, rating_count)
+    VALUES ({row}.day, 1,
+            COALESCE((SELECT rating FROM user_ratings WHERE movie_id = {row}.movie_id), 0),
+            (SELECT COUNT(*) FROM user_ratings WHERE movie_id = {row}.movie_id))
+    ON CONFLICT (day) DO UPDATE SET
+        views = views + excluded.views,
+        rating_sum = rating_sum + excluded.rating_sum,
+        rating_count = rating_count + excluded.rating_count;
+    INSERT INTO viewing_daily_genres (day, genre_id, views)
+    SELECT {row}.day, genre_id, 1 FROM movie_genres WHERE movie_id = {row}.movie_id
+    ON CONFLICT (day, genre_id) DO UPDATE SET views = views + 1;
+'''
+
+_REMOVE_VIEW = '''
+    UPDATE viewing_daily_rollup SET
+        views = views - 1,
+        rating_sum = rating_sum - COALESCE((SELECT rating FROM user_ratings WHERE movie_id = {row}.movie_id), 0),
+        rating_count = rating_count - (SELECT COUNT(*) FROM user_ratings WHERE movie_id = {row}.movie_id)
+    WHERE day = {row}.day;
+    UPDATE viewing_daily_genres SET views = views - 1
+    WHERE day = {row}.day
+      AND genre_id IN (SELECT genre_id FROM movie_genres WHERE movie_id = {row}.movie_id);
+'''
+
+# Applies a rating to every day the movie was watched; {sign} is + or -
+_APPLY_RATING = '''
+    UPDATE viewing_daily_rollup SET
+        rating_sum = rating_sum {sign} {row}.rating * v.view_count,
+        rating_count = rating_count {sign} v.view_count
+    FROM (SELECT day, COUNT(*) AS view_count
+          FROM viewing_history WHERE movie_id = {row}.movie_id GROUP BY day) AS v
+    WHERE viewing_daily_rollup.day = v.day;
+'''
+
+_ADD_GENRE = '''
+    INSERT INTO viewing_daily_genres (day, genre_id, views)
+    SELECT day, {row}.genre_id, COUNT(*)
+    FROM viewing_history WHERE movie_id = {row}.movie_id GROUP BY day
+    ON CONFLICT (day, genre_id) DO UPDATE SET views = views + excluded.views;
+'''
+
+_REMOVE_GENRE = '''
+    UPDATE viewing_daily_genres SET views = views - v.view_count
+    FROM (SELECT day, COUNT(*) AS view_count
+          FROM viewing_history WHERE movie_id = {row}.movie_id GROUP BY day) AS v
+    WHERE viewing_daily_genres.day = v.day AND viewing_daily_genres.genre_id = {row}.genre_id;
+'''
+
+ROLLUP_TRIGGERS = {
+    'viewing_rollup_insert': ('AFTER INSERT ON viewing_history',
+                              _ADD_VIEW.format(row='new')),
+    'viewing_rollup_delete': ('AFTER DELETE ON viewing_history',
+                              _REMOVE_VIEW.format(row='old')),
+    'viewing_rollup_update': ('AFTER UPDATE OF movie_id, watched_at ON viewing_history',
+                              _REMOVE_VIEW.format(row='old') + _ADD_VIEW.format(row='new')),
+    'rating_rollup_insert': ('AFTER INSERT ON user_ratings',
+                             _APPLY_RATING.format(row='new', sign='+')),
+    'rating_rollup_delete': ('AFTER DELETE ON user_ratings',
+                             _APPLY_RATING.format(row='old', sign='-')),
+    'rating_rollup_update': ('AFTER UPDATE OF movie_id, rating ON user_ratings',
+                             _APPLY_RATING.format(row='old', sign='-') + _APPLY_RATING.format(row='new', sign='+')),
+    'genre_rollup_insert': ('AFTER INSERT ON movie_genres',
+                            _ADD_GENRE.format(row='new')),
+    'genre_rollup_delete': ('AFTER DELETE ON movie_genres',
+                            _REMOVE_GENRE.format(row='old')),
+}
+
+# Period key computed from the day column for each granularity
+_PERIOD_KEYS = {
+    'day': 'day',
+    'week': "strftime('%Y-W%W', day)",
+    'month': 'substr(day, 1, 7)',
+    'weekday': "CAST(strftime('%w', day) AS INTEGER)",
+}
+
+
+def rebuild_viewing_rollup(db: sqlite3.Connection) -> None:
+    """Recompute both rollup tables from viewing history; the caller commits."""
+    db.execute('DELETE FROM viewing_daily_rollup')
+    db.execute('DELETE FROM viewing_daily_genres')
+    db.execute('''
+        INSERT INTO viewing_daily_rollup (day, views, rating_sum, rating_count)
+        SELECT vh.day, COUNT(*), COALESCE(SUM(ur.rating), 0), COUNT(ur.rating)
+        FROM viewing_history vh
+        LEFT JOIN user_ratings ur ON ur.movie_id = vh.movie_id
+        GROUP BY vh.day
+    ''')
+    db.execute('''
+        INSERT INTO viewing_daily_genres (day, genre_id, views)
+        SELECT vh.day, mg.genre_id, COUNT(*)
+        FROM viewing_history vh
+        JOIN movie_genres mg ON mg.movie_id = vh.movie_id
+        GROUP BY vh.day, mg.genre_id
+    ''')
+
+
+def ensure_viewing_time_columns(db: sqlite3.Connection) -> None:
+    """Add the generated time columns and their indexes to viewing_history.
+
+    Generated columns cost nothing to add; building the indexes computes
+    them once for every existing row. The caller commits.
+    """
+    columns = {row[1] for row in db.execute('PRAGMA table_xinfo(viewing_history)')}
+    if not columns:
+        return
+
+    for name, definition in VIEWING_TIME_COLUMNS.items():
+        if name not in columns:
+            db.execute(f'ALTER TABLE viewing_history ADD COLUMN {name} {definition}')
+    execute_script(db, VIEWING_TIME_INDEXES)
+
+
+def drop_unused_viewing_time_columns(db: sqlite3.Connection) -> None:
+    """Drop the unindexed ``week`` and ``month`` generated columns; the caller commits."""
+    columns = {row[1] for row in db.execute('PRAGMA table_xinfo(viewing_history)')}
+    for name in DROPPED_VIEWING_TIME_COLUMNS:
+        if name in columns:
+            db.execute(f'ALTER TABLE viewing_history DROP COLUMN {name}')
+
+
+def ensure_viewing_rollup(db: sqlite3.Connection) -> None:
+    """Create the rollup tables and triggers, filling them once from history; the caller commits."""
+    tables = {row[0] for row in db.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    if not {'viewing_history', 'user_ratings'} <= tables:
+        return
+
+    # Triggers read the generated day column and movie_genres
+    ensure_viewing_time_columns(db)
+    ensure_genre_tables(db)
+    execute_script(db, ROLLUP_SCHEMA)
+    # Recreate triggers whose stored SQL predates the current bodies
+    existing = dict(db.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'"))
+    for name, (event, body) in ROLLUP_TRIGGERS.items():
+        sql = f'CREATE TRIGGER {name} {event} BEGIN {body} END'
+        if existing.get(name) != sql:
+            db.execute(f'DROP TRIGGER IF EXISTS {name}')
+            db.execute(sql)
+
+    if 'viewing_daily_rollup' not in tables:
+        rebuild_viewing_rollup(db)
+
+
+def get_viewing_rollup(db: sqlite3.Connection, since_day: str,
+                       period: str = 'day') -> List[Tuple[str, int, float, int]]:
+    """Sum views and ratings per day, week, month or weekday since a date.
+
+    Returns ``(period, views, rating_sum, rating_count)`` rows in period
+    order; weekday periods are integers with Sunday as 0.
+    """
+    key = _PERIOD_KEYS[period]
+    rows = db.execute(f'''
+        SELECT {key} AS period, SUM(views), SUM(rating_sum), SUM(rating_count)
+        FROM viewing_daily_rollup
+        WHERE day >= ?
+        GROUP BY period
+        HAVING SUM(views) > 0
+        ORDER BY period
+    ''', (since_day,)).fetchall()
+    return [(row[0], row[1], row[2], row[3]) for row in rows]
+
+
+def get_monthly_genre_rollup(db: sqlite3.Connection, since_day: str) -> List[Tuple[str, str, int]]:
+    """Count views per month and genre since a date.
+
+    Rows come back ordered by month, then by count descending.
+    """
+    rows = db.execute('''
+        SELECT substr(dg.day, 1, 7) AS month, g.name AS genre, SUM(dg.views) AS count
+        FROM viewing_daily_genres dg
+        JOIN genres g ON g.id = dg.genre_id
+        WHERE dg.day >= ?
+        GROUP BY month, g.id
+        HAVING count > 0
+        ORDER BY month, count DESC, g.name
+    ''', (since_day,)).fetchall()
+    return [(row[0], row[1], row[2]) for row in rows]